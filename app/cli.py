@@ -0,0 +1,170 @@
+"""
+Perintah maintenance dari terminal.
+
+Contoh:
+    python -m app.cli rebuild-rollups
+    python -m app.cli migrate
+    python -m app.cli check-indexes
+    python -m app.cli import-statement mutasi.csv --wallet 1
+    python -m app.cli check-balances
+    python -m app.cli create-tenant keluarga-budi --pin 123456
+    python -m app.cli --tenant keluarga-budi rebuild-rollups
+"""
+import argparse
+import getpass
+import sys
+import time
+from .database import engine, Base, shards
+from . import migrations, models, security, seed, tenancy
+from .services import balances, budgets, data_version, rollup, importer # data_version: listener versi data
+
+
+def cmd_rebuild_rollups(args):
+    db = shards.session(args.tenant)
+    try:
+        mismatches = rollup.verify_rollups(db)
+        if mismatches:
+            print(f"⚠️  {len(mismatches)} rollup tidak cocok dengan tabel transaksi:")
+            for month, cat_id, wallet_id, actual, expected in mismatches:
+                print(f"   {month} kategori={cat_id} dompet={wallet_id} rollup={actual} transaksi={expected}")
+        else:
+            print("✅ Rollup sudah sesuai dengan tabel transaksi.")
+
+        if not args.check:
+            # Rollup & counter budget dalam satu commit: tidak ada saat rollup kosong / budget basi
+            rollup.rebuild_rollups(db)
+            budgets.rebuild_spent(db)
+            db.commit()
+            print("🔁 Rollup & counter budget dibangun ulang dari tabel transaksi.")
+    finally:
+        db.close()
+
+
+def cmd_migrate(args):
+    # Migrasi sudah dijalankan di main(); cukup tampilkan versi yang tercatat
+    with shards.get(args.tenant).engine.connect() as conn:
+        versions = sorted(migrations.applied_versions(conn))
+    print(f"✅ Skema database pada versi {versions[-1] if versions else 0}.")
+
+
+def cmd_check_indexes(args):
+    db = shards.session(args.tenant)
+    try:
+        failed = 0
+        for name, expected_index, ok, plan in migrations.explain_query_plans(db):
+            print(f"{'✅' if ok else '❌'} {name}: {expected_index}")
+            for line in plan:
+                print(f"     {line}")
+            failed += 0 if ok else 1
+    finally:
+        db.close()
+    if failed:
+        sys.exit(1)
+
+
+def cmd_import_statement(args):
+    file_format = args.format or ("ofx" if args.path.lower().endswith((".ofx", ".qfx")) else "csv")
+    db = shards.session(args.tenant)
+    try:
+        started = time.perf_counter()
+        with open(args.path, "rb") as f:
+            result = importer.import_statement(db, f, file_format, wallet_id=args.wallet)
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+    print(f"✅ {result.imported} transaksi masuk, {result.duplicates} duplikat, "
+          f"{result.skipped} dilewati ({result.batches} batch, {elapsed:.1f} detik)")
+    if result.invalid:
+        print(f"⚠️  {result.invalid} baris tidak terbaca:")
+        for error in result.errors:
+            print(f"   - {error}")
+
+
+def cmd_check_balances(args):
+    db = shards.session(args.tenant)
+    try:
+        mismatches = balances.verify_balances(db)
+        if mismatches:
+            print(f"⚠️  {len(mismatches)} dompet tidak cocok dengan jurnal:")
+            for wallet_id, name, stored, from_postings in mismatches:
+                print(f"   {name} (id={wallet_id}) saldo={stored} jurnal={from_postings}")
+        else:
+            print("✅ Saldo dompet sesuai dengan jurnal (postings).")
+
+        created = balances.refresh_checkpoints(db)
+        db.commit()
+        print(f"🔁 {created} checkpoint saldo akhir bulan ditambahkan.")
+    finally:
+        db.close()
+    if mismatches:
+        sys.exit(1)
+
+
+def cmd_create_tenant(args):
+    # Shard sudah dibuat, dimigrasi & di-seed di main(); tinggal user + PIN keluarga
+    db = shards.session(args.tenant)
+    try:
+        if db.query(models.User).first() is not None:
+            print(f"Keluarga '{args.tenant}' sudah punya PIN, tidak diubah.")
+        else:
+            seed.ensure_user(db, args.pin)
+    finally:
+        db.close()
+    print(f"✅ Keluarga '{args.tenant}' siap di {shards.path_for(args.tenant)}.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    parser.add_argument("--tenant", default=tenancy.DEFAULT_TENANT, help="Keluarga (shard) yang diproses")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("rebuild-rollups", help="Bangun ulang rollup bulanan dari tabel transaksi")
+    p.add_argument("--check", action="store_true", help="Hanya cek selisih, tanpa menulis ulang")
+    p.set_defaults(func=cmd_rebuild_rollups)
+
+    p = sub.add_parser("migrate", help="Terapkan migrasi skema yang belum dijalankan")
+    p.set_defaults(func=cmd_migrate)
+
+    p = sub.add_parser("check-indexes", help="Cek EXPLAIN QUERY PLAN query utama memakai index komposit")
+    p.set_defaults(func=cmd_check_indexes)
+
+    p = sub.add_parser("import-statement", help="Import mutasi bank (CSV / OFX)")
+    p.add_argument("path")
+    p.add_argument("--wallet", type=int, help="Id dompet default (jika file tidak punya kolom dompet)")
+    p.add_argument("--format", choices=["csv", "ofx"])
+    p.set_defaults(func=cmd_import_statement)
+
+    p = sub.add_parser("check-balances", help="Cek saldo dompet vs jurnal & lengkapi checkpoint saldo")
+    p.set_defaults(func=cmd_check_balances)
+
+    p = sub.add_parser("create-tenant", help="Buat database keluarga baru (jika TENANT_AUTO_CREATE mati)")
+    p.add_argument("name", help="Nama keluarga, sama dengan yang diisi di halaman login")
+    p.add_argument("--pin", help="PIN login keluarga (ditanyakan jika tidak diisi)")
+    p.set_defaults(func=cmd_create_tenant)
+
+    args = parser.parse_args(argv)
+    if args.command == "create-tenant":
+        args.tenant = args.name
+        # PIN dicek sebelum file shard dibuat (shard tanpa user tidak bisa dipakai login)
+        args.pin = args.pin or getpass.getpass("PIN keluarga: ")
+        if not security.valid_new_pin(args.pin):
+            parser.error(f"PIN minimal {security.PIN_MIN_LENGTH} angka")
+    try:
+        args.tenant = tenancy.normalize(args.tenant)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.tenant == tenancy.DEFAULT_TENANT:
+        Base.metadata.create_all(bind=engine)
+        migrations.run_migrations(engine)
+    else:
+        # Shard keluarga dimigrasi saat dibuka; hanya create-tenant yang boleh membuat file baru
+        try:
+            shards.get(args.tenant, create=args.command == "create-tenant")
+        except tenancy.UnknownTenant:
+            parser.error(f"keluarga '{args.tenant}' belum ada (jalankan create-tenant dulu)")
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,81 @@ from dotenv import load_dotenv
 load_dotenv()
 
 class Settings:
-    # Default ke 123456 jika tidak ada di env
-    ADMIN_PIN = os.getenv("ADMIN_PIN", "123456") 
+    # PIN login keluarga default (di-hash saat user pertama dibuat)
+    ADMIN_PIN = os.getenv("ADMIN_PIN", "512323")
     SECRET_KEY = os.getenv("SECRET_KEY", "RAHASIA_SUPER_AMAN_JANGAN_DISEBAR")
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
+    GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+    GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL", "") # Kosong = endpoint Google; isi untuk stub server lokal
+    GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "30"))
+    GEMINI_MAX_ATTEMPTS = int(os.getenv("GEMINI_MAX_ATTEMPTS", "3"))
+    GEMINI_BREAKER_THRESHOLD = int(os.getenv("GEMINI_BREAKER_THRESHOLD", "5"))
+    GEMINI_BREAKER_COOLDOWN_SECONDS = float(os.getenv("GEMINI_BREAKER_COOLDOWN_SECONDS", "60"))
+    # Jumlah worker background untuk generate saran AI
+    ADVISOR_WORKERS = int(os.getenv("ADVISOR_WORKERS", "2"))
+    # Cache saran AI di memori (di depan tabel ai_advice)
+    ADVICE_CACHE_SIZE = int(os.getenv("ADVICE_CACHE_SIZE", "32"))
+    ADVICE_CACHE_TTL_SECONDS = int(os.getenv("ADVICE_CACHE_TTL_SECONDS", "21600"))
+
+    # Analisa tren bulanan (halaman Laporan)
+    TREND_MONTHS = int(os.getenv("TREND_MONTHS", "6"))
+    TREND_ROLLING_WINDOW = int(os.getenv("TREND_ROLLING_WINDOW", "3"))
+
+    # Jumlah halaman HTML hasil render yang disimpan (per ETag), 0 = tidak disimpan
+    HTML_CACHE_SIZE = int(os.getenv("HTML_CACHE_SIZE", "32"))
+    
+    # Database Settings
+    SQLALCHEMY_DATABASE_URL = os.getenv("SQLALCHEMY_DATABASE_URL", "sqlite:///./data/finance.db")
+    # "concurrent" = WAL + busy timeout (banyak HP menulis bersamaan), "default" = setting bawaan SQLite
+    DB_PROFILE = os.getenv("DB_PROFILE", "concurrent")
+    DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+    DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", "16384"))
+    DB_MMAP_SIZE_MB = int(os.getenv("DB_MMAP_SIZE_MB", "128"))
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "8"))
+    # Group commit: gabungkan write yang datang dalam beberapa ms jadi satu commit
+    GROUP_COMMIT_ENABLED = os.getenv("GROUP_COMMIT_ENABLED", "0") == "1"
+    GROUP_COMMIT_WINDOW_MS = int(os.getenv("GROUP_COMMIT_WINDOW_MS", "5"))
+    GROUP_COMMIT_MAX_BATCH = int(os.getenv("GROUP_COMMIT_MAX_BATCH", "64"))
+    
+    # Multi-keluarga: 1 file SQLite per keluarga di TENANT_DATA_DIR (keluarga default tetap di URL di atas)
+    TENANT_DATA_DIR = os.getenv("TENANT_DATA_DIR", "./data/tenants")
+    TENANT_MAX_OPEN = int(os.getenv("TENANT_MAX_OPEN", "32")) # Shard (engine) yang boleh terbuka bersamaan
+    TENANT_IDLE_SECONDS = int(os.getenv("TENANT_IDLE_SECONDS", "600"))
+    TENANT_POOL_SIZE = int(os.getenv("TENANT_POOL_SIZE", "2")) # Koneksi per shard
+    TENANT_CACHE_SIZE_KB = int(os.getenv("TENANT_CACHE_SIZE_KB", "2048")) # Page cache SQLite per koneksi shard
+    # 1 = keluarga baru otomatis dibuat saat login pertama; 0 = harus lewat `python -m app.cli create-tenant`
+    TENANT_AUTO_CREATE = os.getenv("TENANT_AUTO_CREATE", "0") == "1"
+    
+    # Observability: /metrics (format Prometheus) hanya aktif jika token diisi
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+    # Slow-query log: statement >= N ms dicatat beserta EXPLAIN QUERY PLAN (0 = mati)
+    SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+    SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "1") == "1"
+    SLOW_QUERY_LOG_PATH = os.getenv("SLOW_QUERY_LOG_PATH", "") # Kosong = hanya ke logger aplikasi
+
+    # Import Mutasi Bank
+    IMPORT_RULES_PATH = os.getenv("IMPORT_RULES_PATH", "import_rules.json") # Opsional, menimpa rules default
+    IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "5000"))
+    
+    # Foto struk: disimpan per hash di RECEIPT_DIR/<keluarga>, dikompresi di process pool
+    RECEIPT_DIR = os.getenv("RECEIPT_DIR", "./data/receipts")
+    RECEIPT_MAX_MB = int(os.getenv("RECEIPT_MAX_MB", "15"))
+    RECEIPT_WORKERS = int(os.getenv("RECEIPT_WORKERS", "2"))
+    RECEIPT_MAX_SIDE = int(os.getenv("RECEIPT_MAX_SIDE", "1600")) # Piksel sisi terpanjang foto hasil kompresi
+    RECEIPT_QUALITY = int(os.getenv("RECEIPT_QUALITY", "80"))
+    RECEIPT_THUMB_SIDE = int(os.getenv("RECEIPT_THUMB_SIDE", "320"))
+    RECEIPT_THUMB_QUALITY = int(os.getenv("RECEIPT_THUMB_QUALITY", "70"))
+
+    # Proyeksi goal (Monte Carlo lokal): jumlah skenario, riwayat cashflow & horizon (bulan)
+    GOAL_SIMULATIONS = int(os.getenv("GOAL_SIMULATIONS", "5000"))
+    GOAL_HISTORY_MONTHS = int(os.getenv("GOAL_HISTORY_MONTHS", "12"))
+    GOAL_HORIZON_MONTHS = int(os.getenv("GOAL_HORIZON_MONTHS", "120"))
+    
+    # Tagihan berulang: auto-post saat jatuh tempo (jam lokal), H-N ditandai merah
+    BILL_AUTOPOST_ENABLED = os.getenv("BILL_AUTOPOST_ENABLED", "1") == "1"
+    BILL_AUTOPOST_HOUR = int(os.getenv("BILL_AUTOPOST_HOUR", "6"))
+    BILL_ALERT_DAYS = int(os.getenv("BILL_ALERT_DAYS", "3"))
     
     # Email Settings
     MAIL_USERNAME = os.getenv("MAIL_USERNAME", "")
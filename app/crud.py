@@ -1,22 +1,33 @@
 from sqlalchemy.orm import Session
+from datetime import date
 from . import models, schemas
+from .services import ledger, refdata
 
 def get_wallets(db: Session):
+    # Objek ORM lengkap dengan saldo terkini (saldo tidak di-cache).
+    # Untuk daftar nama dompet di form, pakai refdata.cache.wallets(db).
     return db.query(models.Wallet).filter(models.Wallet.is_active == 1).all()
 
 def create_wallet(db: Session, wallet: schemas.WalletCreate):
-    db_wallet = models.Wallet(**wallet.dict())
+    data = wallet.dict()
+    initial_balance = data.pop("initial_balance", 0) or 0
+    db_wallet = models.Wallet(**data, initial_balance=0)
     db.add(db_wallet)
+    db.flush()
+    if initial_balance:
+        ledger.post_entry(db, date.today(), ledger.opening_balance_legs(db_wallet.id, initial_balance))
     db.commit()
+    refdata.cache.invalidate(db)
     db.refresh(db_wallet)
     return db_wallet
 
 def get_categories(db: Session):
-    return db.query(models.Category).all()
+    return refdata.cache.categories(db)
 
 def create_category(db: Session, category: schemas.CategoryCreate):
     db_category = models.Category(**category.dict())
     db.add(db_category)
     db.commit()
+    refdata.cache.invalidate(db)
     db.refresh(db_category)
     return db_category
@@ -1,24 +1,105 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from fastapi import HTTPException, Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import StaticPool
+from .config import settings
+from .tenancy import DEFAULT_TENANT, ShardPool, UnknownTenant
 
-# Database URL untuk SQLite
-SQLALCHEMY_DATABASE_URL = "sqlite:///./data/finance.db"
+# Database URL (default SQLite di ./data/finance.db, bisa di-override via env)
+SQLALCHEMY_DATABASE_URL = settings.SQLALCHEMY_DATABASE_URL
 
-# Create Engine
-# connect_args={"check_same_thread": False} diperlukan untuk SQLite di FastAPI
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+# Profil engine SQLite
+# - default: journal bawaan (DELETE), writer mengunci seluruh file
+# - concurrent: WAL, reader tidak terblokir writer; writer menunggu (busy_timeout)
+#   alih-alih langsung gagal "database is locked"
+ENGINE_PROFILES = {
+    "default": {},
+    "concurrent": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": settings.DB_BUSY_TIMEOUT_MS,
+        "cache_size": -settings.DB_CACHE_SIZE_KB, # Nilai negatif = satuan KiB
+        "mmap_size": settings.DB_MMAP_SIZE_MB * 1024 * 1024,
+        "temp_store": "MEMORY",
+    },
+}
+
+def _is_memory_url(url: str) -> bool:
+    return url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in url
+
+def create_db_engine(url: str = SQLALCHEMY_DATABASE_URL, profile: str = settings.DB_PROFILE,
+                     pool_size: int = None, cache_size_kb: int = None):
+    pool_size = settings.DB_POOL_SIZE if pool_size is None else pool_size
+    if not url.startswith("sqlite"):
+        return create_engine(url, pool_size=pool_size, max_overflow=settings.DB_MAX_OVERFLOW)
+
+    # connect_args={"check_same_thread": False} diperlukan untuk SQLite di FastAPI
+    connect_args = {"check_same_thread": False}
+    if _is_memory_url(url):
+        # Database memory hanya hidup selama koneksinya, jadi pakai 1 koneksi bersama
+        return create_engine(url, connect_args=connect_args, poolclass=StaticPool)
 
-# SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    pragmas = dict(ENGINE_PROFILES[profile])
+    if cache_size_kb is not None and "cache_size" in pragmas:
+        pragmas["cache_size"] = -cache_size_kb
+    engine = create_engine(
+        url,
+        connect_args=connect_args,
+        pool_size=pool_size,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+    )
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return engine
+
+# Create Engine
+engine = create_db_engine()
 
 # Base class untuk models
 Base = declarative_base()
 
-# Dependency untuk mendapatkan DB session
-def get_db():
-    db = SessionLocal()
+def _create_shard_engine(url: str):
+    # Shard keluarga: pool koneksi & page cache kecil, karena puluhan shard bisa terbuka bersamaan
+    return create_db_engine(url, pool_size=settings.TENANT_POOL_SIZE, cache_size_kb=settings.TENANT_CACHE_SIZE_KB)
+
+def _init_shard(tenant: str, shard_engine):
+    # Import di sini: seed -> models -> database (Base)
+    from .seed import init_shard
+    init_shard(tenant, shard_engine)
+
+# Pool shard per keluarga (lihat app/tenancy.py); keluarga default = engine di atas
+shards = ShardPool(
+    engine, _create_shard_engine, _init_shard,
+    directory=settings.TENANT_DATA_DIR,
+    max_open=settings.TENANT_MAX_OPEN,
+    idle_seconds=settings.TENANT_IDLE_SECONDS,
+    auto_create=settings.TENANT_AUTO_CREATE,
+)
+
+# SessionLocal class (keluarga default)
+SessionLocal = shards.default.session_factory
+
+def request_tenant(request: Request) -> str:
+    # Keluarga dipilih saat login dan disimpan di cookie session
+    return request.scope.get("session", {}).get("tenant", DEFAULT_TENANT)
+
+# Dependency untuk sessionmaker keluarga yang sedang login (untuk generator / worker
+# yang tetap berjalan setelah dependency get_db ditutup)
+def get_session_factory(request: Request):
+    try:
+        return shards.get(request_tenant(request)).session_factory
+    except UnknownTenant:
+        raise HTTPException(status_code=403, detail="Keluarga tidak ditemukan")
+
+# Dependency untuk mendapatkan DB session (shard keluarga yang sedang login)
+def get_db(request: Request):
+    db = get_session_factory(request)()
     try:
         yield db
     finally:
@@ -0,0 +1,98 @@
+"""
+Conditional GET untuk halaman HTML (Dashboard, Laporan, Riwayat).
+
+ETag dihitung dari (keluarga, path, query params, versi data, tanggal hari ini).
+Jika browser mengirim If-None-Match yang sama, balas 304 tanpa query data & render.
+Opsional: LRU kecil berisi HTML yang sudah di-render (HTML_CACHE_SIZE, 0 = mati).
+"""
+from collections import OrderedDict
+from fastapi import Request
+from fastapi.responses import HTMLResponse, Response
+from sqlalchemy.orm import Session
+from datetime import date
+import hashlib
+import threading
+from .config import settings
+from .services import data_version
+from .tenancy import DEFAULT_TENANT, tenant_of
+
+# Browser boleh menyimpan, tapi wajib revalidasi (If-None-Match) setiap kali dibuka
+CACHE_CONTROL = "private, no-cache"
+
+
+class RenderedPages:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict() # etag -> body
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, etag: str):
+        if not self.max_entries:
+            return None
+        with self._lock:
+            body = self._entries.get(etag)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(etag)
+            self.hits += 1
+            return body
+
+    def put(self, etag: str, body: bytes):
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._entries[etag] = body
+            self._entries.move_to_end(etag)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+            }
+
+
+rendered_pages = RenderedPages(settings.HTML_CACHE_SIZE)
+
+def page_etag(request: Request, version: int, tenant: str = DEFAULT_TENANT) -> str:
+    # Tanggal ikut dihitung: isi halaman bergantung pada "bulan ini" / "hari ini"
+    # Keluarga ikut dihitung: versi data tiap shard berdiri sendiri (bisa sama)
+    params = sorted(request.query_params.multi_items())
+    key = f"{tenant}|{request.url.path}|{params}|{version}|{date.today().isoformat()}"
+    return '"' + hashlib.sha1(key.encode("utf-8")).hexdigest() + '"'
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+def conditional_page(request: Request, db: Session, render) -> Response:
+    """
+    Balas halaman dengan ETag. render() (yang mengembalikan TemplateResponse)
+    hanya dipanggil jika browser belum punya versi ini dan HTML-nya tidak ada di cache.
+    """
+    etag = page_etag(request, data_version.current(db), tenant_of(db))
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        with rendered_pages._lock:
+            rendered_pages.not_modified += 1
+        return Response(status_code=304, headers=headers)
+
+    body = rendered_pages.get(etag)
+    if body is None:
+        response = render()
+        if response.status_code != 200:
+            return response
+        body = response.body
+        rendered_pages.put(etag, body)
+    return HTMLResponse(body, headers=headers)
@@ -0,0 +1,218 @@
+"""
+Metrik aplikasi dalam format teks Prometheus (dilayani di /metrics, lihat routers/metrics.py).
+
+Registry kecil tanpa dependency: Counter & Histogram dengan label, plus collector
+yang dibaca saat scrape (statistik cache & pool shard yang sudah dihitung modul lain).
+Statistik SQL per request (jumlah statement & waktu DB) dikumpulkan lewat ContextVar
+yang diisi MetricsMiddleware dan ditambah oleh listener engine di services/query_log.py.
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+import math
+import threading
+import time
+
+# Detik; cukup rapat di bawah 100 ms (halaman biasa) dan tetap menangkap request lambat
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {} # tuple nilai label -> angka
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {} # tuple nilai label -> [count per bucket (+Inf di akhir), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        index = bisect_left(self.buckets, value) # Bucket pertama dengan batas >= value
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            return sum(series[0]) if series else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._series.items())
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_format_value(float(bound)) if bound != math.inf else "+Inf"}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metrik {metric.name} sudah terdaftar")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def collector(self, fn):
+        """
+        Daftarkan fn() -> iterable (nama, tipe, keterangan, {label: nilai}, nilai)
+        yang dipanggil setiap scrape (untuk angka yang sudah dihitung di tempat lain).
+        """
+        with self._lock:
+            self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+
+        collected = {} # nama -> (tipe, keterangan, [baris]); satu blok HELP/TYPE per nama
+        for fn in collectors:
+            for name, kind, documentation, labels, value in fn():
+                entry = collected.setdefault(name, (kind, documentation, []))
+                entry[2].append(f"{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}")
+        for name, (kind, documentation, samples) in collected.items():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# --- Request HTTP (MetricsMiddleware) ---
+http_request_seconds = registry.histogram(
+    "http_request_duration_seconds", "Durasi request per route (sampai body respons terkirim)",
+    ("method", "route", "status"),
+)
+http_request_sql_statements = registry.histogram(
+    "http_request_sql_statements", "Jumlah statement SQL per request", ("route",), buckets=COUNT_BUCKETS,
+)
+http_request_db_seconds = registry.histogram(
+    "http_request_db_seconds", "Total waktu eksekusi SQL per request", ("route",),
+)
+
+# --- Database (services/query_log.py) ---
+db_query_seconds = registry.histogram(
+    "db_query_duration_seconds", "Durasi eksekusi satu statement SQL", ("statement",), buckets=QUERY_BUCKETS,
+)
+db_slow_queries = registry.counter(
+    "db_slow_queries_total", "Statement yang melewati SLOW_QUERY_MS", ("statement",),
+)
+
+# --- Job background ---
+scheduler_job_seconds = registry.histogram(
+    "scheduler_job_duration_seconds", "Durasi job scheduler", ("job",),
+)
+scheduler_job_failures = registry.counter(
+    "scheduler_job_failures_total", "Job scheduler yang gagal", ("job",),
+)
+
+# --- AI Advisor (services/ai_advisor.py) ---
+advisor_call_seconds = registry.histogram(
+    "advisor_call_duration_seconds", "Durasi satu panggilan Gemini (per percobaan)", ("outcome",),
+    buckets=(0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0),
+)
+advisor_errors = registry.counter(
+    "advisor_errors_total", "Kegagalan advisor per jenis error", ("reason",),
+)
+
+
+class RequestStats:
+    __slots__ = ("statements", "db_seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+
+
+# Diisi MetricsMiddleware; ikut tersalin ke threadpool endpoint sync (objek yang sama)
+current_request: ContextVar = ContextVar("current_request", default=None)
+
+def statement_kind(statement: str) -> str:
+    # Label berkardinalitas rendah: kata pertama statement (SELECT, INSERT, ...)
+    word = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return word if word in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "PRAGMA") else "OTHER"
@@ -0,0 +1,130 @@
+"""
+Middleware cek login sebagai ASGI murni (tanpa BaseHTTPMiddleware).
+
+Request tidak dibungkus ulang & body respons tidak melewati stream perantara,
+jadi StreamingResponse (export, riwayat JSON) langsung mengalir ke client.
+File statis dilayani sebelum SessionMiddleware (tanpa decode & tanda tangan ulang cookie).
+"""
+import time
+from starlette.exceptions import HTTPException
+from starlette.responses import PlainTextResponse, RedirectResponse
+from starlette.routing import Match, Mount
+from starlette.staticfiles import StaticFiles
+from . import metrics
+
+# URL yang boleh diakses tanpa login (dicocokkan sebagai prefix path)
+PUBLIC_PREFIXES = (
+    "/static",
+    "/auth/login",
+    "/favicon.ico",
+    "/manifest.json",
+    "/sw.js",
+    "/docs",
+    "/openapi.json",
+    "/metrics", # Dilindungi token sendiri (METRICS_TOKEN), untuk scraper Prometheus
+)
+
+
+class AuthMiddleware:
+    """
+    Redirect ke halaman login jika session belum berisi user.
+    Harus berada DI DALAM SessionMiddleware (scope["session"] sudah diisi).
+    """
+
+    def __init__(self, app, public_prefixes=PUBLIC_PREFIXES, login_url: str = "/auth/login"):
+        self.app = app
+        # Tuple prefix dibuat sekali; str.startswith(tuple) dicek di C dalam satu panggilan
+        self.public_prefixes = tuple(public_prefixes)
+        self.redirect = RedirectResponse(url=login_url, status_code=303)
+
+    async def __call__(self, scope, receive, send):
+        # Lifespan / websocket & file statis: langsung diteruskan tanpa cek session
+        if scope["type"] != "http" or scope["path"].startswith(self.public_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        if not scope.get("session", {}).get("user"):
+            await self.redirect(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+
+class StaticFilesShortcut:
+    """
+    Layani /static langsung dari lapisan terluar: tanpa SessionMiddleware
+    (yang menandatangani ulang cookie di setiap respons), cek login & routing.
+    Pasang sebagai middleware TERAKHIR (paling luar).
+    """
+
+    def __init__(self, app, path: str = "/static", directory: str = "static"):
+        self.app = app
+        self.prefix = path + "/"
+        self.mount = Mount(path, app=StaticFiles(directory=directory))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(self.prefix):
+            match, child_scope = self.mount.matches(scope)
+            if match == Match.FULL:
+                try:
+                    await self.mount.handle({**scope, **child_scope}, receive, send)
+                except HTTPException as e:
+                    # 404 / 405 dari StaticFiles: di luar ExceptionMiddleware, jadi dibalas di sini
+                    await PlainTextResponse(e.detail, status_code=e.status_code, headers=e.headers)(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
+
+
+class MetricsMiddleware:
+    """
+    Latency per route + jumlah statement SQL & waktu DB per request (lihat app/metrics.py).
+    Label route = template path ("/transactions/{tx_id}"), bukan path asli, agar jumlah
+    seri tetap kecil. Pasang PALING DALAM (didaftarkan pertama): redirect login & file
+    statis tidak ikut diukur.
+    """
+
+    def __init__(self, app, routes):
+        self.app = app
+        self.routes = routes # List route aplikasi (app.router.routes), dibaca saat request pertama
+        self._templates = None # endpoint -> path template
+
+    def route_label(self, scope) -> str:
+        # Starlette mengisi scope["endpoint"] saat route cocok (scope di-update in place)
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if self._templates is None:
+            templates = {}
+            for route in self.routes:
+                if getattr(route, "endpoint", None) is not None:
+                    templates.setdefault(route.endpoint, route.path)
+            self._templates = templates
+        return self._templates.get(endpoint, "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = metrics.RequestStats()
+        token = metrics.current_request.set(stats)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.current_request.reset(token)
+            route = self.route_label(scope)
+            metrics.http_request_seconds.observe(
+                time.perf_counter() - started, method=scope["method"], route=route, status=str(status)
+            )
+            metrics.http_request_sql_statements.observe(stats.statements, route=route)
+            metrics.http_request_db_seconds.observe(stats.db_seconds, route=route)
@@ -0,0 +1,148 @@
+"""
+Migrasi skema versi-an untuk database yang sudah ada.
+
+`Base.metadata.create_all` hanya membuat tabel baru; index dan kolom baru
+pada tabel lama harus lewat migrasi di sini. Versi yang sudah dijalankan
+dicatat di tabel `schema_migrations`.
+"""
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+import logging
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS = []
+
+def migration(version: int, description: str):
+    def register(fn):
+        MIGRATIONS.append((version, description, fn))
+        return fn
+    return register
+
+@migration(1, "Index (date, category_id) untuk filter rentang tanggal + kategori")
+def add_index_date_category(conn):
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_transactions_date_category ON transactions (date, category_id)"))
+    # Index tunggal (date) sudah tercakup oleh prefix index komposit di atas
+    conn.execute(text("DROP INDEX IF EXISTS ix_transactions_date"))
+
+@migration(2, "Index (wallet_id, date) untuk riwayat per dompet")
+def add_index_wallet_date(conn):
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_transactions_wallet_date ON transactions (wallet_id, date)"))
+
+@migration(3, "Index (category_id, date) untuk agregasi per kategori")
+def add_index_category_date(conn):
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_transactions_category_date ON transactions (category_id, date)"))
+
+@migration(4, "Isi rollup bulanan dari transaksi lama")
+def backfill_rollups(conn):
+    from .services import rollup
+    with Session(bind=conn) as db:
+        rollup.ensure_rollups(db)
+
+@migration(5, "Kolom fingerprint untuk cache saran AI")
+def add_advice_fingerprint(conn):
+    if not _has_column(conn, "ai_advice", "fingerprint"):
+        conn.execute(text("ALTER TABLE ai_advice ADD COLUMN fingerprint VARCHAR"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_ai_advice_fingerprint ON ai_advice (fingerprint)"))
+
+@migration(6, "Kolom import_hash untuk dedupe import mutasi bank")
+def add_transaction_import_hash(conn):
+    from .services.ledger import transaction_hash
+    if not _has_column(conn, "transactions", "import_hash"):
+        conn.execute(text("ALTER TABLE transactions ADD COLUMN import_hash VARCHAR"))
+
+    # Isi hash untuk transaksi lama agar ikut terdeteksi sebagai duplikat saat import
+    rows = conn.execute(text(
+        "SELECT id, date, amount, description FROM transactions WHERE import_hash IS NULL"
+    )).all()
+    if rows:
+        conn.execute(
+            text("UPDATE transactions SET import_hash = :h WHERE id = :id"),
+            [{"id": r.id, "h": transaction_hash(r.date, r.amount, r.description)} for r in rows]
+        )
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_transactions_import_hash ON transactions (import_hash)"))
+
+@migration(7, "Jurnal double-entry (postings) & checkpoint saldo dari data lama")
+def backfill_postings(conn):
+    from .services import balances
+    with Session(bind=conn) as db:
+        balances.backfill_postings(db)
+        balances.refresh_checkpoints(db)
+        db.commit()
+
+@migration(8, "Counter terpakai & level alert budget, unik per kategori per bulan")
+def add_budget_counters(conn):
+    from .services import budgets
+    if not _has_column(conn, "budgets", "spent"):
+        conn.execute(text("ALTER TABLE budgets ADD COLUMN spent FLOAT DEFAULT 0"))
+    if not _has_column(conn, "budgets", "alert_level"):
+        conn.execute(text("ALTER TABLE budgets ADD COLUMN alert_level INTEGER DEFAULT 0"))
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_budgets_category_month ON budgets (category_id, month_period)"
+    ))
+    with Session(bind=conn) as db:
+        budgets.rebuild_spent(db)
+
+def _has_column(conn, table: str, column: str) -> bool:
+    return any(row[1] == column for row in conn.execute(text(f"PRAGMA table_info({table})")))
+
+def applied_versions(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, "
+        "description VARCHAR, "
+        "applied_at DATETIME DEFAULT CURRENT_TIMESTAMP)"
+    ))
+    return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+def run_migrations(engine):
+    """
+    Jalankan migrasi yang belum tercatat, urut berdasarkan versi.
+    Setiap migrasi berjalan dalam transaksinya sendiri bersama pencatatan versinya.
+    """
+    with engine.begin() as conn:
+        done = applied_versions(conn)
+
+    for version, description, fn in sorted(MIGRATIONS, key=lambda m: m[0]):
+        if version in done:
+            continue
+        with engine.begin() as conn:
+            fn(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, description) VALUES (:v, :d)"),
+                {"v": version, "d": description}
+            )
+        logger.info(f"Migrasi {version} diterapkan: {description}")
+
+def explain_query_plans(db: Session):
+    """
+    Jalankan EXPLAIN QUERY PLAN untuk query utama (dashboard, laporan, riwayat)
+    dan cek bahwa masing-masing memakai index yang diharapkan.
+    Return list (nama, index_diharapkan, ok, detail_plan).
+    """
+    from datetime import date, timedelta
+    from . import queries, models
+    from .services import balances, bills, rollup
+
+    today = date.today()
+    start_of_month = date(today.year, today.month, 1)
+    month_period = rollup.month_key(today)
+
+    hot_queries = [
+        ("dashboard_recent", queries.recent_transactions_select(5), "ix_transactions_date_category"),
+        ("dashboard_month_totals", rollup.month_totals_select(month_period), "sqlite_autoindex_monthly_rollups_1"),
+        ("reports_category_totals", rollup.category_totals_select(month_period), "sqlite_autoindex_monthly_rollups_1"),
+        ("history_page", queries.range_select(start_of_month, today).limit(queries.HISTORY_PAGE_SIZE + 1), "ix_transactions_date_category"),
+        ("wallet_history", queries.range_select(start_of_month, today).where(models.Transaction.wallet_id == 1), "ix_transactions_wallet_date"),
+        ("category_history", queries.range_select(start_of_month, today).where(models.Transaction.category_id == 1), "ix_transactions_category_date"),
+        ("wallet_balance_at", balances.postings_sum_select(1, start_of_month - timedelta(days=1), today), "ix_postings_account_date"),
+        ("bills_pending_total", bills.pending_total_select(today), "ix_recurring_bills_active_due"),
+    ]
+
+    results = []
+    for name, stmt, expected_index in hot_queries:
+        compiled = stmt.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True})
+        plan = [row[3] for row in db.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))]
+        ok = any(expected_index in line for line in plan)
+        results.append((name, expected_index, ok, plan))
+    return results
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Date, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Date, DateTime, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -17,6 +17,12 @@ class TransactionType(str, enum.Enum):
     INCOME = "income"
     TRANSFER = "transfer"
 
+# Enum untuk jenis akun pada jurnal double-entry (lihat Posting)
+class AccountType(str, enum.Enum):
+    WALLET = "wallet"      # Dompet (saldo riil)
+    CATEGORY = "category"  # Lawan transaksi income / expense
+    EQUITY = "equity"      # Saldo awal & penyesuaian tanpa lawan (account_id = 0)
+
 class User(Base):
     __tablename__ = "users"
 
@@ -52,10 +58,11 @@ class Transaction(Base):
     __tablename__ = "transactions"
 
     id = Column(Integer, primary_key=True, index=True)
-    date = Column(Date, index=True)
+    date = Column(Date)
     amount = Column(Float)
     description = Column(String, nullable=True)
-    receipt_path = Column(String, nullable=True) # Path to image
+    receipt_path = Column(String, nullable=True) # Hash SHA-256 foto struk (content-addressed, lihat services/receipts.py)
+    import_hash = Column(String, nullable=True, index=True) # Hash (date, amount, description) untuk dedupe import mutasi
     
     wallet_id = Column(Integer, ForeignKey("wallets.id"))
     category_id = Column(Integer, ForeignKey("categories.id"))
@@ -65,6 +72,64 @@ class Transaction(Base):
     wallet = relationship("Wallet", back_populates="transactions")
     category = relationship("Category", back_populates="transactions")
 
+    # Index komposit sesuai pola filter yang sering dipakai (lihat app/migrations.py)
+    __table_args__ = (
+        Index("ix_transactions_date_category", "date", "category_id"),
+        Index("ix_transactions_wallet_date", "wallet_id", "date"),
+        Index("ix_transactions_category_date", "category_id", "date"),
+    )
+
+class Posting(Base):
+    """
+    Satu kaki jurnal double-entry. Total amount per entry_id selalu 0;
+    untuk akun dompet, amount = perubahan saldo (positif = uang masuk).
+    """
+    __tablename__ = "postings"
+
+    id = Column(Integer, primary_key=True)
+    entry_id = Column(String, index=True) # Mengelompokkan kaki-kaki satu jurnal
+    transaction_id = Column(Integer, ForeignKey("transactions.id"), nullable=True, index=True)
+    date = Column(Date)
+    account_type = Column(Enum(AccountType))
+    account_id = Column(Integer)
+    amount = Column(Float)
+
+    __table_args__ = (
+        Index("ix_postings_account_date", "account_type", "account_id", "date"),
+    )
+
+class BalanceCheckpoint(Base):
+    """
+    Saldo dompet per akhir hari as_of_date (dibuat per akhir bulan).
+    Saldo tanggal X = checkpoint terakhir <= X + total posting setelahnya.
+    """
+    __tablename__ = "balance_checkpoints"
+
+    wallet_id = Column(Integer, ForeignKey("wallets.id"), primary_key=True)
+    as_of_date = Column(Date, primary_key=True)
+    balance = Column(Float, default=0.0)
+
+class LedgerVersion(Base):
+    """
+    Versi data global (1 baris), naik di setiap commit yang menulis data.
+    Dipakai untuk ETag halaman & kunci cache turunan (lihat services/data_version.py).
+    """
+    __tablename__ = "ledger_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, default=0)
+
+class SyncRequest(Base):
+    """
+    Idempotency key transaksi yang dikirim dari antrian offline (service worker).
+    Key yang sudah tercatat tidak diposting ulang saat browser mengirim ulang batch.
+    """
+    __tablename__ = "sync_requests"
+
+    idempotency_key = Column(String, primary_key=True)
+    transaction_id = Column(Integer, ForeignKey("transactions.id"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
 class Budget(Base):
     __tablename__ = "budgets"
 
@@ -72,12 +137,88 @@ class Budget(Base):
     category_id = Column(Integer, ForeignKey("categories.id"))
     amount_limit = Column(Float)
     month_period = Column(String) # Format "YYYY-MM"
+    # Counter terpakai, di-update setiap transaksi ditulis (lihat services/budgets.py)
+    spent = Column(Float, default=0.0)
+    alert_level = Column(Integer, default=0) # Ambang terakhir yang sudah memicu event: 0 / 50 / 80
     
     category = relationship("Category", back_populates="budgets")
 
+    # Satu budget per kategori per bulan
+    __table_args__ = (
+        Index("ux_budgets_category_month", "category_id", "month_period", unique=True),
+    )
+
+class BudgetEvent(Base):
+    """
+    Event saat pengeluaran kategori melewati ambang budget (50% Waspada, 80% Bahaya).
+    """
+    __tablename__ = "budget_events"
+
+    id = Column(Integer, primary_key=True)
+    budget_id = Column(Integer, ForeignKey("budgets.id"), index=True)
+    category_id = Column(Integer, ForeignKey("categories.id"))
+    month_period = Column(String)
+    threshold = Column(Integer) # 50 / 80
+    spent = Column(Float)
+    amount_limit = Column(Float)
+    is_read = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class RecurringBill(Base):
+    """
+    Tagihan berulang bulanan (Kalender Tagihan). next_due_date = jatuh tempo berikutnya
+    yang belum dibayar; setelah dibayar maju ke bulan berikutnya (lihat services/bills.py).
+    """
+    __tablename__ = "recurring_bills"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+    amount = Column(Float)
+    day_of_month = Column(Integer) # 1-31, dipotong ke hari terakhir untuk bulan pendek
+    next_due_date = Column(Date)
+    category_id = Column(Integer, ForeignKey("categories.id"))
+    wallet_id = Column(Integer, ForeignKey("wallets.id"))
+    auto_post = Column(Integer, default=0) # 1 = dicatat otomatis sebagai transaksi saat jatuh tempo
+    is_active = Column(Integer, default=1)
+    last_paid_date = Column(Date, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Tagihan aktif urut jatuh tempo: total kewajiban & tagihan jatuh tempo dibaca lewat range index
+    __table_args__ = (
+        Index("ix_recurring_bills_active_due", "is_active", "next_due_date"),
+    )
+
+class Goal(Base):
+    """
+    Target tabungan keluarga (Dana Darurat, DP rumah, dll).
+    Diisi berurutan sesuai priority (kecil = duluan) oleh proyeksi di services/goals.py.
+    """
+    __tablename__ = "goals"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+    target_amount = Column(Float)
+    saved_amount = Column(Float, default=0.0) # Dana yang sudah terkumpul
+    priority = Column(Integer, default=1)
+    is_active = Column(Integer, default=1)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class MonthlyRollup(Base):
+    __tablename__ = "monthly_rollups"
+
+    # Satu baris per (bulan, kategori, dompet), di-update setiap ada transaksi baru
+    month_period = Column(String, primary_key=True) # Format "YYYY-MM"
+    category_id = Column(Integer, ForeignKey("categories.id"), primary_key=True)
+    wallet_id = Column(Integer, ForeignKey("wallets.id"), primary_key=True)
+    total_amount = Column(Float, default=0.0)
+    tx_count = Column(Integer, default=0)
+
+    category = relationship("Category")
+
 class AIAdvice(Base):
     __tablename__ = "ai_advice"
 
     id = Column(Integer, primary_key=True, index=True)
     content = Column(String) # Isi nasihat
+    fingerprint = Column(String, index=True, nullable=True) # Hash data input prompt (lihat services/advice_cache.py)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
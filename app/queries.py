@@ -0,0 +1,122 @@
+from typing import NamedTuple, Optional
+from datetime import date
+from sqlalchemy import select, or_, and_
+from sqlalchemy.orm import Session
+from . import models
+
+# Query "projection" untuk halaman yang hanya membaca data.
+# Satu statement SELECT sudah join kategori & dompet, hasilnya tuple datar
+# (tanpa ORM object) sehingga template tidak memicu lazy load per baris.
+
+class TransactionRow(NamedTuple):
+    id: int
+    date: date
+    amount: float
+    description: Optional[str]
+    wallet_id: int
+    wallet_name: str
+    category_id: int
+    category_name: str
+    category_icon: Optional[str]
+    category_type: models.TransactionType
+    priority_group: Optional[models.PriorityGroup]
+    receipt: Optional[str] # Hash foto struk (services/receipts.py)
+
+def _transaction_rows_select():
+    return select(
+        models.Transaction.id,
+        models.Transaction.date,
+        models.Transaction.amount,
+        models.Transaction.description,
+        models.Transaction.wallet_id,
+        models.Wallet.name,
+        models.Transaction.category_id,
+        models.Category.name,
+        models.Category.icon,
+        models.Category.category_type,
+        models.Category.priority_group,
+        models.Transaction.receipt_path
+    ).join(
+        models.Category, models.Transaction.category_id == models.Category.id
+    ).join(
+        models.Wallet, models.Transaction.wallet_id == models.Wallet.id
+    )
+
+# Jumlah baris per halaman riwayat (keyset pagination)
+HISTORY_PAGE_SIZE = 50
+
+def encode_cursor(row: TransactionRow) -> str:
+    # Cursor = posisi baris terakhir pada urutan (date DESC, id DESC)
+    return f"{row.date.isoformat()}_{row.id}"
+
+def decode_cursor(cursor: Optional[str]):
+    if not cursor:
+        return None
+    try:
+        cursor_date, cursor_id = cursor.split("_", 1)
+        return date.fromisoformat(cursor_date), int(cursor_id)
+    except ValueError:
+        return None
+
+def range_select(start_date: date, end_date: date):
+    return _transaction_rows_select().where(
+        models.Transaction.date >= start_date,
+        models.Transaction.date <= end_date
+    ).order_by(models.Transaction.date.desc(), models.Transaction.id.desc())
+
+def transactions_page(db: Session, start_date: date, end_date: date, cursor: Optional[str] = None, limit: int = HISTORY_PAGE_SIZE):
+    """
+    Satu halaman riwayat transaksi, urut terbaru dulu.
+    Return (rows, next_cursor); next_cursor None jika sudah halaman terakhir.
+    """
+    stmt = range_select(start_date, end_date)
+
+    after = decode_cursor(cursor)
+    if after:
+        cursor_date, cursor_id = after
+        stmt = stmt.where(or_(
+            models.Transaction.date < cursor_date,
+            and_(models.Transaction.date == cursor_date, models.Transaction.id < cursor_id)
+        ))
+
+    # Ambil 1 baris ekstra untuk tahu apakah masih ada halaman berikutnya
+    rows = [TransactionRow._make(row) for row in db.execute(stmt.limit(limit + 1))]
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1])
+    return rows, None
+
+def iter_transactions(db: Session, start_date: date, end_date: date, batch_size: int = 500):
+    """
+    Stream seluruh transaksi dalam rentang tanggal tanpa memuat semuanya ke memori.
+    """
+    result = db.execute(range_select(start_date, end_date).execution_options(yield_per=batch_size))
+    for row in result:
+        yield TransactionRow._make(row)
+
+def export_select(start_date: date, end_date: date, wallet_id: Optional[int] = None, category_id: Optional[int] = None):
+    # Urut kronologis (lama -> baru) untuk file export
+    stmt = _transaction_rows_select().where(
+        models.Transaction.date >= start_date,
+        models.Transaction.date <= end_date
+    )
+    if wallet_id is not None:
+        stmt = stmt.where(models.Transaction.wallet_id == wallet_id)
+    if category_id is not None:
+        stmt = stmt.where(models.Transaction.category_id == category_id)
+    return stmt.order_by(models.Transaction.date, models.Transaction.id)
+
+def iter_export_rows(db: Session, start_date: date, end_date: date, wallet_id: Optional[int] = None, category_id: Optional[int] = None, batch_size: int = 2000):
+    """
+    Stream baris export lewat server-side cursor (yield_per), memori tetap kecil berapapun ukuran ledger.
+    """
+    stmt = export_select(start_date, end_date, wallet_id, category_id).execution_options(yield_per=batch_size)
+    for row in db.execute(stmt):
+        yield TransactionRow._make(row)
+
+def recent_transactions_select(limit: int = 5):
+    return _transaction_rows_select().order_by(models.Transaction.date.desc()).limit(limit)
+
+def recent_transactions(db: Session, limit: int = 5):
+    stmt = recent_transactions_select(limit)
+    return [TransactionRow._make(row) for row in db.execute(stmt)]
@@ -3,15 +3,25 @@ from fastapi.responses import RedirectResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from ..database import get_db
-from .. import models, crud
+from .. import models
+from ..services import balances, budgets, leaks, refdata, rollup
+from ..http_cache import rendered_pages
 
 router = APIRouter(prefix="/account", tags=["account"])
 templates = Jinja2Templates(directory="templates")
 
 @router.get("/")
-def account_page(request: Request, db: Session = Depends(get_db)):
-    # Ambil semua kategori
-    categories = db.query(models.Category).all()
+def account_page(
+    request: Request,
+    imported: int = None,
+    duplicates: int = None,
+    skipped: int = None,
+    invalid: int = None,
+    error: str = None,
+    db: Session = Depends(get_db)
+):
+    # Ambil semua kategori (dari cache data referensi)
+    categories = refdata.cache.categories(db)
     
     # Kelompokkan kategori berdasarkan tipe dan priority group
     income_cats = [c for c in categories if c.category_type == models.TransactionType.INCOME]
@@ -25,9 +35,19 @@ def account_page(request: Request, db: Session = Depends(get_db)):
         "income_cats": income_cats,
         "expense_fixed": expense_fixed,
         "expense_living": expense_living,
-        "expense_lifestyle": expense_lifestyle
+        "expense_lifestyle": expense_lifestyle,
+        "wallets": refdata.cache.wallets(db),
+        # Ringkasan hasil import mutasi (jika baru saja import)
+        "import_result": {
+            "imported": imported, "duplicates": duplicates, "skipped": skipped, "invalid": invalid, "error": error,
+        } if imported is not None else None
     })
 
+@router.get("/cache-stats")
+def cache_stats():
+    # Hit / miss cache data referensi (kategori & dompet) & cache halaman HTML
+    return {"refdata": refdata.cache.stats(), "pages": rendered_pages.stats()}
+
 @router.post("/category/add")
 def add_category(
     name: str = Form(...),
@@ -44,12 +64,16 @@ def add_category(
     )
     db.add(new_cat)
     db.commit()
+    refdata.cache.invalidate(db)
     return RedirectResponse(url="/account", status_code=303)
 
 @router.post("/reset_data")
 def reset_data(db: Session = Depends(get_db)):
     # Hapus semua transaksi
+    balances.clear_balance_history(db)
     db.query(models.Transaction).delete()
+    rollup.clear_rollups(db)
+    budgets.rebuild_spent(db)
     
     # Reset saldo dompet ke initial
     wallets = db.query(models.Wallet).all()
@@ -58,4 +82,6 @@ def reset_data(db: Session = Depends(get_db)):
         w.is_active = 1
         
     db.commit()
+    refdata.cache.invalidate(db)
+    leaks.invalidate(db)
     return RedirectResponse(url="/", status_code=303)
@@ -1,9 +1,8 @@
-from fastapi import APIRouter, Request, Form, Depends
+from fastapi import APIRouter, Request, Form
 from fastapi.responses import RedirectResponse
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from ..database import get_db
-from .. import models
+from ..database import shards
+from .. import models, security, seed, tenancy
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 templates = Jinja2Templates(directory="templates")
@@ -13,22 +12,36 @@ def login_page(request: Request):
     return templates.TemplateResponse("login.html", {"request": request})
 
 @router.post("/login")
-def login(request: Request, pin: str = Form(...), db: Session = Depends(get_db)):
-    # Ambil user pertama (Single User App)
-    user = db.query(models.User).first()
-    
-    # Jika user belum di-seed (seharusnya tidak terjadi), fallback ke default
-    stored_pin = user.pin_hash if user else "512323"
-    
-    if pin == stored_pin:
-        # Set Session
-        request.session["user"] = user.username if user else "admin"
-        return RedirectResponse(url="/", status_code=303)
-    else:
-        return templates.TemplateResponse("login.html", {
-            "request": request,
-            "error": "PIN Salah! Coba lagi."
-        })
+def login(request: Request, pin: str = Form(...), family: str = Form("")):
+    def failed(message: str):
+        return templates.TemplateResponse("login.html", {"request": request, "family": family, "error": message})
+
+    # Keluarga = shard database sendiri (lihat app/tenancy.py); kosong = keluarga default
+    try:
+        tenant = tenancy.normalize(family)
+    except ValueError:
+        return failed("Keluarga tidak ditemukan.")
+
+    # Keluarga baru (TENANT_AUTO_CREATE): PIN login pertama menjadi PIN keluarga
+    new_family = not shards.exists(tenant)
+    if new_family and shards.auto_create and not security.valid_new_pin(pin):
+        return failed(f"PIN keluarga baru minimal {security.PIN_MIN_LENGTH} angka.")
+    try:
+        shard = shards.get(tenant)
+    except tenancy.UnknownTenant:
+        return failed("Keluarga tidak ditemukan.")
+
+    # Satu user per keluarga. Shard tanpa user tidak bisa login sampai PIN di-set
+    # lewat `python -m app.cli create-tenant <nama> --pin ...`
+    with shard.session_factory() as db:
+        user = seed.ensure_user(db, pin) if new_family else db.query(models.User).first()
+
+    if user is None or not security.verify_pin(pin, user.pin_hash):
+        return failed("PIN Salah! Coba lagi.")
+
+    request.session["user"] = user.username
+    request.session["tenant"] = tenant
+    return RedirectResponse(url="/", status_code=303)
 
 @router.get("/logout")
 def logout(request: Request):
@@ -0,0 +1,72 @@
+from fastapi import APIRouter, Request, Depends, Form, HTTPException
+from fastapi.responses import RedirectResponse
+from fastapi.templating import Jinja2Templates
+from sqlalchemy.orm import Session
+from datetime import date
+from ..database import get_db
+from .. import models
+from ..config import settings
+from ..services import bills, refdata
+
+router = APIRouter(prefix="/bills", tags=["bills"])
+templates = Jinja2Templates(directory="templates")
+
+@router.get("/")
+def bills_page(request: Request, db: Session = Depends(get_db)):
+    today = date.today()
+    return templates.TemplateResponse("bills.html", {
+        "request": request,
+        "bills": bills.bill_statuses(db, today),
+        "pending_total": bills.pending_total(db, today),
+        "alert_days": settings.BILL_ALERT_DAYS,
+        "categories": refdata.cache.categories(db, models.TransactionType.EXPENSE),
+        "wallets": refdata.cache.wallets(db),
+    })
+
+@router.post("/add")
+def create_bill(
+    name: str = Form(...),
+    amount: float = Form(...),
+    day_of_month: int = Form(...),
+    category_id: int = Form(...),
+    wallet_id: int = Form(...),
+    auto_post: bool = Form(False),
+    db: Session = Depends(get_db)
+):
+    if amount <= 0 or not 1 <= day_of_month <= 31:
+        raise HTTPException(status_code=400, detail="Nominal harus > 0 dan tanggal 1-31")
+    if refdata.cache.category(db, category_id) is None or refdata.cache.wallet(db, wallet_id) is None:
+        raise HTTPException(status_code=404, detail="Category / wallet not found")
+
+    bill = models.RecurringBill(
+        name=name,
+        amount=amount,
+        day_of_month=day_of_month,
+        next_due_date=bills.first_due(date.today(), day_of_month),
+        category_id=category_id,
+        wallet_id=wallet_id,
+        auto_post=1 if auto_post else 0,
+        is_active=1
+    )
+    db.add(bill)
+    db.commit()
+    bills.scheduler.schedule(db, bill)
+    return RedirectResponse(url="/bills/", status_code=303)
+
+@router.post("/{bill_id}/pay")
+def pay_bill(bill_id: int, db: Session = Depends(get_db)):
+    # Catat pembayaran sebagai transaksi pengeluaran, jatuh tempo maju ke bulan berikutnya
+    if bills.pay_bill(db, bill_id) is None:
+        raise HTTPException(status_code=404, detail="Bill not found")
+    return RedirectResponse(url="/bills/", status_code=303)
+
+@router.post("/{bill_id}/delete")
+def delete_bill(bill_id: int, db: Session = Depends(get_db)):
+    bill = db.get(models.RecurringBill, bill_id)
+    if bill is None:
+        raise HTTPException(status_code=404, detail="Bill not found")
+    # Soft delete: riwayat transaksi pembayaran tetap ada
+    bill.is_active = 0
+    db.commit()
+    bills.scheduler.schedule(db, bill)
+    return RedirectResponse(url="/bills/", status_code=303)
@@ -0,0 +1,105 @@
+from fastapi import APIRouter, Request, Depends, Form, HTTPException
+from fastapi.responses import RedirectResponse
+from fastapi.templating import Jinja2Templates
+from sqlalchemy.orm import Session
+from datetime import date
+import re
+from ..database import get_db
+from .. import models
+from ..services import budgets, refdata, rollup
+
+router = APIRouter(prefix="/budgets", tags=["budgets"])
+templates = Jinja2Templates(directory="templates")
+
+MONTH_PATTERN = re.compile(r"^\d{4}-(0[1-9]|1[0-2])$")
+
+def _month_or_current(month: str = None) -> str:
+    if not month:
+        return rollup.month_key(date.today())
+    if not MONTH_PATTERN.match(month):
+        raise HTTPException(status_code=400, detail="Format bulan harus YYYY-MM")
+    return month
+
+def _previous_month(month_period: str) -> str:
+    year, month = map(int, month_period.split("-"))
+    return f"{year - 1}-12" if month == 1 else f"{year}-{month - 1:02d}"
+
+@router.get("/")
+def budgets_page(request: Request, month: str = None, db: Session = Depends(get_db)):
+    month_period = _month_or_current(month)
+    statuses = budgets.budget_status(db, month_period)
+    budgeted = {s.category_id for s in statuses}
+    events = budgets.recent_events(db)
+
+    return templates.TemplateResponse("budgets.html", {
+        "request": request,
+        "month_period": month_period,
+        "previous_month": _previous_month(month_period),
+        "statuses": statuses,
+        "total_limit": sum(s.amount_limit for s in statuses),
+        "total_spent": sum(s.spent for s in statuses),
+        "available_categories": [
+            c for c in refdata.cache.categories(db, models.TransactionType.EXPENSE) if c.id not in budgeted
+        ],
+        "events": events,
+    })
+
+@router.get("/status.json")
+def budgets_status_json(month: str = None, db: Session = Depends(get_db)):
+    month_period = _month_or_current(month)
+    return {
+        "month_period": month_period,
+        "budgets": [s._asdict() for s in budgets.budget_status(db, month_period)],
+    }
+
+@router.post("/alerts/read")
+def mark_alerts_read(db: Session = Depends(get_db)):
+    # Dipanggil halaman budget setelah peringatan yang belum dibaca tampil (GET tidak mengubah data)
+    budgets.mark_events_read(db)
+    return {"status": "ok"}
+
+@router.post("/add")
+def create_budget(
+    category_id: int = Form(...),
+    amount_limit: float = Form(...),
+    month_period: str = Form(None),
+    db: Session = Depends(get_db)
+):
+    month_period = _month_or_current(month_period)
+    category = refdata.cache.category(db, category_id)
+    if category is None:
+        raise HTTPException(status_code=404, detail="Category not found")
+    if category.category_type != models.TransactionType.EXPENSE:
+        raise HTTPException(status_code=400, detail="Budget hanya untuk kategori pengeluaran")
+    if amount_limit <= 0:
+        raise HTTPException(status_code=400, detail="Limit budget harus lebih dari 0")
+
+    budgets.set_budget(db, category_id, month_period, amount_limit)
+    return RedirectResponse(url=f"/budgets/?month={month_period}", status_code=303)
+
+@router.post("/{budget_id}/edit")
+def update_budget(budget_id: int, amount_limit: float = Form(...), db: Session = Depends(get_db)):
+    budget = db.get(models.Budget, budget_id)
+    if budget is None:
+        raise HTTPException(status_code=404, detail="Budget not found")
+    if amount_limit <= 0:
+        raise HTTPException(status_code=400, detail="Limit budget harus lebih dari 0")
+
+    budgets.set_budget(db, budget.category_id, budget.month_period, amount_limit)
+    return RedirectResponse(url=f"/budgets/?month={budget.month_period}", status_code=303)
+
+@router.post("/{budget_id}/delete")
+def delete_budget(budget_id: int, db: Session = Depends(get_db)):
+    budget = db.get(models.Budget, budget_id)
+    if budget is None:
+        raise HTTPException(status_code=404, detail="Budget not found")
+    month_period = budget.month_period
+    budgets.delete_budget(db, budget_id)
+    return RedirectResponse(url=f"/budgets/?month={month_period}", status_code=303)
+
+@router.post("/copy")
+def copy_previous_month(month_period: str = Form(None), db: Session = Depends(get_db)):
+    # Salin limit bulan lalu ke bulan ini (kategori yang belum punya budget)
+    month_period = _month_or_current(month_period)
+    budgets.copy_budgets(db, _previous_month(month_period), month_period)
+    return RedirectResponse(url=f"/budgets/?month={month_period}", status_code=303)
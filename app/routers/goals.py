@@ -0,0 +1,76 @@
+from fastapi import APIRouter, Request, Depends, Form, HTTPException
+from fastapi.responses import RedirectResponse
+from fastapi.templating import Jinja2Templates
+from sqlalchemy.orm import Session
+import time
+from ..database import get_db
+from .. import models
+from ..config import settings
+from ..services import goals
+
+router = APIRouter(prefix="/goals", tags=["goals"])
+templates = Jinja2Templates(directory="templates")
+
+@router.get("/")
+def goals_page(request: Request, db: Session = Depends(get_db)):
+    started = time.perf_counter()
+    history, projections = goals.goal_projections(db)
+    return templates.TemplateResponse("goals.html", {
+        "request": request,
+        "history": history,
+        "projections": projections,
+        "simulations": settings.GOAL_SIMULATIONS,
+        "horizon_years": settings.GOAL_HORIZON_MONTHS // 12,
+        "elapsed_ms": (time.perf_counter() - started) * 1000,
+    })
+
+@router.get("/projection.json")
+def goals_projection_json(db: Session = Depends(get_db)):
+    history, projections = goals.goal_projections(db)
+    return {
+        "history": history._asdict() if history else None,
+        "percentiles": list(goals.PERCENTILES),
+        "goals": [
+            {**p._asdict(), "dates": [d.isoformat() if d else None for d in p.dates]}
+            for p in projections
+        ],
+    }
+
+@router.post("/add")
+def create_goal(
+    name: str = Form(...),
+    target_amount: float = Form(...),
+    saved_amount: float = Form(0),
+    priority: int = Form(1),
+    db: Session = Depends(get_db)
+):
+    if target_amount <= 0 or saved_amount < 0:
+        raise HTTPException(status_code=400, detail="Target harus > 0 dan dana terkumpul tidak boleh negatif")
+    db.add(models.Goal(name=name, target_amount=target_amount, saved_amount=saved_amount, priority=priority, is_active=1))
+    db.commit()
+    return RedirectResponse(url="/goals/", status_code=303)
+
+@router.post("/{goal_id}/edit")
+def update_goal(
+    goal_id: int,
+    saved_amount: float = Form(...),
+    target_amount: float = Form(None),
+    db: Session = Depends(get_db)
+):
+    goal = db.get(models.Goal, goal_id)
+    if goal is None:
+        raise HTTPException(status_code=404, detail="Goal not found")
+    goal.saved_amount = max(0.0, saved_amount)
+    if target_amount:
+        goal.target_amount = target_amount
+    db.commit()
+    return RedirectResponse(url="/goals/", status_code=303)
+
+@router.post("/{goal_id}/delete")
+def delete_goal(goal_id: int, db: Session = Depends(get_db)):
+    goal = db.get(models.Goal, goal_id)
+    if goal is None:
+        raise HTTPException(status_code=404, detail="Goal not found")
+    goal.is_active = 0
+    db.commit()
+    return RedirectResponse(url="/goals/", status_code=303)
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Request, HTTPException
+from fastapi.responses import PlainTextResponse
+import hmac
+from ..config import settings
+from ..database import shards
+from ..http_cache import rendered_pages
+from ..metrics import registry
+from ..services import refdata
+from ..services.ai_advisor import advisor
+
+# Endpoint scrape Prometheus. Lolos AuthMiddleware (bukan session login), jadi wajib token:
+# "Authorization: Bearer <METRICS_TOKEN>" (bukan query string, agar tidak tercatat di log akses).
+# METRICS_TOKEN kosong = endpoint mati (404)
+router = APIRouter(tags=["metrics"])
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@registry.collector
+def _cache_and_pool_stats():
+    # Angka yang sudah dihitung modul lain, dibaca saat scrape
+    cache = refdata.cache.stats()
+    yield "refdata_cache_requests_total", "counter", "Akses cache data referensi", {"result": "hit"}, cache["hits"]
+    yield "refdata_cache_requests_total", "counter", "Akses cache data referensi", {"result": "miss"}, cache["misses"]
+    pages = rendered_pages.stats()
+    for result in ("hits", "misses", "not_modified"):
+        yield "html_cache_requests_total", "counter", "Akses cache halaman HTML & respons 304", {"result": result}, pages[result]
+    yield "html_cache_entries", "gauge", "Halaman HTML yang tersimpan", {}, pages["entries"]
+    pool = shards.stats()
+    yield "tenant_shards_open", "gauge", "Shard keluarga yang sedang terbuka (termasuk default)", {}, pool["open"]
+    yield "tenant_shards_opened_total", "counter", "Shard yang dibuka sejak start", {}, pool["opened"]
+    yield "tenant_shards_evicted_total", "counter", "Shard yang ditutup oleh LRU / idle", {}, pool["evicted"]
+    yield "advisor_circuit_open", "gauge", "1 jika circuit breaker Gemini sedang terbuka", {}, int(advisor.breaker.opened_at is not None)
+
+
+def _authorized(request: Request) -> bool:
+    header = request.headers.get("authorization", "")
+    if not header.lower().startswith("bearer "):
+        return False
+    token = header[7:]
+    return hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode())
+
+@router.get("/metrics", include_in_schema=False)
+def metrics_endpoint(request: Request):
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=404)
+    if not _authorized(request):
+        raise HTTPException(status_code=401, detail="Token metrics salah", headers={"WWW-Authenticate": "Bearer"})
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Request, HTTPException
+from fastapi.responses import FileResponse, Response
+from ..database import request_tenant
+from ..services import receipts
+
+router = APIRouter(prefix="/receipts", tags=["receipts"])
+
+# URL berisi hash isi file: isi di alamat yang sama tidak pernah berubah,
+# jadi browser boleh menyimpannya selamanya tanpa revalidasi (riwayat tidak mengunduh ulang)
+IMMUTABLE = "private, max-age=31536000, immutable"
+
+def _serve(request: Request, digest: str, thumbnail: bool):
+    if not receipts.DIGEST_PATTERN.match(digest):
+        raise HTTPException(status_code=404, detail="Foto struk tidak ditemukan")
+    # Folder per keluarga: hash keluarga lain tidak bisa dibuka
+    tenant = request_tenant(request)
+    state = receipts.status(tenant, digest)
+    if state == receipts.PROCESSING:
+        # Masih dikompresi di background; jangan di-cache, coba lagi sebentar
+        return Response(status_code=503, headers={"Retry-After": "1", "Cache-Control": "no-store"})
+    if state == receipts.MISSING:
+        raise HTTPException(status_code=404, detail="Foto struk tidak ditemukan")
+
+    path = receipts.thumb_path(tenant, digest) if thumbnail else receipts.full_path(tenant, digest)
+    return FileResponse(path, media_type="image/jpeg", headers={"Cache-Control": IMMUTABLE})
+
+@router.get("/{digest}")
+def receipt_photo(request: Request, digest: str):
+    return _serve(request, digest, thumbnail=False)
+
+@router.get("/{digest}/thumb")
+def receipt_thumbnail(request: Request, digest: str):
+    return _serve(request, digest, thumbnail=True)
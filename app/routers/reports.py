@@ -1,42 +1,43 @@
-from fastapi import APIRouter, Request, Depends
+from fastapi import APIRouter, Request, Depends, HTTPException
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from datetime import date
-from ..database import get_db
+from ..database import get_db, get_session_factory, request_tenant
 from .. import models
 from ..config import settings
-from ..services.ai_advisor import get_financial_advice
+from ..http_cache import conditional_page
+from ..services.ai_advisor import get_financial_advice, context_hash
+from ..services.advice_cache import advice_cache, fingerprint as advice_cache_fingerprint
+from ..services import goals, leaks, rollup, trends
+from ..services.jobs import JobPool
+from ..tenancy import tenant_of
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 templates = Jinja2Templates(directory="templates")
 
+# Worker pool untuk panggilan Gemini (blocking) agar event loop tetap bebas
+advisor_jobs = JobPool(max_workers=settings.ADVISOR_WORKERS, name="advisor")
+
 @router.get("/")
 def reports_page(request: Request, db: Session = Depends(get_db)):
+    return conditional_page(request, db, lambda: _render_reports(request, db))
+
+def _render_reports(request: Request, db: Session):
     # Filter bulan ini (sederhana)
     today = date.today()
-    start_date = date(today.year, today.month, 1)
-    
-    # Ambil semua transaksi bulan ini
-    transactions = db.query(models.Transaction).filter(
-        models.Transaction.date >= start_date
-    ).all()
     
-    # Hitung Pemasukan vs Pengeluaran
-    total_income = sum(t.amount for t in transactions if t.category.category_type == models.TransactionType.INCOME)
-    total_expense = sum(t.amount for t in transactions if t.category.category_type == models.TransactionType.EXPENSE)
+    # Hitung Pemasukan vs Pengeluaran (dari rollup bulanan)
+    month_period = rollup.month_key(today)
+    totals = rollup.month_totals(db, month_period)
+    total_income = totals.get(models.TransactionType.INCOME, 0.0)
+    total_expense = totals.get(models.TransactionType.EXPENSE, 0.0)
     net_cashflow = total_income - total_expense
     
     # Hitung Pengeluaran per Kategori untuk Chart
-    category_stats = db.query(
-        models.Category.name,
-        models.Category.icon,
-        models.Category.priority_group,
-        func.sum(models.Transaction.amount).label("total")
-    ).join(models.Transaction).filter(
-        models.Transaction.date >= start_date,
-        models.Category.category_type == models.TransactionType.EXPENSE
-    ).group_by(models.Category.id).order_by(func.sum(models.Transaction.amount).desc()).all()
+    category_stats = rollup.category_totals(db, month_period)
+
+    # Tren vs bulan lalu untuk semua kategori sekaligus (1 query, di-cache per versi data)
+    category_trends = trends.category_trends(db, today)
     
     # Siapkan data untuk Chart.js (List of Labels & Data)
     chart_labels = [stat.name for stat in category_stats]
@@ -75,6 +76,10 @@ def reports_page(request: Request, db: Session = Depends(get_db)):
         "chart_labels": chart_labels,
         "chart_data": chart_data,
         "chart_colors": chart_colors,
+        "category_trends": category_trends,
+        "trend_movers": trends.top_movers(category_trends),
+        # Bocor Alus: kategori Lifestyle paling sering dibeli (counter di memori)
+        "leak_stats": leaks.top_leaks(db, window=30, limit=3),
         "month_name": today.strftime("%B %Y")
         # Hapus ai_insight dari sini karena akan dipindah ke halaman khusus
     })
@@ -83,49 +88,67 @@ def reports_page(request: Request, db: Session = Depends(get_db)):
 def advisor_page(request: Request):
     return templates.TemplateResponse("advisor.html", {"request": request})
 
+def _advice_inputs(db: Session):
+    # Data input prompt (dari rollup bulanan, murah dihitung)
+    month_period = rollup.month_key(date.today())
+    totals = rollup.month_totals(db, month_period)
+    total_income = totals.get(models.TransactionType.INCOME, 0.0)
+    total_expense = totals.get(models.TransactionType.EXPENSE, 0.0)
+    
+    # Top Cats
+    top_cats_query = rollup.category_totals(db, month_period, limit=3)
+    top_cats_simple = [{"name": c.name, "total": c.total} for c in top_cats_query]
+
+    # Proyeksi goal dari simulasi lokal (deterministik, di-cache per versi data)
+    history, projections = goals.goal_projections(db)
+    goal_lines = goals.prompt_lines(history, projections)
+    return month_period, total_income, total_expense, top_cats_simple, goal_lines
+
+def _generate_advice(session_factory, key, total_income, total_expense, top_cats_simple, goal_lines):
+    # Berjalan di worker background (blocking), simpan hasil dengan session sendiri (shard keluarga peminta)
+    # Gagal -> AdvisorError (job berstatus error, tidak masuk cache)
+    advice_text = get_financial_advice(total_income, total_expense, top_cats_simple, goal_lines)
+    
+    # Simpan Cache
+    db = session_factory()
+    try:
+        advice_cache.put(db, key, advice_text)
+    finally:
+        db.close()
+            
+    return {"status": "success", "message": advice_text, "source": "api"}
+
+def _job_response(job):
+    if job.status == "done":
+        return {**job.result, "job_id": job.id}
+    if job.status == "error":
+        return {"status": "error", "message": job.error or "Gagal menghubungi AI.", "job_id": job.id}
+    return {"status": "pending", "job_id": job.id}
+
 @router.post("/analyze")
-async def analyze_finances(db: Session = Depends(get_db)):
-    # 1. Cek Cache Harian (Maksimal 1x Sehari)
-    today_advice = db.query(models.AIAdvice).filter(
-        func.date(models.AIAdvice.created_at) == date.today()
-    ).first()
+def analyze_finances(db: Session = Depends(get_db), session_factory = Depends(get_session_factory)):
+    # 1. Cek Cache berdasarkan fingerprint data (bukan tanggal)
+    month_period, total_income, total_expense, top_cats_simple, goal_lines = _advice_inputs(db)
+    key = advice_cache_fingerprint(month_period, total_income, total_expense, top_cats_simple, context_hash(), goal_lines)
     
-    if today_advice:
-        return {"status": "success", "message": today_advice.content, "source": "cache"}
+    cached = advice_cache.get(db, key)
+    if cached:
+        return {"status": "success", "message": cached, "source": "cache"}
 
     if not settings.GEMINI_API_KEY:
         return {"status": "error", "message": "API Key Gemini belum disetting."}
 
-    # 2. Ambil Data
-    today = date.today()
-    start_date = date(today.year, today.month, 1)
-    
-    transactions = db.query(models.Transaction).filter(models.Transaction.date >= start_date).all()
-    total_income = sum(t.amount for t in transactions if t.category.category_type == models.TransactionType.INCOME)
-    total_expense = sum(t.amount for t in transactions if t.category.category_type == models.TransactionType.EXPENSE)
-    
-    # Top Cats
-    top_cats_query = db.query(
-        models.Category.name,
-        func.sum(models.Transaction.amount).label("total")
-    ).join(models.Transaction).filter(
-        models.Transaction.date >= start_date,
-        models.Category.category_type == models.TransactionType.EXPENSE
-    ).group_by(models.Category.id).order_by(func.sum(models.Transaction.amount).desc()).limit(3).all()
-    
-    top_cats_simple = [{"name": c.name, "total": c.total} for c in top_cats_query]
+    # 2. Generate di background; request paralel dengan data yang sama digabung jadi satu job
+    # (per keluarga, karena hasilnya disimpan di tabel ai_advice shard masing-masing)
+    job_key = f"{tenant_of(db)}:{key}"
+    job = advisor_jobs.submit(job_key, _generate_advice, session_factory, key, total_income, total_expense, top_cats_simple, goal_lines)
+    return _job_response(job)
 
-    # 3. Panggil Gemini
-    try:
-        advice_text = get_financial_advice(total_income, total_expense, top_cats_simple)
-        
-        # Simpan Cache
-        if "sedang pusing" not in advice_text:
-            new_advice = models.AIAdvice(content=advice_text)
-            db.add(new_advice)
-            db.commit()
-            
-        return {"status": "success", "message": advice_text, "source": "api"}
-        
-    except Exception as e:
-        return {"status": "error", "message": "Gagal menghubungi AI."}
+@router.get("/analyze/{job_id}")
+def analyze_status(request: Request, job_id: str):
+    # Polling status job dari halaman advisor. Pool job dipakai semua keluarga:
+    # job keluarga lain (prefix key berbeda) dianggap tidak ada
+    job = advisor_jobs.get(job_id)
+    if not job or job.key.split(":", 1)[0] != request_tenant(request):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_response(job)
@@ -1,23 +1,22 @@
-from fastapi import APIRouter, Request, Depends, Form, HTTPException
-from fastapi.responses import RedirectResponse
+from fastapi import APIRouter, Request, Depends, Form, HTTPException, UploadFile, File
+from fastapi.responses import RedirectResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from datetime import date
 import calendar
-from ..database import get_db
-from .. import models, crud
+import json
+from urllib.parse import urlencode
+from ..database import get_db, get_session_factory, request_tenant
+from .. import models, queries, schemas
+from ..http_cache import conditional_page
+from ..services import ledger, importer, exporter, receipts, refdata, sync
+from ..tenancy import tenant_of
 
 router = APIRouter(prefix="/transactions", tags=["transactions"])
 templates = Jinja2Templates(directory="templates")
 
-@router.get("/history")
-def transaction_history(
-    request: Request,
-    start_date: str = None, 
-    end_date: str = None, 
-    filter_type: str = "this_month",
-    db: Session = Depends(get_db)
-):
+def _resolve_date_range(filter_type: str, start_date: str, end_date: str):
     today = date.today()
     
     # Logic Penentuan Tanggal
@@ -42,28 +41,129 @@ def transaction_history(
         filter_type = "this_month"
         start_date_obj = date(today.year, today.month, 1)
         end_date_obj = date(today.year, today.month, calendar.monthrange(today.year, today.month)[1])
+
+    return filter_type, start_date_obj, end_date_obj
+
+@router.get("/history")
+def transaction_history(
+    request: Request,
+    start_date: str = None, 
+    end_date: str = None, 
+    filter_type: str = "this_month",
+    db: Session = Depends(get_db)
+):
+    return conditional_page(request, db, lambda: _render_history(request, db, filter_type, start_date, end_date))
+
+def _render_history(request: Request, db: Session, filter_type: str, start_date: str, end_date: str):
+    filter_type, start_date_obj, end_date_obj = _resolve_date_range(filter_type, start_date, end_date)
     
-    transactions = db.query(models.Transaction).filter(
-        models.Transaction.date >= start_date_obj,
-        models.Transaction.date <= end_date_obj
-    ).order_by(models.Transaction.date.desc()).all()
+    # Halaman pertama saja, sisanya via tombol "Muat Lagi" (/history/more)
+    transactions, next_cursor = queries.transactions_page(db, start_date_obj, end_date_obj)
     
     return templates.TemplateResponse("transaction_history.html", {
         "request": request,
         "transactions": transactions,
+        "next_cursor": next_cursor,
         "start_date": start_date_obj.isoformat(),
         "end_date": end_date_obj.isoformat(),
         "filter_type": filter_type
     })
 
+@router.get("/history/more")
+def transaction_history_more(
+    request: Request,
+    cursor: str,
+    start_date: str = None,
+    end_date: str = None,
+    filter_type: str = "this_month",
+    db: Session = Depends(get_db)
+):
+    # Fragment HTML untuk halaman berikutnya (dipanggil oleh tombol "Muat Lagi")
+    return conditional_page(request, db, lambda: _render_history_rows(request, db, cursor, filter_type, start_date, end_date))
+
+def _render_history_rows(request: Request, db: Session, cursor: str, filter_type: str, start_date: str, end_date: str):
+    filter_type, start_date_obj, end_date_obj = _resolve_date_range(filter_type, start_date, end_date)
+    transactions, next_cursor = queries.transactions_page(db, start_date_obj, end_date_obj, cursor=cursor)
+    
+    return templates.TemplateResponse("components/transaction_rows.html", {
+        "request": request,
+        "transactions": transactions,
+        "next_cursor": next_cursor,
+        "start_date": start_date_obj.isoformat(),
+        "end_date": end_date_obj.isoformat(),
+        "filter_type": filter_type
+    })
+
+@router.get("/history.json")
+def transaction_history_json(
+    start_date: str = None,
+    end_date: str = None,
+    filter_type: str = "this_month",
+    session_factory = Depends(get_session_factory)
+):
+    filter_type, start_date_obj, end_date_obj = _resolve_date_range(filter_type, start_date, end_date)
+
+    def stream_rows():
+        # Session sendiri karena generator tetap berjalan setelah dependency get_db ditutup
+        db = session_factory()
+        try:
+            yield "["
+            for i, tx in enumerate(queries.iter_transactions(db, start_date_obj, end_date_obj)):
+                row = tx._asdict()
+                row["date"] = tx.date.isoformat()
+                row["category_type"] = tx.category_type.value if tx.category_type else None
+                row["priority_group"] = tx.priority_group.value if tx.priority_group else None
+                yield ("," if i else "") + json.dumps(row)
+            yield "]"
+        finally:
+            db.close()
+
+    return StreamingResponse(stream_rows(), media_type="application/json")
+
+def _export_response(session_factory, content_fn, media_type: str, extension: str, start_date, end_date, wallet_id, category_id):
+    try:
+        start_date_obj = date.fromisoformat(start_date) if start_date else date.min
+        end_date_obj = date.fromisoformat(end_date) if end_date else date.max
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Format tanggal harus YYYY-MM-DD")
+
+    def stream():
+        # Session sendiri karena generator tetap berjalan setelah dependency get_db ditutup
+        db = session_factory()
+        try:
+            rows = exporter.export_rows(db, start_date_obj, end_date_obj, wallet_id, category_id)
+            yield from content_fn(rows)
+        finally:
+            db.close()
+
+    filename = f"transaksi_{date.today().isoformat()}.{extension}"
+    return StreamingResponse(stream(), media_type=media_type, headers={
+        "Content-Disposition": f'attachment; filename="{filename}"'
+    })
+
+@router.get("/export.csv")
+def export_csv(start_date: str = None, end_date: str = None, wallet_id: int = None, category_id: int = None,
+               session_factory = Depends(get_session_factory)):
+    # Tanpa filter tanggal = seluruh ledger (mis. backup sebelum reset data)
+    return _export_response(session_factory, exporter.csv_chunks, "text/csv; charset=utf-8", "csv",
+                            start_date, end_date, wallet_id, category_id)
+
+@router.get("/export.parquet")
+def export_parquet(start_date: str = None, end_date: str = None, wallet_id: int = None, category_id: int = None,
+                   session_factory = Depends(get_session_factory)):
+    return _export_response(session_factory, exporter.parquet_chunks, "application/vnd.apache.parquet", "parquet",
+                            start_date, end_date, wallet_id, category_id)
+
 @router.get("/add")
 def add_transaction_form(request: Request, db: Session = Depends(get_db)):
-    # Filter hanya wallet aktif
-    wallets = db.query(models.Wallet).filter(models.Wallet.is_active == 1).all()
-    categories = db.query(models.Category).all()
+    # Wallet aktif & kategori dari cache; saldo (berubah tiap transaksi) tetap dibaca langsung
+    wallets = refdata.cache.wallets(db)
+    categories = refdata.cache.categories(db)
+    wallet_balances = dict(db.query(models.Wallet.id, models.Wallet.initial_balance).filter(models.Wallet.is_active == 1))
     return templates.TemplateResponse("add_transaction.html", {
         "request": request, 
         "wallets": wallets, 
+        "wallet_balances": wallet_balances,
         "categories": categories,
         "today": date.today().isoformat()
     })
@@ -75,34 +175,75 @@ def create_transaction(
     description: str = Form(None),
     wallet_id: int = Form(...),
     category_id: int = Form(...),
+    receipt: UploadFile = File(None),
+    idempotency_key: str = Form(None),
     db: Session = Depends(get_db)
 ):
-    # Buat objek transaksi baru
-    new_transaction = models.Transaction(
-        date=date,
-        amount=amount,
-        description=description,
-        wallet_id=wallet_id,
-        category_id=category_id
-    )
-    
-    # Update saldo dompet (logika sederhana)
-    wallet = db.query(models.Wallet).filter(models.Wallet.id == wallet_id).first()
-    category = db.query(models.Category).filter(models.Category.id == category_id).first()
+    # Expense mengurangi saldo, selain itu menambah (tipe kategori dari cache)
+    delta = ledger.balance_delta(ledger.category_type(db, category_id), amount)
+
+    # Foto struk (opsional): disalin per chunk ke penyimpanan hash, kompresi jalan di background
+    receipt_hash = None
+    if receipt is not None and receipt.filename:
+        try:
+            receipt_hash = receipts.receive_file(tenant_of(db), receipt.file)
+        except receipts.ReceiptError as e:
+            raise HTTPException(status_code=e.status_code, detail=str(e))
     
-    if category.category_type == models.TransactionType.EXPENSE:
-        wallet.initial_balance -= amount
+    def post(session):
+        return ledger.post_transaction(
+            session, date, amount, description, wallet_id, category_id, balance_delta=delta, receipt=receipt_hash
+        )
+
+    # Key dari form dicatat seperti antrian offline: jika respons hilang dan service worker
+    # mengantrikan form yang sama, /transactions/batch melihatnya sebagai duplikat
+    if idempotency_key:
+        sync.apply_once(db, idempotency_key, post)
     else:
-        wallet.initial_balance += amount
-        
-    db.add(new_transaction)
-    db.commit()
-    
+        ledger.run_write(db, post)
+
     return RedirectResponse(url="/", status_code=303)
 
+@router.post("/{tx_id}/receipt")
+async def upload_receipt(request: Request, tx_id: int, session_factory = Depends(get_session_factory)):
+    """
+    Upload foto struk sebagai body mentah (fetch(url, {method: "POST", body: file})).
+    Body di-stream ke disk per chunk; respons langsung kembali, kompresi & thumbnail menyusul.
+    """
+    def exists():
+        with session_factory() as db:
+            return receipts.transaction_exists(db, tx_id)
+
+    def link(digest: str):
+        with session_factory() as db:
+            ledger.run_write(db, lambda session: receipts.attach(session, tx_id, digest))
+
+    # Cek transaksi sebelum menerima body, agar upload ke id yang salah tidak ditulis ke disk
+    if not await run_in_threadpool(exists):
+        raise HTTPException(status_code=404, detail="Transaksi tidak ditemukan")
+
+    tenant = request_tenant(request)
+    try:
+        digest = await receipts.receive_stream(tenant, request.stream())
+    except receipts.ReceiptError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    await run_in_threadpool(link, digest)
+
+    return {"status": receipts.status(tenant, digest), "receipt": digest, **receipts.urls(digest)}
+
+@router.post("/batch")
+def sync_batch(batch: schemas.SyncBatch, db: Session = Depends(get_db)):
+    # Antrian offline dari service worker: 1 request & 1 commit untuk banyak transaksi.
+    # Status per item: applied / duplicate (sudah pernah diterima) / rejected (buang dari antrian)
+    results = sync.apply_batch(db, batch)
+    return {
+        "applied": sum(1 for r in results if r["status"] == sync.APPLIED),
+        "results": results,
+    }
+
 @router.get("/transfer")
 def transfer_form(request: Request, db: Session = Depends(get_db)):
-    wallets = db.query(models.Wallet).filter(models.Wallet.is_active == 1).all()
+    wallets = refdata.cache.wallets(db)
     return templates.TemplateResponse("transfer.html", {
         "request": request,
         "wallets": wallets,
@@ -118,45 +259,49 @@ def process_transfer(
     description: str = Form(None),
     db: Session = Depends(get_db)
 ):
-    # 1. Ambil Dompet
-    source = db.query(models.Wallet).filter(models.Wallet.id == source_wallet_id).first()
-    target = db.query(models.Wallet).filter(models.Wallet.id == target_wallet_id).first()
+    # 1. Ambil Dompet (dari cache data referensi, tanpa query)
+    source_wallet = refdata.cache.wallet(db, source_wallet_id)
+    target_wallet = refdata.cache.wallet(db, target_wallet_id)
     
-    if not source or not target:
+    if source_wallet is None or target_wallet is None:
         raise HTTPException(status_code=404, detail="Wallet not found")
-        
-    # 2. Update Saldo
-    source.initial_balance -= amount
-    target.initial_balance += amount
     
-    # 3. Cari atau Buat Kategori 'Transfer' (Agar tercatat di history)
-    # Kita cari kategori sistem bernama 'Transfer'
-    cat_transfer = db.query(models.Category).filter(models.Category.name == "Transfer").first()
-    if not cat_transfer:
-        # Jika belum ada, buat baru (Hidden category basically)
-        cat_transfer = models.Category(name="Transfer", category_type=models.TransactionType.TRANSFER, icon="arrows-left-right")
-        db.add(cat_transfer)
-        db.commit()
-        db.refresh(cat_transfer)
-
-    # 4. Catat Transaksi
-    # Kita catat sebagai pengeluaran dari Source? Atau 2 transaksi?
+    # 2. Cari atau Buat Kategori 'Transfer' (Agar tercatat di history)
+    # Kita cari kategori sistem bernama 'Transfer' (Hidden category basically)
+    cat_transfer_id = ledger.system_category(
+        db, "Transfer", category_type=models.TransactionType.TRANSFER, icon="arrows-left-right"
+    )
+
+    # 3. Catat Transaksi & Update Saldo
     # Cara paling rapi: 1 Record Transaksi tapi field wallet_id mengarah ke source.
     # Deskripsi otomatis ditambahkan info tujuan.
-    
-    tx_desc = f"Transfer ke {target.name}"
+    tx_desc = f"Transfer ke {target_wallet.name}"
     if description:
         tx_desc += f" ({description})"
 
-    new_tx = models.Transaction(
-        date=date,
-        amount=amount,
-        description=tx_desc,
-        wallet_id=source.id,
-        category_id=cat_transfer.id
-    )
-    
-    db.add(new_tx)
-    db.commit()
+    # Jurnal 2 kaki: dompet sumber -amount, dompet tujuan +amount
+    ledger.run_write(db, lambda session: ledger.post_transaction(
+        session, date, amount, tx_desc, source_wallet_id, cat_transfer_id,
+        balance_delta=-amount, counter_wallet_id=target_wallet_id
+    ))
     
     return RedirectResponse(url="/", status_code=303)
+
+@router.post("/import")
+def import_statement(
+    file: UploadFile = File(...),
+    wallet_id: int = Form(...),
+    db: Session = Depends(get_db)
+):
+    # Import mutasi bank (CSV / OFX), dibaca bertahap dari file upload
+    file_format = "ofx" if (file.filename or "").lower().endswith((".ofx", ".qfx")) else "csv"
+    try:
+        result = importer.import_statement(db, file.file, file_format, wallet_id=wallet_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Baris dengan tanggal / nominal rusak ditampilkan di halaman akun (jumlah + contoh pertama)
+    query = {"imported": result.imported, "duplicates": result.duplicates, "skipped": result.skipped}
+    if result.invalid:
+        query.update(invalid=result.invalid, error=result.errors[0])
+    return RedirectResponse(url=f"/account?{urlencode(query)}", status_code=303)
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Request, Depends, Form
+from fastapi import APIRouter, Request, Depends, Form, HTTPException
 from fastapi.responses import RedirectResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
-from datetime import date
+from datetime import date, timedelta
 from ..database import get_db
 from .. import models
+from ..services import balances, ledger, refdata
 
 router = APIRouter(prefix="/wallets", tags=["wallets"])
 templates = Jinja2Templates(directory="templates")
@@ -39,18 +40,45 @@ def create_wallet(
     new_wallet = models.Wallet(
         name=name,
         wallet_type=wallet_type,
-        initial_balance=initial_balance,
+        initial_balance=0,
         is_active=1
     )
     db.add(new_wallet)
+    db.flush()
+    # Saldo awal masuk lewat jurnal agar riwayat saldo dimulai dari sini
+    if initial_balance:
+        ledger.post_entry(db, date.today(), ledger.opening_balance_legs(new_wallet.id, initial_balance))
     db.commit()
+    refdata.cache.invalidate(db)
     
     return RedirectResponse(url="/wallets", status_code=303)
 
+def _balance_history_response(db: Session, wallet_ids, days: int):
+    days = max(1, min(days, 3660))
+    end_date = date.today()
+    start_date = end_date - timedelta(days=days - 1)
+    points = balances.balance_history(db, wallet_ids, start_date, end_date)
+    return {
+        "labels": [d.isoformat() for d, _ in points],
+        "balances": [round(balance, 2) for _, balance in points],
+    }
+
+@router.get("/balance-history")
+def total_balance_history(days: int = 90, db: Session = Depends(get_db)):
+    # Data grafik total saldo semua dompet aktif
+    wallet_ids = [w.id for w in refdata.cache.wallets(db)]
+    return _balance_history_response(db, wallet_ids, days)
+
+@router.get("/{wallet_id}/balance-history")
+def wallet_balance_history(wallet_id: int, days: int = 90, db: Session = Depends(get_db)):
+    if refdata.cache.wallet(db, wallet_id) is None:
+        raise HTTPException(status_code=404, detail="Wallet not found")
+    return _balance_history_response(db, [wallet_id], days)
+
 @router.get("/{wallet_id}/delete")
 def delete_wallet_confirm(wallet_id: int, request: Request, db: Session = Depends(get_db)):
     wallet = db.query(models.Wallet).filter(models.Wallet.id == wallet_id).first()
-    other_wallets = db.query(models.Wallet).filter(models.Wallet.is_active == 1, models.Wallet.id != wallet_id).all()
+    other_wallets = [w for w in refdata.cache.wallets(db) if w.id != wallet_id]
     
     return templates.TemplateResponse("delete_wallet.html", {
         "request": request,
@@ -72,24 +100,22 @@ def delete_wallet(
         
     # Logika Transfer Saldo
     if wallet.initial_balance > 0 and action == "transfer" and target_wallet_id:
-        target_wallet = db.query(models.Wallet).filter(models.Wallet.id == target_wallet_id).first()
+        target_wallet = refdata.cache.wallet(db, target_wallet_id)
         if target_wallet:
             amount = wallet.initial_balance
             
-            # 1. Tambah saldo ke target
-            target_wallet.initial_balance += amount
-            
-            # 2. Catat sebagai Transaksi Transfer (Opsional, tapi bagus untuk tracking)
-            # Kita perlu kategori 'Transfer' atau sejenisnya. Untuk simpelnya kita skip pencatatan transaksi 
-            # detil di tabel transaction agar tidak ribet dengan kategori ID, 
-            # tapi secara logika uangnya pindah.
-            
-            # 3. Kosongkan saldo dompet lama
-            wallet.initial_balance = 0
+            # Pindahkan saldo: kosongkan dompet lama & tambah ke target (1 jurnal, 2 kaki).
+            # Tidak dicatat di tabel transaksi agar tidak ribet dengan kategori ID,
+            # tapi tetap tercatat di riwayat saldo kedua dompet.
+            ledger.post_entry(db, date.today(), [
+                ledger.wallet_leg(wallet.id, -amount),
+                ledger.wallet_leg(target_wallet.id, amount),
+            ])
             
     # Soft Delete (Set Active = 0)
     wallet.is_active = 0
     db.commit()
+    refdata.cache.invalidate(db)
         
     return RedirectResponse(url="/wallets", status_code=303)
 
@@ -119,54 +145,27 @@ def process_adjustment(
     if diff == 0:
         return RedirectResponse(url="/wallets", status_code=303)
 
-    # Cari/Buat Kategori Koreksi
-    cat_adj = db.query(models.Category).filter(models.Category.name == "Koreksi Saldo").first()
-    if not cat_adj:
-        # Default sebagai Expense, tapi nanti fleksibel
-        cat_adj = models.Category(
-            name="Koreksi Saldo", 
-            category_type=models.TransactionType.EXPENSE, 
-            priority_group=models.PriorityGroup.LIFESTYLE,
-            icon="scales"
-        )
-        db.add(cat_adj)
-        db.commit()
-        db.refresh(cat_adj)
-
     # Tentukan Tipe Transaksi (Income/Expense) berdasarkan selisih
-    # Jika diff negatif (uang hilang) -> Expense
-    # Jika diff positif (uang nemu) -> Income (Kita perlu akali kategori ini agar tidak error validasi jika ada constraint, 
-    # tapi untuk simplifikasi kita pakai kategori Koreksi tadi, asumsi sistem fleksibel)
-    
-    # Update saldo dompet
-    wallet.initial_balance = actual_balance
-    
-    # Catat Transaksi
+    # Jika diff negatif (uang hilang) -> Expense 'Koreksi Saldo'
+    # Jika diff positif (uang nemu) -> Income 'Koreksi Saldo (Income)'
     # Karena model Transaction tidak menyimpan 'type' (bergantung kategori), 
     # kita simpan ABS(amount).
-    # NAMUN, kategori 'Koreksi Saldo' tadi kita set EXPENSE. 
-    # Jika ini INCOME (Nemu uang), idealnya pakai kategori tipe INCOME.
-    
-    final_cat = cat_adj
-    if diff > 0:
-         # Uang Nemu -> Perlu kategori Income?
-         # Mari kita buat kategori income koreksi jika belum ada
-         cat_adj_inc = db.query(models.Category).filter(models.Category.name == "Koreksi Saldo (Income)").first()
-         if not cat_adj_inc:
-             cat_adj_inc = models.Category(name="Koreksi Saldo (Income)", category_type=models.TransactionType.INCOME, icon="scales")
-             db.add(cat_adj_inc)
-             db.commit()
-         final_cat = cat_adj_inc
+    if diff < 0:
+        final_cat_id = ledger.system_category(
+            db, "Koreksi Saldo",
+            category_type=models.TransactionType.EXPENSE,
+            priority_group=models.PriorityGroup.LIFESTYLE,
+            icon="scales"
+        )
+    else:
+        final_cat_id = ledger.system_category(
+            db, "Koreksi Saldo (Income)", category_type=models.TransactionType.INCOME, icon="scales"
+        )
 
-    new_tx = models.Transaction(
-        date=date_trx,
-        amount=abs(diff),
-        description=f"Opname: {description or 'Selisih Saldo'}",
-        wallet_id=wallet.id,
-        category_id=final_cat.id
-    )
-    
-    db.add(new_tx)
-    db.commit()
+    # Catat Transaksi & update saldo dompet sebesar selisihnya (atomik)
+    ledger.run_write(db, lambda session: ledger.post_transaction(
+        session, date_trx, abs(diff), f"Opname: {description or 'Selisih Saldo'}",
+        wallet_id, final_cat_id, balance_delta=diff
+    ))
     
     return RedirectResponse(url="/wallets", status_code=303)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import date
 from .models import TransactionType, PriorityGroup
@@ -44,3 +44,10 @@ class Transaction(TransactionBase):
     id: int
     class Config:
         from_attributes = True
+
+class SyncTransaction(TransactionBase):
+    # Dibuat di browser (crypto.randomUUID) saat transaksi masuk antrian offline
+    idempotency_key: str = Field(..., min_length=8, max_length=64)
+
+class SyncBatch(BaseModel):
+    transactions: List[SyncTransaction] = Field(..., max_length=500)
@@ -0,0 +1,33 @@
+"""
+Hash PIN keluarga (PBKDF2-SHA256 + salt acak), disimpan di users.pin_hash
+dengan format "pbkdf2_sha256$<iterasi>$<salt hex>$<hash hex>".
+"""
+import hashlib
+import hmac
+import secrets
+
+PIN_MIN_LENGTH = 6
+PIN_ITERATIONS = 200_000
+_SCHEME = "pbkdf2_sha256"
+
+
+def hash_pin(pin: str) -> str:
+    salt = secrets.token_bytes(16)
+    digest = hashlib.pbkdf2_hmac("sha256", pin.encode("utf-8"), salt, PIN_ITERATIONS)
+    return f"{_SCHEME}${PIN_ITERATIONS}${salt.hex()}${digest.hex()}"
+
+def verify_pin(pin: str, stored: str) -> bool:
+    if not pin or not stored:
+        return False
+    try:
+        scheme, iterations, salt, expected = stored.split("$")
+    except ValueError:
+        return False
+    if scheme != _SCHEME:
+        return False
+    digest = hashlib.pbkdf2_hmac("sha256", pin.encode("utf-8"), bytes.fromhex(salt), int(iterations))
+    return hmac.compare_digest(digest.hex(), expected)
+
+def valid_new_pin(pin: str) -> bool:
+    # Sama dengan input di halaman login: angka, 6 digit
+    return pin.isdigit() and len(pin) >= PIN_MIN_LENGTH
@@ -0,0 +1,89 @@
+"""
+Data awal (kategori & dompet default) dan inisialisasi shard keluarga baru.
+"""
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from .config import settings
+from .database import Base
+from . import models, migrations
+from .security import hash_pin
+from .services import bills, refdata
+from .tenancy import DEFAULT_TENANT, tenant_of
+
+ADMIN_USERNAME = "admin"
+
+# Dependency untuk Seeding Data Awal
+def seed_data(db: Session):
+    # Cek apakah kategori sudah ada
+    if not db.query(models.Category).first():
+        print("🌱 Seeding initial data...")
+        
+        # 1. Kategori Pemasukan
+        incomes = [
+            {"name": "Gaji Bulanan", "category_type": "income", "icon": "money"},
+            {"name": "Bonus/THR", "category_type": "income", "icon": "gift"},
+        ]
+        for inc in incomes:
+            db.add(models.Category(**inc))
+            
+        # 2. Kategori Pengeluaran (3 Buckets)
+        expenses = [
+            # Fixed (Kewajiban)
+            {"name": "KPR", "category_type": "expense", "priority_group": "fixed", "icon": "house"},
+            {"name": "Listrik", "category_type": "expense", "priority_group": "fixed", "icon": "lightning"},
+            
+            # Living (Kebutuhan)
+            {"name": "Belanja", "category_type": "expense", "priority_group": "living", "icon": "shopping-cart"},
+            {"name": "Bensin/Transport", "category_type": "expense", "priority_group": "living", "icon": "gas-pump"},
+            {"name": "Pulsa/Internet", "category_type": "expense", "priority_group": "living", "icon": "wifi-high"},
+            
+            # Lifestyle (Keinginan)
+            {"name": "Jajan", "category_type": "expense", "priority_group": "lifestyle", "icon": "coffee"},
+            {"name": "Makan Luar", "category_type": "expense", "priority_group": "lifestyle", "icon": "fork-knife"},
+            {"name": "Langganan Digital", "category_type": "expense", "priority_group": "lifestyle", "icon": "film-strip"},
+        ]
+        for exp in expenses:
+            db.add(models.Category(**exp))
+            
+        # 3. Wallet Default
+        wallets = [
+            {"name": "Dompet Tunai", "wallet_type": "Cash", "initial_balance": 0},
+        ]
+        for w in wallets:
+            db.add(models.Wallet(**w))
+            
+        db.commit()
+        refdata.cache.invalidate(db)
+        print("✅ Seeding complete!")
+
+    # Keluarga default: user login dari ADMIN_PIN. Shard keluarga lain mendapat user
+    # (dengan PIN sendiri) lewat `cli create-tenant --pin` atau login pertama (TENANT_AUTO_CREATE)
+    if tenant_of(db) == DEFAULT_TENANT:
+        ensure_user(db, settings.ADMIN_PIN)
+
+def ensure_user(db: Session, pin: str):
+    """
+    User keluarga (satu per shard), dibuat dengan PIN ini jika belum ada.
+    User yang sudah ada tidak diubah. Return user.
+    """
+    user = db.query(models.User).first()
+    if user is not None:
+        return user
+    db.add(models.User(username=ADMIN_USERNAME, full_name="Admin", pin_hash=hash_pin(pin)))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Dibuat bersamaan oleh request lain (login pertama paralel): pakai yang sudah ada
+        db.rollback()
+    return db.query(models.User).first()
+
+def init_shard(tenant: str, engine):
+    """
+    Dipanggil pool shard saat database keluarga pertama kali dibuka di proses ini:
+    buat tabel, terapkan migrasi, seed data awal & jadwalkan tagihan auto-post.
+    """
+    Base.metadata.create_all(bind=engine)
+    migrations.run_migrations(engine)
+    with Session(engine, info={"tenant": tenant}) as db:
+        seed_data(db)
+        bills.scheduler.load(db)
@@ -0,0 +1,77 @@
+from collections import OrderedDict
+from sqlalchemy.orm import Session
+import hashlib
+import json
+import threading
+import time
+from .. import models
+from ..config import settings
+from ..tenancy import tenant_of
+
+# Cache saran AI berdasarkan fingerprint data input prompt.
+# Saran hanya di-generate ulang jika angka yang dikirim ke AI benar-benar berubah.
+# Tier 1: LRU di memori (dengan TTL), Tier 2: tabel ai_advice (kolom fingerprint ber-index).
+# Entri memori dipisah per keluarga: fingerprint sama di shard lain tidak berbagi saran.
+
+def fingerprint(month_period: str, income: float, expense: float, top_categories, context_hash: str, goal_lines=None) -> str:
+    payload = json.dumps({
+        "month": month_period,
+        "income": round(income, 2),
+        "expense": round(expense, 2),
+        "top": [[c["name"], round(c["total"], 2)] for c in top_categories],
+        "context": context_hash,
+        "goals": list(goal_lines or []),
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AdviceCache:
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._entries = OrderedDict() # (keluarga, fingerprint) -> (expires_at, content)
+        self._lock = threading.Lock()
+
+    def _get_memory(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, content = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return content
+
+    def _put_memory(self, key, content: str):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, content)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, db: Session, key: str):
+        content = self._get_memory((tenant_of(db), key))
+        if content is not None:
+            return content
+
+        advice = db.query(models.AIAdvice.content).filter(
+            models.AIAdvice.fingerprint == key
+        ).order_by(models.AIAdvice.id.desc()).first()
+        if advice:
+            self._put_memory((tenant_of(db), key), advice.content)
+            return advice.content
+        return None
+
+    def put(self, db: Session, key: str, content: str):
+        db.add(models.AIAdvice(content=content, fingerprint=key))
+        db.commit()
+        self._put_memory((tenant_of(db), key), content)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+advice_cache = AdviceCache(settings.ADVICE_CACHE_SIZE, settings.ADVICE_CACHE_TTL_SECONDS)
@@ -1,31 +1,157 @@
 from google import genai
-from google.genai import types
+from google.genai import types, errors
 from ..config import settings
+from .. import metrics
+import hashlib
+import httpx
 import logging
 import os
+import random
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
-def get_financial_advice(month_income, month_expense, top_categories):
-    if not settings.GEMINI_API_KEY:
-        return "API Key missing."
+CONTEXT_FILE_PATH = "context.txt" # Path di dalam container
+DEFAULT_CONTEXT = "User adalah keluarga yang ingin berhemat." # Default aman
 
-    try:
-        client = genai.Client(api_key=settings.GEMINI_API_KEY)
-        
+
+class AdvisorError(Exception):
+    pass
+
+
+class CircuitOpenError(AdvisorError):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Setelah `threshold` kegagalan berturut-turut, tolak panggilan selama `cooldown` detik
+    (fail fast saat Gemini sedang bermasalah). Setelah cooldown, satu panggilan percobaan diizinkan.
+    """
+
+    def __init__(self, threshold: int, cooldown: float, clock=time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock # Bisa diganti jam palsu untuk testing
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if self.clock() - self.opened_at < self.cooldown:
+                raise CircuitOpenError("AI sedang tidak tersedia, coba lagi beberapa menit lagi.")
+            # Half-open: izinkan satu percobaan, buka lagi jika gagal
+            self.opened_at = self.clock()
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = self.clock()
+
+
+def _is_retryable(e: Exception) -> bool:
+    if isinstance(e, errors.ServerError):
+        return True
+    if isinstance(e, errors.ClientError):
+        return getattr(e, "code", None) == 429 # Rate limit
+    return isinstance(e, (httpx.TimeoutException, httpx.TransportError, TimeoutError, ConnectionError))
+
+
+class AdvisorService:
+    """
+    Service Gemini yang hidup sepanjang aplikasi: satu client, context.txt di-cache
+    (reload jika mtime berubah), deadline per panggilan, retry backoff + jitter, dan circuit breaker.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "gemini-2.5-flash",
+        context_path: str = CONTEXT_FILE_PATH,
+        timeout: float = 30.0,
+        max_attempts: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        base_url: str = None,
+        breaker: CircuitBreaker = None,
+        client=None,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        self.api_key = api_key
+        self.model = model
+        self.context_path = context_path
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.base_url = base_url
+        self.breaker = breaker or CircuitBreaker(threshold=5, cooldown=60)
+        self._client = client # Bisa diisi client palsu untuk testing
+        self.clock = clock # Jam & sleep backoff, bisa diganti versi palsu untuk testing
+        self.sleep = sleep
+        self._client_lock = threading.Lock()
+        self._context = (None, DEFAULT_CONTEXT, None) # (mtime, isi, hash)
+        self._context_lock = threading.Lock()
+
+    @property
+    def client(self):
+        with self._client_lock:
+            if self._client is None:
+                http_options = types.HttpOptions(timeout=int(self.timeout * 1000), base_url=self.base_url)
+                self._client = genai.Client(api_key=self.api_key, http_options=http_options)
+            return self._client
+
+    def _load_context(self):
+        try:
+            mtime = os.stat(self.context_path).st_mtime
+        except OSError:
+            mtime = None
+
+        with self._context_lock:
+            cached_mtime, text, digest = self._context
+            if digest is not None and cached_mtime == mtime:
+                return text, digest
+
+            # Baca Context dari File (Rahasia & Fleksibel), hanya jika berubah
+            text = DEFAULT_CONTEXT
+            if mtime is not None:
+                with open(self.context_path, "r", encoding="utf-8") as f:
+                    text = f.read()
+            digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            self._context = (mtime, text, digest)
+            return text, digest
+
+    def user_context(self) -> str:
+        return self._load_context()[0]
+
+    def context_hash(self) -> str:
+        return self._load_context()[1]
+
+    def build_prompt(self, month_income, month_expense, top_categories, goal_lines=None) -> str:
         top_cat_str = ", ".join([f"{c['name']} (Rp {c['total']:,})" for c in top_categories])
         sisa_cashflow = month_income - month_expense
-        
-        # Baca Context dari File (Rahasia & Fleksibel)
-        context_file_path = "context.txt" # Path di dalam container
-        user_context = "User adalah keluarga yang ingin berhemat." # Default aman
-        
-        if os.path.exists(context_file_path):
-            with open(context_file_path, "r", encoding="utf-8") as f:
-                user_context = f.read()
-        
-        prompt = f"""
-        {user_context}
+
+        # Proyeksi goal sudah dihitung lokal (services/goals.py); AI cukup menjelaskan, bukan menebak
+        if goal_lines:
+            goal_block = "\n".join(f"        - {line}" for line in goal_lines)
+            goal_task = "3. Goal: Jelaskan proyeksi di atas secara singkat (JANGAN hitung ulang angkanya), dan sarankan cara mempercepat goal dengan peluang rendah."
+        else:
+            goal_block = "        - Belum ada goal tercatat."
+            goal_task = "3. Goal: Sarankan satu goal pertama yang masuk akal (mis. Dana Darurat)."
+
+        return f"""
+        {self.user_context()}
 
         LAPORAN BULAN INI:
         - Income: Rp {month_income:,}
@@ -33,29 +159,83 @@ def get_financial_advice(month_income, month_expense, top_categories):
         - Sisa Cashflow: Rp {sisa_cashflow:,}
         - Pengeluaran Terbesar: {top_cat_str}
 
+        PROYEKSI GOAL (simulasi lokal):
+{goal_block}
+
         TUGAS (Jawab dalam Bahasa Indonesia yang natural):
         1. Diagnosis: Apakah cashflow bulan ini aman?
         2. Action Plan: Alokasikan Rp {sisa_cashflow:,} ini kemana?
-        3. Simulasi Kilat: Kapan goal tercapai?
-        
+        {goal_task}
+
         Keep it short, insightful, and actionable.
         """
 
-        # Menggunakan Gemini 2.5 Flash
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                thinking_config=types.ThinkingConfig(include_thoughts=False)
-            )
-        )
-        print(f"DEBUG GEMINI RESPONSE: {response.text.strip()}")
-
-        
-        return response.text.strip()
-
-    except Exception as e:
-        import traceback
-        print(f"DEBUG GEMINI ERROR FULL: {traceback.format_exc()}")
-        logger.error(f"Gemini AI Error: {e}")
-        return f"Waduh, AI-nya lagi bengong. Error: {str(e)}"
+    def _backoff(self, attempt: int) -> float:
+        # Exponential backoff dengan full jitter
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def generate(self, month_income, month_expense, top_categories, goal_lines=None) -> str:
+        """
+        Minta saran ke Gemini. Raise AdvisorError jika gagal (tidak mengembalikan teks error).
+        """
+        if not self.api_key and self._client is None:
+            metrics.advisor_errors.inc(reason="no_api_key")
+            raise AdvisorError("API Key Gemini belum disetting.")
+
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            metrics.advisor_errors.inc(reason="circuit_open")
+            raise
+        prompt = self.build_prompt(month_income, month_expense, top_categories, goal_lines)
+        deadline = self.clock() + self.timeout * self.max_attempts
+
+        for attempt in range(self.max_attempts):
+            started = self.clock()
+            try:
+                response = self.client.models.generate_content(
+                    model=self.model,
+                    contents=prompt,
+                    config=types.GenerateContentConfig(
+                        thinking_config=types.ThinkingConfig(include_thoughts=False)
+                    )
+                )
+                text = (response.text or "").strip()
+                if not text:
+                    raise AdvisorError("Gemini mengembalikan jawaban kosong.")
+                self.breaker.record_success()
+                metrics.advisor_call_seconds.observe(self.clock() - started, outcome="ok")
+                logger.debug(f"Gemini OK dalam {self.clock() - started:.2f}s ({len(text)} karakter)")
+                return text
+
+            except Exception as e:
+                retryable = _is_retryable(e)
+                metrics.advisor_call_seconds.observe(self.clock() - started, outcome="error")
+                metrics.advisor_errors.inc(reason=type(e).__name__) # ServerError, ClientError, ReadTimeout, ...
+                logger.warning(f"Gemini AI Error (percobaan {attempt + 1}/{self.max_attempts}): {e!r}")
+                delay = self._backoff(attempt)
+                if not retryable or attempt + 1 >= self.max_attempts or self.clock() + delay >= deadline:
+                    self.breaker.record_failure()
+                    raise AdvisorError("Gagal menghubungi AI.") from e
+                self.sleep(delay)
+
+
+# Satu instance untuk seluruh aplikasi (client & context di-reuse)
+advisor = AdvisorService(
+    api_key=settings.GEMINI_API_KEY,
+    model=settings.GEMINI_MODEL,
+    timeout=settings.GEMINI_TIMEOUT_SECONDS,
+    max_attempts=settings.GEMINI_MAX_ATTEMPTS,
+    base_url=settings.GEMINI_BASE_URL or None,
+    breaker=CircuitBreaker(
+        threshold=settings.GEMINI_BREAKER_THRESHOLD,
+        cooldown=settings.GEMINI_BREAKER_COOLDOWN_SECONDS
+    ),
+)
+
+def context_hash():
+    # Bagian dari fingerprint cache saran: ganti context.txt = saran baru
+    return advisor.context_hash()
+
+def get_financial_advice(month_income, month_expense, top_categories, goal_lines=None):
+    return advisor.generate(month_income, month_expense, top_categories, goal_lines)
@@ -0,0 +1,220 @@
+from sqlalchemy import select, insert, delete, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from datetime import date, timedelta
+import calendar
+import uuid
+from .. import models
+
+# Saldo dompet per tanggal dari jurnal double-entry (tabel postings).
+# Checkpoint saldo dibuat per akhir bulan, jadi saldo pada tanggal berapapun
+# = 1 checkpoint + scan posting maksimal ~1 bulan (index account_type, account_id, date).
+# Checkpoint dilengkapi di write path (ledger.post_entry, import) dan `cli check-balances`,
+# dalam transaksi penulisnya; endpoint baca (riwayat saldo) tidak pernah menulis.
+
+def _wallet_postings(wallet_id: int):
+    return (
+        models.Posting.account_type == models.AccountType.WALLET,
+        models.Posting.account_id == wallet_id,
+    )
+
+def _month_end(d: date) -> date:
+    return date(d.year, d.month, calendar.monthrange(d.year, d.month)[1])
+
+def invalidate_checkpoints(db: Session, wallet_ids, from_date: date):
+    """
+    Hapus checkpoint yang dibuat sebelum ada posting bertanggal from_date (tidak melakukan commit).
+    """
+    if wallet_ids:
+        db.execute(delete(models.BalanceCheckpoint).where(
+            models.BalanceCheckpoint.wallet_id.in_(set(wallet_ids)),
+            models.BalanceCheckpoint.as_of_date >= from_date
+        ))
+
+def latest_checkpoint(db: Session, wallet_id: int, at: date):
+    return db.execute(
+        select(models.BalanceCheckpoint.as_of_date, models.BalanceCheckpoint.balance)
+        .where(models.BalanceCheckpoint.wallet_id == wallet_id, models.BalanceCheckpoint.as_of_date <= at)
+        .order_by(models.BalanceCheckpoint.as_of_date.desc())
+        .limit(1)
+    ).first()
+
+def postings_sum_select(wallet_id: int, after, until: date):
+    stmt = select(func.coalesce(func.sum(models.Posting.amount), 0.0)).where(
+        *_wallet_postings(wallet_id), models.Posting.date <= until
+    )
+    if after is not None:
+        stmt = stmt.where(models.Posting.date > after)
+    return stmt
+
+def _sum_postings(db: Session, wallet_id: int, after, until: date) -> float:
+    return db.execute(postings_sum_select(wallet_id, after, until)).scalar()
+
+def balance_at(db: Session, wallet_id: int, at: date) -> float:
+    """
+    Saldo dompet pada akhir hari `at`.
+    """
+    checkpoint = latest_checkpoint(db, wallet_id, at)
+    if checkpoint is None:
+        return _sum_postings(db, wallet_id, None, at)
+    return checkpoint.balance + _sum_postings(db, wallet_id, checkpoint.as_of_date, at)
+
+def balance_history(db: Session, wallet_ids, start_date: date, end_date: date):
+    """
+    Saldo harian (total dompet-dompet yang dipilih) dari start_date s/d end_date.
+    Return list (tanggal, saldo).
+    """
+    wallet_ids = list(wallet_ids)
+    if not wallet_ids:
+        return []
+    balance = sum(balance_at(db, wid, start_date - timedelta(days=1)) for wid in wallet_ids)
+
+    daily = dict(db.execute(
+        select(models.Posting.date, func.sum(models.Posting.amount))
+        .where(
+            models.Posting.account_type == models.AccountType.WALLET,
+            models.Posting.account_id.in_(wallet_ids),
+            models.Posting.date >= start_date,
+            models.Posting.date <= end_date
+        )
+        .group_by(models.Posting.date)
+    ).all())
+
+    points = []
+    day = start_date
+    while day <= end_date:
+        balance += daily.get(day, 0.0)
+        points.append((day, balance))
+        day += timedelta(days=1)
+    return points
+
+def refresh_checkpoints(db: Session, wallet_ids=None, until: date = None) -> int:
+    """
+    Lengkapi checkpoint akhir bulan sampai bulan terakhir yang sudah lewat (tidak melakukan commit).
+    Hanya bulan setelah checkpoint terakhir yang dihitung. Return jumlah checkpoint baru.
+    """
+    until = until or date.today()
+    last_closed = date(until.year, until.month, 1) - timedelta(days=1)
+    if wallet_ids is None:
+        wallet_ids = [wid for (wid,) in db.query(models.Wallet.id)]
+
+    month_col = func.strftime("%Y-%m", models.Posting.date)
+    created = 0
+    for wallet_id in wallet_ids:
+        checkpoint = latest_checkpoint(db, wallet_id, last_closed)
+        if checkpoint is not None and checkpoint.as_of_date == last_closed:
+            continue # Sudah lengkap: kasus umum di setiap write
+        stmt = select(month_col, func.sum(models.Posting.amount)).where(
+            *_wallet_postings(wallet_id), models.Posting.date <= last_closed
+        ).group_by(month_col)
+        if checkpoint is not None:
+            stmt = stmt.where(models.Posting.date > checkpoint.as_of_date)
+        monthly = dict(db.execute(stmt).all())
+
+        if checkpoint is not None:
+            balance = checkpoint.balance
+            cursor = checkpoint.as_of_date + timedelta(days=1)
+        elif monthly:
+            balance = 0.0
+            cursor = date.fromisoformat(min(monthly) + "-01")
+        else:
+            continue
+
+        rows = []
+        while cursor <= last_closed:
+            balance += monthly.get(cursor.strftime("%Y-%m"), 0.0)
+            month_end = _month_end(cursor)
+            rows.append({"wallet_id": wallet_id, "as_of_date": month_end, "balance": balance})
+            cursor = month_end + timedelta(days=1)
+
+        if rows:
+            # Checkpoint yang sudah ada (dibuat penulis lain) dibiarkan, nilainya sama
+            db.execute(sqlite_insert(models.BalanceCheckpoint).on_conflict_do_nothing(), rows)
+            created += len(rows)
+    return created
+
+def clear_balance_history(db: Session):
+    db.query(models.BalanceCheckpoint).delete()
+    db.query(models.Posting).delete()
+
+def verify_balances(db: Session):
+    """
+    Bandingkan saldo tersimpan (wallets.initial_balance) dengan total posting.
+    Return list (wallet_id, nama, saldo tersimpan, saldo menurut jurnal) yang tidak cocok.
+    """
+    totals = dict(db.execute(
+        select(models.Posting.account_id, func.sum(models.Posting.amount))
+        .where(models.Posting.account_type == models.AccountType.WALLET)
+        .group_by(models.Posting.account_id)
+    ).all())
+    mismatches = []
+    for wallet_id, name, stored in db.query(models.Wallet.id, models.Wallet.name, models.Wallet.initial_balance):
+        from_postings = totals.get(wallet_id, 0.0)
+        if abs((stored or 0.0) - from_postings) > 0.005:
+            mismatches.append((wallet_id, name, stored or 0.0, from_postings))
+    return mismatches
+
+def backfill_postings(db: Session, batch_size: int = 5000):
+    """
+    Database lama (sebelum ada jurnal): buat posting dari tabel transaksi,
+    lalu selisih terhadap saldo tersimpan dicatat sebagai saldo awal (lawan: ekuitas).
+    """
+    if db.query(models.Posting.id).first():
+        return
+
+    wallet_by_name = {name.lower(): wid for wid, name in db.query(models.Wallet.id, models.Wallet.name)}
+    rows = db.execute(
+        select(
+            models.Transaction.id, models.Transaction.date, models.Transaction.amount,
+            models.Transaction.description, models.Transaction.wallet_id,
+            models.Transaction.category_id, models.Category.category_type
+        )
+        .outerjoin(models.Category, models.Category.id == models.Transaction.category_id)
+        .where(models.Transaction.date.is_not(None))
+    ).all()
+
+    wallet_totals = {}
+    first_dates = {}
+    pending = []
+
+    def add_entry(entry_date, legs, transaction_id=None):
+        entry_id = uuid.uuid4().hex
+        for account_type, account_id, amount in legs:
+            pending.append({
+                "entry_id": entry_id, "transaction_id": transaction_id, "date": entry_date,
+                "account_type": account_type, "account_id": account_id, "amount": amount,
+            })
+            if account_type == models.AccountType.WALLET:
+                wallet_totals[account_id] = wallet_totals.get(account_id, 0.0) + amount
+                first_dates[account_id] = min(first_dates.get(account_id, entry_date), entry_date)
+        if len(pending) >= batch_size:
+            db.execute(insert(models.Posting), pending)
+            pending.clear()
+
+    wallet_leg = models.AccountType.WALLET
+    for tx_id, tx_date, amount, description, wallet_id, category_id, cat_type in rows:
+        amount = amount or 0.0
+        if cat_type == models.TransactionType.TRANSFER:
+            # Transfer lama hanya tercatat di sisi sumber; tujuan dibaca dari deskripsi "Transfer ke <dompet>"
+            delta = -amount
+            target = None
+            if description and description.lower().startswith("transfer ke "):
+                target_name = description[len("transfer ke "):].split(" (")[0].strip().lower()
+                target = wallet_by_name.get(target_name)
+            counter = (wallet_leg, target, amount) if target else (models.AccountType.EQUITY, 0, amount)
+        else:
+            delta = -amount if cat_type == models.TransactionType.EXPENSE else amount
+            counter = (models.AccountType.CATEGORY, category_id, -delta)
+        add_entry(tx_date, [(wallet_leg, wallet_id, delta), counter], tx_id)
+
+    # Selisih (saldo awal dompet, mutasi lama yang tidak tercatat) -> saldo awal
+    for wallet_id, stored in db.query(models.Wallet.id, models.Wallet.initial_balance):
+        diff = (stored or 0.0) - wallet_totals.get(wallet_id, 0.0)
+        if abs(diff) > 0.005:
+            add_entry(first_dates.get(wallet_id, date.today()), [
+                (wallet_leg, wallet_id, diff), (models.AccountType.EQUITY, 0, -diff)
+            ])
+
+    if pending:
+        db.execute(insert(models.Posting), pending)
+    db.commit()
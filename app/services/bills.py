@@ -0,0 +1,288 @@
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+from typing import NamedTuple, Optional
+from datetime import date, datetime, time
+import calendar
+import heapq
+import logging
+import threading
+from .. import metrics, models
+from ..config import settings
+from ..database import shards
+from ..tenancy import DEFAULT_TENANT, UnknownTenant, tenant_of
+from . import ledger
+
+logger = logging.getLogger(__name__)
+
+# Kalender Tagihan (FITUR.MD bagian 5).
+# Setiap tagihan menyimpan next_due_date (jatuh tempo berikutnya yang belum dibayar),
+# di-index bersama is_active, jadi "total kewajiban bulan ini" & "tagihan yang jatuh tempo"
+# cukup range scan index. Tagihan auto-post dijadwalkan di heap (jatuh tempo terdekat di atas);
+# thread scheduler tidur sampai item teratas jatuh tempo, lalu mencatat semua tagihan
+# yang jatuh tempo dalam satu commit.
+
+class BillStatus(NamedTuple):
+    id: int
+    name: str
+    amount: float
+    day_of_month: int
+    next_due_date: date
+    days_left: int
+    paid: bool # Ada pembayaran tercatat bulan ini & tidak ada jatuh tempo tersisa bulan ini
+    alert: bool # Belum dibayar & jatuh tempo <= H-BILL_ALERT_DAYS (atau sudah lewat)
+    auto_post: bool
+    category_name: str
+    wallet_name: str
+
+
+def due_in_month(year: int, month: int, day_of_month: int) -> date:
+    # Tanggal 31 di bulan 30 hari / Februari dipotong ke hari terakhir bulan itu
+    return date(year, month, min(day_of_month, calendar.monthrange(year, month)[1]))
+
+def next_month_due(due: date, day_of_month: int) -> date:
+    year, month = (due.year + 1, 1) if due.month == 12 else (due.year, due.month + 1)
+    return due_in_month(year, month, day_of_month)
+
+def first_due(today: date, day_of_month: int) -> date:
+    # Jatuh tempo pertama untuk tagihan baru: bulan ini jika belum lewat, selain itu bulan depan
+    due = due_in_month(today.year, today.month, day_of_month)
+    return due if due >= today else next_month_due(due, day_of_month)
+
+def end_of_month(today: date) -> date:
+    return due_in_month(today.year, today.month, 31)
+
+def paid_this_month(bill: models.RecurringBill, today: date) -> bool:
+    # Berdasarkan pembayaran yang benar-benar dicatat (last_paid_date), bukan jatuh tempo saja:
+    # tagihan baru yang jatuh tempo pertamanya bulan depan belum pernah dibayar
+    month_end = end_of_month(today)
+    return (
+        bill.last_paid_date is not None
+        and today.replace(day=1) <= bill.last_paid_date <= month_end
+        and bill.next_due_date > month_end
+    )
+
+def pending_total_select(today: date):
+    # Belum dibayar sampai akhir bulan ini (termasuk yang terlambat): range scan ix_recurring_bills_active_due
+    return select(func.coalesce(func.sum(models.RecurringBill.amount), 0.0)).where(
+        models.RecurringBill.is_active == 1,
+        models.RecurringBill.next_due_date <= end_of_month(today)
+    )
+
+def pending_total(db: Session, today: date = None) -> float:
+    """
+    Total Kewajiban Tertunda: uang yang harus disisihkan untuk tagihan sisa bulan ini.
+    """
+    return db.execute(pending_total_select(today or date.today())).scalar()
+
+def bill_statuses(db: Session, today: date = None):
+    today = today or date.today()
+    rows = db.query(
+        models.RecurringBill, models.Category.name, models.Wallet.name
+    ).join(
+        models.Category, models.Category.id == models.RecurringBill.category_id
+    ).join(
+        models.Wallet, models.Wallet.id == models.RecurringBill.wallet_id
+    ).filter(
+        models.RecurringBill.is_active == 1
+    ).order_by(models.RecurringBill.next_due_date)
+
+    statuses = []
+    for bill, category_name, wallet_name in rows:
+        days_left = (bill.next_due_date - today).days
+        paid = paid_this_month(bill, today)
+        statuses.append(BillStatus(
+            bill.id, bill.name, bill.amount, bill.day_of_month, bill.next_due_date, days_left,
+            paid, not paid and days_left <= settings.BILL_ALERT_DAYS, bool(bill.auto_post),
+            category_name, wallet_name
+        ))
+    return statuses
+
+def _post_occurrence(db: Session, bill: models.RecurringBill, tx_date: date):
+    # Catat 1 pembayaran (transaksi pengeluaran biasa) lalu majukan jatuh tempo 1 bulan
+    cat_type = ledger.category_type(db, bill.category_id)
+    ledger.post_transaction(
+        db, tx_date, bill.amount, f"Tagihan: {bill.name}", bill.wallet_id, bill.category_id,
+        balance_delta=ledger.balance_delta(cat_type, bill.amount)
+    )
+    bill.last_paid_date = tx_date
+    bill.next_due_date = next_month_due(bill.next_due_date, bill.day_of_month)
+
+def pay_bill(db: Session, bill_id: int, pay_date: date = None) -> Optional[date]:
+    """
+    Bayar tagihan jatuh tempo berikutnya (manual). Return jatuh tempo baru, None jika tagihan tidak ada.
+    """
+    bill = db.get(models.RecurringBill, bill_id)
+    if bill is None or not bill.is_active:
+        return None
+    _post_occurrence(db, bill, pay_date or date.today())
+    db.commit()
+    scheduler.schedule(db, bill)
+    return bill.next_due_date
+
+def post_due_bills(db: Session, today: date = None):
+    """
+    Catat semua tagihan auto-post yang sudah jatuh tempo (termasuk bulan yang terlewat
+    saat aplikasi mati) dalam satu commit. Return {bill_id: jatuh tempo baru}.
+    """
+    today = today or date.today()
+    bills = db.query(models.RecurringBill).filter(
+        models.RecurringBill.is_active == 1,
+        models.RecurringBill.next_due_date <= today,
+        models.RecurringBill.auto_post == 1
+    ).all()
+
+    posted = 0
+    for bill in bills:
+        while bill.next_due_date <= today:
+            # Tanggal transaksi = tanggal jatuh tempo (bukan tanggal scheduler bangun)
+            _post_occurrence(db, bill, bill.next_due_date)
+            posted += 1
+    new_dues = {bill.id: bill.next_due_date for bill in bills}
+    if posted:
+        db.commit()
+        logger.info(f"{posted} tagihan otomatis dicatat ({len(bills)} tagihan)")
+    return new_dues
+
+
+class BillScheduler:
+    """
+    Heap (jatuh tempo, keluarga, bill_id) untuk tagihan auto-post semua shard. Thread tidur
+    sampai jatuh tempo teratas (Condition.wait dengan timeout), tanpa polling berkala.
+    Perubahan tagihan memanggil schedule() yang membangunkan thread agar menghitung ulang
+    waktu tidur. Entri lama tidak dihapus dari heap, cukup diabaikan jika tidak cocok dengan _due.
+    Tagihan keluarga dimuat saat shard-nya pertama kali dibuka (load); jatuh tempo yang
+    terlewat sebelum itu tetap tercatat karena post_due_bills mengejar bulan yang tertinggal.
+    """
+
+    RETRY_SECONDS = 300
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory # tenant -> Session
+        self._heap = []
+        self._due = {} # (keluarga, bill_id) -> jatuh tempo terjadwal
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        self.runs = 0
+
+    def load(self, db: Session):
+        # Ganti jadwal satu keluarga (shard milik session db) dengan isi tabelnya
+        tenant = tenant_of(db)
+        rows = db.execute(select(models.RecurringBill.id, models.RecurringBill.next_due_date).where(
+            models.RecurringBill.is_active == 1, models.RecurringBill.auto_post == 1
+        )).all()
+        with self._cond:
+            self._due = {key: due for key, due in self._due.items() if key[0] != tenant}
+            for bill_id, due in rows:
+                self._due[(tenant, bill_id)] = due
+                heapq.heappush(self._heap, (due, tenant, bill_id))
+            self._cond.notify()
+
+    def schedule(self, db: Session, bill: models.RecurringBill):
+        # Panggil SETELAH commit yang mengubah tagihan (baru, dibayar, diubah, dihapus)
+        key = (tenant_of(db), bill.id)
+        with self._cond:
+            if bill.is_active and bill.auto_post:
+                self._due[key] = bill.next_due_date
+                heapq.heappush(self._heap, (bill.next_due_date, *key))
+            else:
+                self._due.pop(key, None)
+            self._cond.notify()
+
+    def next_due(self):
+        with self._cond:
+            return self._peek()
+
+    def _peek(self):
+        while self._heap:
+            due, tenant, bill_id = self._heap[0]
+            if self._due.get((tenant, bill_id)) == due:
+                return due
+            heapq.heappop(self._heap) # Entri basi
+        return None
+
+    @staticmethod
+    def fire_time(due: date) -> datetime:
+        return datetime.combine(due, time(hour=settings.BILL_AUTOPOST_HOUR))
+
+    def start(self):
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="bill-scheduler", daemon=True)
+        with self.session_factory(DEFAULT_TENANT) as db:
+            self.load(db)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def _wait_until_due(self) -> bool:
+        with self._cond:
+            while not self._stopped:
+                due = self._peek()
+                if due is None:
+                    self._cond.wait()
+                    continue
+                delay = (self.fire_time(due) - datetime.now()).total_seconds()
+                if delay <= 0:
+                    return True
+                self._cond.wait(timeout=delay)
+            return False
+
+    def _due_tenants(self, today: date):
+        with self._cond:
+            return {tenant for (tenant, _), due in self._due.items() if due <= today}
+
+    def _post_tenant(self, tenant: str, today: date):
+        try:
+            db = self.session_factory(tenant)
+        except UnknownTenant:
+            new_dues = {} # Database keluarga sudah tidak ada: semua jadwalnya dilepas
+        else:
+            try:
+                new_dues = post_due_bills(db, today)
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+
+        with self._cond:
+            for bill_id, due in new_dues.items():
+                self._due[(tenant, bill_id)] = due
+                heapq.heappush(self._heap, (due, tenant, bill_id))
+            # Jatuh tempo yang tidak ikut tercatat (tagihan dihapus / auto-post dimatikan): lepas dari jadwal
+            for key, due in list(self._due.items()):
+                if key[0] == tenant and due <= today and key[1] not in new_dues:
+                    del self._due[key]
+
+    def _run(self):
+        while self._wait_until_due():
+            today = date.today()
+            failed = False
+            for tenant in self._due_tenants(today):
+                try:
+                    with metrics.scheduler_job_seconds.time(job="bill_autopost"):
+                        self._post_tenant(tenant, today)
+                except Exception as e:
+                    failed = True
+                    metrics.scheduler_job_failures.inc(job="bill_autopost")
+                    logger.error(f"Auto-post tagihan keluarga {tenant} gagal: {e}")
+            with self._cond:
+                self.runs += 1
+                if failed:
+                    self._cond.wait(timeout=self.RETRY_SECONDS)
+
+
+scheduler = BillScheduler(shards.session)
+
+def start_bill_scheduler():
+    if settings.BILL_AUTOPOST_ENABLED:
+        scheduler.start()
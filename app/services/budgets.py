@@ -0,0 +1,216 @@
+from sqlalchemy import select, update, func
+from sqlalchemy.orm import Session
+from typing import NamedTuple, Optional
+from collections import defaultdict
+import logging
+from .. import models
+from . import rollup
+
+logger = logging.getLogger(__name__)
+
+# Budget per kategori per bulan.
+# Kolom `spent` adalah counter yang ditambah di transaksi DB yang sama dengan insert
+# transaksinya (seperti rollup), jadi status budget di Dashboard cukup membaca tabel
+# budgets (O(jumlah budget)) tanpa menjumlah transaksi.
+# Ambang mengikuti warna Runway di FITUR.MD: < 50% Aman, 50-80% Waspada, > 80% Bahaya.
+# Saat counter melewati ambang, dicatat satu BudgetEvent (sekali per ambang per bulan).
+
+THRESHOLDS = (50, 80)
+LEVEL_STYLES = {
+    0: ("Aman", "🟢", "bg-green-400"),
+    50: ("Waspada", "🟡", "bg-yellow-400"),
+    80: ("Bahaya", "🔴", "bg-red-400"),
+}
+
+class BudgetStatus(NamedTuple):
+    id: int
+    category_id: int
+    name: str
+    icon: Optional[str]
+    month_period: str
+    amount_limit: float
+    spent: float
+    remaining: float
+    percent: float
+    level: int # 0 / 50 / 80
+    label: str
+    emoji: str
+    color: str
+
+
+def alert_level(spent: float, amount_limit: float) -> int:
+    # Ambang tertinggi yang sudah dilewati (persen terpakai >= ambang)
+    if not amount_limit or amount_limit <= 0:
+        return 0
+    percent = spent / amount_limit * 100
+    level = 0
+    for threshold in THRESHOLDS:
+        if percent >= threshold:
+            level = threshold
+    return level
+
+def _record_crossings(db: Session, rows):
+    # rows: (budget_id, category_id, month_period, spent, amount_limit, alert_level lama)
+    for budget_id, category_id, month_period, spent, amount_limit, old_level in rows:
+        new_level = alert_level(spent, amount_limit)
+        if new_level == (old_level or 0):
+            continue
+        db.execute(update(models.Budget).where(models.Budget.id == budget_id).values(alert_level=new_level))
+        if new_level > (old_level or 0):
+            # Hanya ambang yang baru dilewati (50 lalu 80 bisa terlewati sekaligus)
+            for threshold in THRESHOLDS:
+                if (old_level or 0) < threshold <= new_level:
+                    db.add(models.BudgetEvent(
+                        budget_id=budget_id, category_id=category_id, month_period=month_period,
+                        threshold=threshold, spent=spent, amount_limit=amount_limit
+                    ))
+                    logger.info(f"Budget kategori {category_id} ({month_period}) melewati {threshold}%")
+
+def add_spending(db: Session, groups):
+    """
+    Tambahkan nominal ke counter budget: groups = {(bulan, category_id): total}.
+    Satu UPDATE ... RETURNING per kelompok; kategori tanpa budget tidak mengubah apa pun.
+    Tidak melakukan commit.
+    """
+    crossed = []
+    for (month_period, category_id), amount in groups.items():
+        row = db.execute(
+            update(models.Budget)
+            .where(models.Budget.category_id == category_id, models.Budget.month_period == month_period)
+            .values(spent=func.coalesce(models.Budget.spent, 0.0) + amount)
+            .returning(
+                models.Budget.id, models.Budget.category_id, models.Budget.month_period,
+                models.Budget.spent, models.Budget.amount_limit, models.Budget.alert_level
+            )
+        ).first()
+        if row is not None:
+            crossed.append(tuple(row))
+    _record_crossings(db, crossed)
+
+def record_transaction(db: Session, tx_date, category_id: int, amount: float):
+    add_spending(db, {(rollup.month_key(tx_date), category_id): amount})
+
+def record_transactions(db: Session, rows):
+    # Versi batch (import): rows berisi dict date/category_id/amount
+    groups = defaultdict(float)
+    for row in rows:
+        groups[(rollup.month_key(row["date"]), row["category_id"])] += row["amount"]
+    add_spending(db, groups)
+
+def _spent_from_rollups(db: Session, category_id: int, month_period: str) -> float:
+    return db.execute(
+        select(func.coalesce(func.sum(models.MonthlyRollup.total_amount), 0.0)).where(
+            models.MonthlyRollup.category_id == category_id,
+            models.MonthlyRollup.month_period == month_period
+        )
+    ).scalar()
+
+def rebuild_spent(db: Session):
+    """
+    Hitung ulang counter semua budget dari rollup bulanan (migrasi, rebuild-rollups, reset data).
+    Level alert disesuaikan tanpa membuat event baru. Tidak melakukan commit.
+    """
+    spent = (
+        select(func.coalesce(func.sum(models.MonthlyRollup.total_amount), 0.0))
+        .where(
+            models.MonthlyRollup.category_id == models.Budget.category_id,
+            models.MonthlyRollup.month_period == models.Budget.month_period
+        )
+        .scalar_subquery()
+    )
+    db.execute(update(models.Budget).values(spent=spent))
+    for budget in db.query(models.Budget):
+        budget.alert_level = alert_level(budget.spent, budget.amount_limit)
+    db.flush()
+
+def set_budget(db: Session, category_id: int, month_period: str, amount_limit: float) -> models.Budget:
+    """
+    Buat atau ubah limit budget kategori untuk satu bulan (counter diisi dari rollup).
+    """
+    budget = db.query(models.Budget).filter(
+        models.Budget.category_id == category_id, models.Budget.month_period == month_period
+    ).first()
+    if budget is None:
+        budget = models.Budget(
+            category_id=category_id, month_period=month_period,
+            spent=_spent_from_rollups(db, category_id, month_period)
+        )
+        db.add(budget)
+    budget.amount_limit = amount_limit
+    # Limit berubah: level disesuaikan dengan kondisi sekarang, event hanya dari transaksi baru
+    budget.alert_level = alert_level(budget.spent or 0.0, amount_limit)
+    db.commit()
+    return budget
+
+def delete_budget(db: Session, budget_id: int) -> bool:
+    budget = db.get(models.Budget, budget_id)
+    if budget is None:
+        return False
+    db.query(models.BudgetEvent).filter(models.BudgetEvent.budget_id == budget_id).delete()
+    db.delete(budget)
+    db.commit()
+    return True
+
+def copy_budgets(db: Session, from_month: str, to_month: str) -> int:
+    """
+    Salin limit budget bulan sebelumnya ke bulan baru (kategori yang belum punya budget).
+    Return jumlah budget yang dibuat.
+    """
+    existing = {cid for (cid,) in db.query(models.Budget.category_id).filter(models.Budget.month_period == to_month)}
+    created = 0
+    for category_id, amount_limit in db.query(models.Budget.category_id, models.Budget.amount_limit).filter(
+        models.Budget.month_period == from_month
+    ):
+        if category_id in existing:
+            continue
+        spent = _spent_from_rollups(db, category_id, to_month)
+        db.add(models.Budget(
+            category_id=category_id, month_period=to_month, amount_limit=amount_limit,
+            spent=spent, alert_level=alert_level(spent, amount_limit)
+        ))
+        created += 1
+    db.commit()
+    return created
+
+def budget_status(db: Session, month_period: str):
+    """
+    Status semua budget satu bulan dari counter (tanpa agregasi transaksi), urut dari persen terbesar.
+    """
+    rows = db.execute(
+        select(
+            models.Budget.id, models.Budget.category_id, models.Category.name, models.Category.icon,
+            models.Budget.month_period, models.Budget.amount_limit, models.Budget.spent
+        )
+        .join(models.Category, models.Category.id == models.Budget.category_id)
+        .where(models.Budget.month_period == month_period)
+    ).all()
+
+    statuses = []
+    for budget_id, category_id, name, icon, month, amount_limit, spent in rows:
+        amount_limit = amount_limit or 0.0
+        spent = spent or 0.0
+        percent = spent / amount_limit * 100 if amount_limit > 0 else 0.0
+        level = alert_level(spent, amount_limit)
+        label, emoji, color = LEVEL_STYLES[level]
+        statuses.append(BudgetStatus(
+            budget_id, category_id, name, icon, month, amount_limit, spent,
+            amount_limit - spent, percent, level, label, emoji, color
+        ))
+    return sorted(statuses, key=lambda s: s.percent, reverse=True)
+
+def recent_events(db: Session, limit: int = 10, unread_only: bool = False):
+    query = db.query(
+        models.BudgetEvent.id, models.BudgetEvent.threshold, models.BudgetEvent.spent,
+        models.BudgetEvent.amount_limit, models.BudgetEvent.month_period, models.BudgetEvent.is_read,
+        models.BudgetEvent.created_at, models.Category.name.label("category_name")
+    ).join(models.Category, models.Category.id == models.BudgetEvent.category_id)
+    if unread_only:
+        query = query.filter(models.BudgetEvent.is_read == 0)
+    return query.order_by(models.BudgetEvent.id.desc()).limit(limit).all()
+
+def unread_event_count(db: Session) -> int:
+    return db.query(func.count(models.BudgetEvent.id)).filter(models.BudgetEvent.is_read == 0).scalar()
+
+def mark_events_read(db: Session):
+    db.query(models.BudgetEvent).filter(models.BudgetEvent.is_read == 0).update({"is_read": 1})
+    db.commit()
@@ -0,0 +1,67 @@
+from sqlalchemy import event, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from .. import models
+
+# Versi data global yang selalu naik (monoton).
+# Setiap commit yang mengubah data (ORM flush maupun INSERT/UPDATE/DELETE lewat session.execute)
+# otomatis menaikkan versi di transaksi yang sama, jadi tidak ada jalur tulis yang terlewat.
+# Disimpan di database agar konsisten walau aplikasi jalan di beberapa proses.
+
+_SKIP = "skip_data_version"
+
+# Tabel yang bukan data keuangan: menulis ke sini tidak membuat cache halaman kedaluwarsa
+# (mis. menyimpan saran AI tidak boleh mengosongkan cache ETag, tren, goal & refdata)
+UNVERSIONED_TABLES = frozenset({models.AIAdvice.__tablename__})
+
+def _versioned(objects) -> bool:
+    return any(getattr(obj, "__tablename__", None) not in UNVERSIONED_TABLES for obj in objects)
+
+def _statement_table(orm_execute_state):
+    mapper = orm_execute_state.bind_mapper
+    return mapper.local_table.name if mapper is not None else None
+
+def _bump_stmt():
+    stmt = sqlite_insert(models.LedgerVersion).values(id=1, version=1)
+    return stmt.on_conflict_do_update(
+        index_elements=[models.LedgerVersion.id],
+        set_={"version": models.LedgerVersion.version + 1}
+    ).execution_options(**{_SKIP: True})
+
+def bump(db: Session):
+    """
+    Naikkan versi tanpa mengubah data (semua cache per versi jadi kedaluwarsa). Tidak commit.
+    """
+    db.execute(_bump_stmt())
+
+def current(db: Session) -> int:
+    return db.execute(select(models.LedgerVersion.version).where(models.LedgerVersion.id == 1)).scalar() or 0
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_dml(orm_execute_state):
+    if orm_execute_state.is_select or orm_execute_state.execution_options.get(_SKIP):
+        return
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        if _statement_table(orm_execute_state) not in UNVERSIONED_TABLES:
+            orm_execute_state.session.info["data_dirty"] = True
+
+@event.listens_for(Session, "before_flush")
+def _mark_flush(session, flush_context, instances):
+    if _versioned(session.new) or _versioned(session.dirty) or _versioned(session.deleted):
+        session.info["data_dirty"] = True
+
+@event.listens_for(Session, "before_commit")
+def _bump_on_commit(session):
+    dirty = session.info.pop("data_dirty", False)
+    if dirty or _versioned(session.new) or _versioned(session.dirty) or _versioned(session.deleted):
+        session.execute(_bump_stmt())
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session):
+    session.info.pop("data_dirty", None)
+
+@event.listens_for(Session, "after_commit")
+def _clear(session):
+    # Flush di dalam commit (setelah before_commit) menandai data_dirty lagi; versinya sudah
+    # dinaikkan di commit ini, jadi tanda itu dibuang agar commit berikutnya tidak ikut bump
+    session.info.pop("data_dirty", None)
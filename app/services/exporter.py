@@ -0,0 +1,119 @@
+from sqlalchemy.orm import Session
+from datetime import date
+import csv
+import io
+from .. import queries
+
+# Export ledger (CSV / Parquet) secara streaming.
+# Baris dibaca lewat server-side cursor dan dikirim per chunk,
+# jadi memori tetap datar berapapun jumlah transaksi.
+
+EXPORT_COLUMNS = [
+    "id", "date", "amount", "description",
+    "wallet_id", "wallet_name",
+    "category_id", "category_name", "category_type", "priority_group",
+]
+
+def _record(tx: queries.TransactionRow):
+    return (
+        tx.id,
+        tx.date.isoformat() if tx.date else None,
+        tx.amount,
+        tx.description,
+        tx.wallet_id,
+        tx.wallet_name,
+        tx.category_id,
+        tx.category_name,
+        tx.category_type.value if tx.category_type else None,
+        tx.priority_group.value if tx.priority_group else None,
+    )
+
+def _chunks(rows, chunk_rows: int):
+    chunk = []
+    for tx in rows:
+        chunk.append(_record(tx))
+        if len(chunk) >= chunk_rows:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def csv_chunks(rows, chunk_rows: int = 2000):
+    """
+    Generator bytes CSV (UTF-8 dengan BOM agar langsung terbaca di Excel).
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+
+    for chunk in _chunks(rows, chunk_rows):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _StreamSink(io.RawIOBase):
+    """
+    File tujuan ParquetWriter yang hanya menampung bytes sampai diambil (drain).
+    """
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+def parquet_chunks(rows, chunk_rows: int = 10000):
+    """
+    Generator bytes Parquet, satu row group per chunk.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("date", pa.string()),
+        ("amount", pa.float64()),
+        ("description", pa.string()),
+        ("wallet_id", pa.int64()),
+        ("wallet_name", pa.string()),
+        ("category_id", pa.int64()),
+        ("category_name", pa.string()),
+        ("category_type", pa.string()),
+        ("priority_group", pa.string()),
+    ])
+    sink = _StreamSink()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    try:
+        for chunk in _chunks(rows, chunk_rows):
+            columns = list(zip(*chunk))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(col, type=field.type) for col, field in zip(columns, schema)],
+                schema=schema
+            ))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+def export_rows(db: Session, start_date: date, end_date: date, wallet_id: int = None, category_id: int = None):
+    return queries.iter_export_rows(db, start_date, end_date, wallet_id, category_id)
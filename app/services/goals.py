@@ -0,0 +1,187 @@
+from collections import OrderedDict
+from sqlalchemy.orm import Session
+from typing import NamedTuple, Optional
+from datetime import date
+import threading
+import numpy as np
+import pandas as pd
+from .. import models
+from ..config import settings
+from . import data_version, rollup
+from ..tenancy import tenant_of
+
+# Proyeksi "Kapan goal tercapai?" secara lokal (pengganti Simulasi Kilat di prompt AI).
+# Income & expense bulanan diambil dari riwayat rollup (turunan tabel transaksi),
+# lalu disimulasikan Monte Carlo: GOAL_SIMULATIONS skenario x GOAL_HORIZON_MONTHS bulan
+# dalam satu matriks NumPy (tanpa loop per skenario).
+# Goal diisi berurutan sesuai priority dari satu pos tabungan bersama:
+# goal ke-k tercapai saat tabungan >= total target goal 1..k.
+# RNG memakai seed tetap, jadi input yang sama selalu memberi angka yang sama.
+
+PERCENTILES = (10, 50, 90)
+SEED = 20240101
+
+class CashflowHistory(NamedTuple):
+    months: int # Jumlah bulan riwayat yang dipakai
+    income_mean: float
+    income_std: float
+    expense_mean: float
+    expense_std: float
+
+class GoalProjection(NamedTuple):
+    goal_id: int
+    name: str
+    target: float
+    saved: float
+    remaining: float # Sisa target setelah tabungan dibagi ke goal prioritas lebih tinggi
+    probability: float # Peluang tercapai dalam horizon (0-1)
+    months: tuple # Bulan dari sekarang per persentil (None = lewat horizon)
+    dates: tuple # Bulan tercapai per persentil (tanggal 1), None = lewat horizon
+
+
+def month_offset(start: date, months: int) -> date:
+    index = start.year * 12 + start.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def cashflow_history(db: Session, today: date = None, months: int = None) -> Optional[CashflowHistory]:
+    """
+    Statistik income & expense bulanan dari bulan-bulan lengkap terakhir
+    (bulan berjalan hanya dipakai jika belum ada riwayat lain). None jika belum ada data.
+    """
+    today = today or date.today()
+    months = months or settings.GOAL_HISTORY_MONTHS
+    current = rollup.month_key(today)
+    first = rollup.month_key(month_offset(today, -months))
+    rows = db.execute(rollup.month_type_totals_select(first, current)).all()
+    if not rows:
+        return None
+
+    frame = pd.DataFrame(rows, columns=["month_period", "category_type", "total"])
+    frame = frame[frame["category_type"].isin([models.TransactionType.INCOME, models.TransactionType.EXPENSE])]
+    matrix = frame.pivot_table(
+        index="month_period", columns="category_type", values="total", aggfunc="sum", fill_value=0.0
+    ).reindex(columns=[models.TransactionType.INCOME, models.TransactionType.EXPENSE], fill_value=0.0)
+    if matrix.empty:
+        return None
+
+    complete = matrix[matrix.index < current]
+    if not complete.empty:
+        # Bulan kosong di tengah riwayat dihitung 0 (mulai dari bulan pertama yang tercatat)
+        periods = [p.strftime("%Y-%m") for p in pd.period_range(complete.index[0], complete.index[-1], freq="M")]
+        matrix = complete.reindex(periods, fill_value=0.0)
+
+    values = matrix.to_numpy(dtype=float)
+    ddof = 1 if len(values) > 1 else 0
+    return CashflowHistory(
+        months=len(values),
+        income_mean=float(values[:, 0].mean()),
+        income_std=float(values[:, 0].std(ddof=ddof)),
+        expense_mean=float(values[:, 1].mean()),
+        expense_std=float(values[:, 1].std(ddof=ddof)),
+    )
+
+def simulate_reach_months(history: CashflowHistory, starting_savings: float, cumulative_targets,
+                          simulations: int, horizon: int, seed: int = SEED):
+    """
+    Matriks (simulasi x goal): bulan ke berapa tabungan pertama kali mencapai target kumulatif.
+    0 = sudah tercapai, horizon + 1 = tidak tercapai dalam horizon.
+    """
+    rng = np.random.default_rng(seed)
+    income = np.clip(rng.normal(history.income_mean, history.income_std, (simulations, horizon)), 0, None)
+    expense = np.clip(rng.normal(history.expense_mean, history.expense_std, (simulations, horizon)), 0, None)
+    savings = starting_savings + np.cumsum(income - expense, axis=1) # (simulasi, bulan)
+
+    targets = np.asarray(cumulative_targets, dtype=float)
+    reached = savings[:, :, None] >= targets[None, None, :] # (simulasi, bulan, goal)
+    hit = reached.any(axis=1)
+    first_month = reached.argmax(axis=1) + 1
+    months = np.where(hit, first_month, horizon + 1)
+    return np.where(targets[None, :] <= starting_savings, 0, months)
+
+def project(goals, history: CashflowHistory, today: date, simulations: int, horizon: int):
+    # goals: list Goal (aktif) urut priority
+    if not goals:
+        return []
+    targets = np.array([g.target_amount or 0.0 for g in goals])
+    starting = float(sum(g.saved_amount or 0.0 for g in goals))
+    cumulative = np.cumsum(targets)
+
+    if history is None:
+        months = np.where(cumulative[None, :] <= starting, 0, horizon + 1)
+    else:
+        months = simulate_reach_months(history, starting, cumulative, simulations, horizon)
+
+    probability = (months <= horizon).mean(axis=0)
+    quantiles = np.quantile(months, [p / 100 for p in PERCENTILES], axis=0, method="nearest")
+
+    projections = []
+    for i, goal in enumerate(goals):
+        month_values = tuple(int(m) if m <= horizon else None for m in quantiles[:, i])
+        funded_before = cumulative[i] - targets[i]
+        projections.append(GoalProjection(
+            goal_id=goal.id,
+            name=goal.name,
+            target=float(targets[i]),
+            saved=float(goal.saved_amount or 0.0),
+            remaining=float(max(0.0, cumulative[i] - max(starting, funded_before))),
+            probability=float(probability[i]),
+            months=month_values,
+            dates=tuple(month_offset(today, m) if m is not None else None for m in month_values),
+        ))
+    return projections
+
+
+_cache = OrderedDict() # (keluarga, bulan, versi data, simulasi, horizon) -> (history, projections)
+_cache_lock = threading.Lock()
+_CACHE_SIZE = 8
+
+def goal_projections(db: Session, today: date = None, simulations: int = None, horizon: int = None):
+    """
+    (CashflowHistory, [GoalProjection]) untuk semua goal aktif, di-cache per versi data.
+    """
+    today = today or date.today()
+    simulations = simulations or settings.GOAL_SIMULATIONS
+    horizon = horizon or settings.GOAL_HORIZON_MONTHS
+    key = (tenant_of(db), rollup.month_key(today), data_version.current(db), simulations, horizon)
+
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    goals = db.query(models.Goal).filter(models.Goal.is_active == 1).order_by(
+        models.Goal.priority, models.Goal.id
+    ).all()
+    history = cashflow_history(db, today)
+    result = (history, project(goals, history, today, simulations, horizon))
+
+    with _cache_lock:
+        _cache[key] = result
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
+
+def prompt_lines(history: Optional[CashflowHistory], projections, simulations: int = None):
+    """
+    Ringkasan proyeksi untuk prompt AI (angka sudah jadi, AI cukup menjelaskan).
+    """
+    if not projections:
+        return []
+    simulations = simulations or settings.GOAL_SIMULATIONS
+    lines = []
+    if history is not None:
+        lines.append(
+            f"Dasar: {history.months} bulan riwayat, rata-rata income Rp {history.income_mean:,.0f} "
+            f"(±{history.income_std:,.0f}), expense Rp {history.expense_mean:,.0f} (±{history.expense_std:,.0f}), "
+            f"{simulations:,} skenario Monte Carlo."
+        )
+    for p in projections:
+        if p.remaining <= 0:
+            lines.append(f"{p.name} (target Rp {p.target:,.0f}): sudah tercapai.")
+            continue
+        low, mid, high = (d.strftime("%b %Y") if d else "belum tercapai" for d in p.dates)
+        lines.append(
+            f"{p.name} (target Rp {p.target:,.0f}, kurang Rp {p.remaining:,.0f}): "
+            f"median {mid}, rentang P10-P90 {low} s/d {high}, peluang tercapai {p.probability:.0%}."
+        )
+    return lines
@@ -0,0 +1,30 @@
+from PIL import Image, ImageOps
+import os
+
+# Pengolahan foto struk, dijalankan di process pool (lihat services/receipts.py).
+# Sengaja tidak meng-import modul app lain: worker proses "spawn" hanya memuat modul ini + Pillow.
+
+def _save_jpeg(image, path: str, quality: int):
+    # Tulis ke file sementara lalu rename: pembaca tidak pernah melihat file setengah jadi
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    image.save(tmp_path, "JPEG", quality=quality, optimize=True, progressive=True)
+    os.replace(tmp_path, path)
+
+def compress_receipt(source: str, full_path: str, thumb_path: str,
+                     max_side: int, quality: int, thumb_side: int, thumb_quality: int):
+    """
+    Foto asli -> JPEG sisi terpanjang max_side + thumbnail thumb_side.
+    Orientasi EXIF diterapkan lalu metadata dibuang (lokasi GPS tidak ikut tersimpan).
+    Return (ukuran file hasil, ukuran thumbnail) dalam bytes.
+    """
+    with Image.open(source) as original:
+        original.draft("RGB", (max_side, max_side)) # JPEG besar: decode langsung di skala kecil
+        image = ImageOps.exif_transpose(original)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+
+    image.thumbnail((max_side, max_side), Image.LANCZOS)
+    _save_jpeg(image, full_path, quality)
+    image.thumbnail((thumb_side, thumb_side), Image.LANCZOS)
+    _save_jpeg(image, thumb_path, thumb_quality)
+    return os.path.getsize(full_path), os.path.getsize(thumb_path)
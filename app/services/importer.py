@@ -0,0 +1,429 @@
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from collections import defaultdict
+import json
+import logging
+import os
+import re
+import uuid
+import pandas as pd
+from .. import models
+from ..config import settings
+from . import balances, budgets, leaks, ledger, rollup
+from .ledger import transaction_hash
+
+logger = logging.getLogger(__name__)
+
+# Import mutasi bank (CSV / OFX) dalam batch.
+# File dibaca bertahap (chunk), dipetakan ke Dompet & Kategori lewat rules,
+# di-dedupe dengan hash (tanggal, nominal, deskripsi), lalu di-insert dengan executemany.
+# Saldo dompet & rollup bulanan di-update sekali per batch, bukan per baris.
+
+DEFAULT_RULES = {
+    # Nama kolom yang dikenali (huruf kecil), kolom pertama yang ada di file dipakai
+    "columns": {
+        "date": ["date", "tanggal", "tgl", "transaction date"],
+        "amount": ["amount", "nominal", "jumlah", "mutasi"],
+        "debit": ["debit", "keluar", "withdrawal"],
+        "credit": ["credit", "kredit", "masuk", "deposit"],
+        "description": ["description", "keterangan", "deskripsi", "memo", "uraian"],
+        "wallet": ["wallet", "dompet", "account"],
+        "category": ["category", "kategori"],
+        # Arah mutasi untuk kolom nominal tanpa tanda (mis. "DB"/"CR", "D"/"K")
+        "direction": ["type", "tipe", "jenis", "d/k", "db/cr", "dk"],
+    },
+    "debit_markers": ["d", "db", "dr", "debit", "keluar"],
+    "credit_markers": ["k", "cr", "kredit", "credit", "masuk"],
+    # Keyword (regex, tidak case-sensitive) di deskripsi -> nama kategori
+    "categories": [
+        {"match": "gaji|salary|payroll", "category": "Gaji Bulanan"},
+        {"match": "thr|bonus", "category": "Bonus/THR"},
+        {"match": "kpr|angsuran rumah", "category": "KPR"},
+        {"match": "pln|listrik|token", "category": "Listrik"},
+        {"match": "indomaret|alfamart|superindo|hypermart|pasar", "category": "Belanja"},
+        {"match": "pertamina|shell|spbu|bensin|gojek|grab|krl|tol", "category": "Bensin/Transport"},
+        {"match": "telkomsel|indihome|xl|pulsa|internet", "category": "Pulsa/Internet"},
+        {"match": "kopi|coffee|starbucks|janji jiwa|kenangan", "category": "Jajan"},
+        {"match": "resto|restaurant|gofood|grabfood|shopeefood", "category": "Makan Luar"},
+        {"match": "netflix|spotify|youtube|disney", "category": "Langganan Digital"},
+    ],
+    "default_expense_category": "Belanja",
+    "default_income_category": "Gaji Bulanan",
+    # Nominal tanpa tanda, tanpa kolom arah, dan tidak cocok kategori / keyword: dianggap pengeluaran
+    "unsigned_default": "expense",
+    "dayfirst": True,
+    # None = pemisah ribuan & desimal ditebak per nilai ("1,250.00", "1.250.000,50", "1.250")
+    "thousands": None,
+    "decimal": None,
+}
+
+# Contoh baris gagal dibaca yang disimpan di ImportResult.errors
+MAX_ERRORS = 20
+
+def load_rules(path: str = None):
+    """
+    Rules default, ditimpa isi file JSON (IMPORT_RULES_PATH) jika ada.
+    """
+    rules = json.loads(json.dumps(DEFAULT_RULES))
+    path = path or settings.IMPORT_RULES_PATH
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            custom = json.load(f)
+        for key, value in custom.items():
+            if key == "columns":
+                rules["columns"].update(value)
+            else:
+                rules[key] = value
+    return rules
+
+class ImportResult:
+    # skipped: baris kosong / nominal 0 / tanpa dompet-kategori, invalid: tanggal atau nominal tidak terbaca
+    __slots__ = ("imported", "duplicates", "skipped", "invalid", "errors", "batches")
+
+    def __init__(self):
+        self.imported = 0
+        self.duplicates = 0
+        self.skipped = 0
+        self.invalid = 0
+        self.errors = []
+        self.batches = 0
+
+    def add_error(self, message: str):
+        self.invalid += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(message)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+# --- Reader: menghasilkan list record per chunk ---
+# Record: (tanggal, nominal, deskripsi, dompet, kategori, bertanda, error).
+# bertanda=False: nominal dari kolom tanpa tanda +/-, arah uang ditentukan saat import.
+# error: pesan jika tanggal / nominal tidak terbaca (baris dihitung invalid, bukan dilewati diam-diam).
+
+_NUMBER_JUNK = re.compile(r"[^\d,.\-+()]")
+
+def _split_separators(value: str):
+    # (ribuan, desimal) ditebak dari bentuk angka
+    last_dot, last_comma = value.rfind("."), value.rfind(",")
+    if last_dot >= 0 and last_comma >= 0:
+        return (",", ".") if last_dot > last_comma else (".", ",")
+    sep = "." if last_dot >= 0 else ","
+    parts = value.split(sep)
+    # "1.250.000" / "1,250" = ribuan, "12.5" / "1,50" = desimal
+    if len(parts) > 2 or len(parts[-1]) == 3:
+        return sep, None
+    return None, sep
+
+def parse_amount(text, thousands: str = None, decimal: str = None):
+    """
+    Nominal dari teks mutasi: "-1,250.00", "Rp 1.250.000,50", "(75.000)", "250000-".
+    Tanpa thousands/decimal, pemisah ditebak per nilai. None untuk teks kosong,
+    ValueError jika teks tidak bisa dibaca sebagai angka.
+    """
+    text = str(text).strip()
+    if not text:
+        return None
+    value = _NUMBER_JUNK.sub("", text)
+    negative = value.startswith("-") or value.endswith("-") or (value.startswith("(") and value.endswith(")"))
+    value = value.strip("+-()")
+    if not re.fullmatch(r"\d[\d,.]*", value):
+        raise ValueError(text)
+
+    if thousands is None and decimal is None:
+        thousands, decimal = _split_separators(value)
+    elif decimal is None:
+        decimal = "," if thousands == "." else "."
+    elif thousands is None:
+        thousands = "." if decimal == "," else ","
+    if thousands:
+        groups = value.split(decimal)[0].split(thousands) if decimal else value.split(thousands)
+        if any(len(group) != 3 for group in groups[1:]):
+            raise ValueError(text) # "1.2.3": bukan pengelompokan ribuan
+        value = value.replace(thousands, "")
+    if decimal and decimal != ".":
+        value = value.replace(decimal, ".")
+    number = float(value) # "1.2.3" dst. tetap ValueError
+    return -number if negative else number
+
+def _pick_column(columns, candidates):
+    lookup = {str(c).strip().lower(): c for c in columns}
+    for name in candidates:
+        if name in lookup:
+            return lookup[name]
+    return None
+
+def read_csv_chunks(source, rules, chunk_size: int):
+    reader = pd.read_csv(
+        source,
+        chunksize=chunk_size,
+        dtype=str,
+        keep_default_na=False,
+        skipinitialspace=True,
+    )
+    for chunk in reader:
+        cols = {key: _pick_column(chunk.columns, names) for key, names in rules["columns"].items()}
+        if cols["date"] is None or (cols["amount"] is None and cols["debit"] is None and cols["credit"] is None):
+            raise ValueError("Kolom tanggal / nominal tidak ditemukan di CSV")
+
+        dates = pd.to_datetime(chunk[cols["date"]], dayfirst=rules["dayfirst"], errors="coerce").dt.date
+        empty = pd.Series("", index=chunk.index)
+
+        def column(key):
+            return chunk[cols[key]] if cols[key] is not None else empty
+
+        def to_number(raw):
+            return parse_amount(raw, rules["thousands"], rules["decimal"])
+
+        debit_markers = {m.lower() for m in rules["debit_markers"]}
+        credit_markers = {m.lower() for m in rules["credit_markers"]}
+        records = []
+        for line, raw_date, tx_date, raw_amount, raw_debit, raw_credit, direction, description, wallet, category in zip(
+            chunk.index + 2, column("date"), dates, column("amount"), column("debit"), column("credit"),
+            column("direction"), column("description"), column("wallet"), column("category"),
+        ):
+            # Nomor baris di file (baris 1 = header)
+            if pd.isna(tx_date) and raw_date.strip():
+                records.append((None, None, description, wallet, category, True, f"baris {line}: tanggal '{raw_date}' tidak valid"))
+                continue
+            try:
+                if cols["amount"] is not None:
+                    amount = to_number(raw_amount)
+                    signed = amount is not None and amount < 0
+                    marker = direction.strip().lower()
+                    if amount is not None and marker in debit_markers:
+                        amount, signed = -abs(amount), True
+                    elif amount is not None and marker in credit_markers:
+                        amount, signed = abs(amount), True
+                else:
+                    # Format debit/kredit terpisah: debit = uang keluar
+                    debit, credit = to_number(raw_debit), to_number(raw_credit)
+                    amount = None if debit is None and credit is None else (credit or 0) - (debit or 0)
+                    signed = True
+            except ValueError as e:
+                records.append((None, None, description, wallet, category, True, f"baris {line}: nominal '{e}' tidak valid"))
+                continue
+            records.append((tx_date, amount, description, wallet, category, signed, None))
+
+        if cols["amount"] is not None and any(r[1] is not None and r[1] < 0 for r in records):
+            # Kolom nominal memakai tanda (ada nilai negatif): nilai positif berarti uang masuk
+            records = [r[:5] + (True,) + r[6:] for r in records]
+        yield records
+
+_OFX_TRANSACTION = re.compile(r"<STMTTRN>(.*?)</STMTTRN>", re.S | re.I)
+_OFX_FIELD = re.compile(r"<(\w+)>([^<\r\n]*)")
+
+def _ofx_record(block, number: int):
+    fields = {tag.upper(): value.strip() for tag, value in _OFX_FIELD.findall(block)}
+    description = " ".join(v for v in (fields.get("NAME"), fields.get("MEMO")) if v)
+    posted = fields.get("DTPOSTED", "")[:8]
+    try:
+        tx_date = pd.Timestamp(f"{posted[:4]}-{posted[4:6]}-{posted[6:8]}").date()
+    except ValueError:
+        return (None, None, description, "", "", True, f"transaksi {number}: tanggal '{posted}' tidak valid")
+    try:
+        # TRNAMT OFX selalu bertanda (negatif = uang keluar), desimal titik atau koma
+        amount = parse_amount(fields.get("TRNAMT", "").replace(",", "."), thousands="")
+    except ValueError:
+        return (None, None, description, "", "", True, f"transaksi {number}: nominal '{fields.get('TRNAMT')}' tidak valid")
+    return (tx_date, amount, description, "", "", True, None)
+
+def read_ofx_chunks(source, chunk_size: int, read_size: int = 64 * 1024):
+    # OFX (SGML/XML) dibaca per blok, hanya <STMTTRN> yang sudah lengkap yang diproses
+    buffer = ""
+    records = []
+    number = 0
+    while True:
+        data = source.read(read_size)
+        if isinstance(data, bytes):
+            data = data.decode("utf-8", errors="replace")
+        if data:
+            buffer += data
+        last_end = 0
+        for match in _OFX_TRANSACTION.finditer(buffer):
+            number += 1
+            records.append(_ofx_record(match.group(1), number))
+            last_end = match.end()
+            if len(records) >= chunk_size:
+                yield records
+                records = []
+        buffer = buffer[last_end:]
+        if not data:
+            break
+    if records:
+        yield records
+
+
+# --- Writer ---
+
+class _Resolver:
+    """
+    Pemetaan nama dompet / kategori / keyword ke id, dimuat sekali per import.
+    """
+
+    def __init__(self, db: Session, rules, default_wallet_id):
+        self.default_wallet_id = default_wallet_id
+        self.wallets = {name.lower(): wid for wid, name in db.query(models.Wallet.id, models.Wallet.name)}
+        self.categories = {}
+        self.category_types = {}
+        for cid, name, cat_type in db.query(models.Category.id, models.Category.name, models.Category.category_type):
+            self.categories[name.lower()] = cid
+            self.category_types[cid] = cat_type
+
+        self.rules = []
+        for rule in rules["categories"]:
+            cid = self.categories.get(rule["category"].lower())
+            if cid is not None:
+                self.rules.append((re.compile(rule["match"], re.I), cid))
+        self.default_expense = self.categories.get(rules["default_expense_category"].lower())
+        self.default_income = self.categories.get(rules["default_income_category"].lower())
+        self.unsigned_expense = rules["unsigned_default"] != "income"
+
+    def wallet(self, name):
+        if name:
+            wid = self.wallets.get(str(name).strip().lower())
+            if wid is not None:
+                return wid
+        return self.default_wallet_id
+
+    def is_expense(self, name, description):
+        """
+        Arah uang untuk nominal tanpa tanda: tipe kategori di file, lalu keyword rules,
+        lalu rules["unsigned_default"].
+        """
+        if name:
+            cid = self.categories.get(str(name).strip().lower())
+            if cid is not None:
+                return self.category_types[cid] != models.TransactionType.INCOME
+        for pattern, cid in self.rules:
+            if pattern.search(description or ""):
+                return self.category_types[cid] != models.TransactionType.INCOME
+        return self.unsigned_expense
+
+    def category(self, name, description, is_expense: bool):
+        wanted = models.TransactionType.EXPENSE if is_expense else models.TransactionType.INCOME
+        if name:
+            cid = self.categories.get(str(name).strip().lower())
+            if cid is not None:
+                return cid
+        for pattern, cid in self.rules:
+            # Rule hanya berlaku jika tipe kategorinya sesuai arah uang
+            if self.category_types[cid] == wanted and pattern.search(description or ""):
+                return cid
+        return self.default_expense if is_expense else self.default_income
+
+
+def _existing_hashes(db: Session, hashes):
+    found = set()
+    hashes = list(hashes)
+    for i in range(0, len(hashes), 500):
+        part = hashes[i:i + 500]
+        found.update(h for (h,) in db.execute(
+            select(models.Transaction.import_hash).where(models.Transaction.import_hash.in_(part))
+        ))
+    return found
+
+def _apply_batch(db: Session, rows, resolver: _Resolver):
+    """
+    Insert satu batch (executemany) beserta jurnalnya, lalu update saldo & rollup sekali per kombinasi.
+    """
+    # Insert lewat Core table (tanpa overhead bulk ORM). RETURNING tanpa urutan
+    # tetap memakai multi-row VALUES; id dipetakan balik lewat import_hash.
+    tx_table = models.Transaction.__table__
+    tx_ids = dict((h, tx_id) for tx_id, h in db.execute(
+        insert(tx_table).returning(tx_table.c.id, tx_table.c.import_hash), rows
+    ))
+
+    postings = []
+    wallet_deltas = defaultdict(float)
+    for row in rows:
+        tx_id = tx_ids[row["import_hash"]]
+        cat_type = resolver.category_types[row["category_id"]]
+        delta = ledger.balance_delta(cat_type, row["amount"])
+        wallet_deltas[row["wallet_id"]] += delta
+        entry_id = uuid.uuid4().hex
+        for account_type, account_id, amount in (
+            ledger.wallet_leg(row["wallet_id"], delta),
+            (models.AccountType.CATEGORY, row["category_id"], -delta),
+        ):
+            postings.append({
+                "entry_id": entry_id, "transaction_id": tx_id, "date": row["date"],
+                "account_type": account_type, "account_id": account_id, "amount": amount,
+            })
+    db.execute(insert(models.Posting.__table__), postings)
+
+    for wallet_id, delta in wallet_deltas.items():
+        ledger.adjust_balance(db, wallet_id, delta)
+    balances.invalidate_checkpoints(db, wallet_deltas.keys(), min(row["date"] for row in rows))
+    balances.refresh_checkpoints(db, wallet_deltas.keys())
+    rollup.add_transactions_to_rollup(db, rows)
+    budgets.record_transactions(db, rows)
+    leaks.record_pending(db, [(row["category_id"], row["date"], row["amount"]) for row in rows])
+
+def import_statement(db: Session, source, file_format: str = "csv", wallet_id: int = None, rules=None, chunk_size: int = None):
+    """
+    Import file mutasi (file object / path). Setiap chunk di-commit terpisah.
+    Return ImportResult (jumlah baris masuk, duplikat, baris yang dilewati, dan baris
+    yang tanggal / nominalnya tidak terbaca beserta contoh pesannya).
+    """
+    rules = rules or load_rules()
+    chunk_size = chunk_size or settings.IMPORT_CHUNK_SIZE
+    resolver = _Resolver(db, rules, wallet_id)
+    result = ImportResult()
+
+    if file_format == "ofx":
+        if isinstance(source, str):
+            # Chunk dibaca lazy selama loop di bawah: file ditutup setelah import selesai
+            with open(source, "rb") as f:
+                return import_statement(db, f, file_format, wallet_id, rules, chunk_size)
+        chunks = read_ofx_chunks(source, chunk_size)
+    else:
+        chunks = read_csv_chunks(source, rules, chunk_size)
+
+    occurrences = defaultdict(int) # baris identik dalam file yang sama tetap dihitung terpisah
+    for records in chunks:
+        candidates = []
+        for tx_date, amount, description, wallet_name, category_name, signed, error in records:
+            if error:
+                result.add_error(error)
+                continue
+            if tx_date is None or pd.isna(tx_date) or amount is None or amount == 0:
+                result.skipped += 1
+                continue
+
+            is_expense = amount < 0 if signed else resolver.is_expense(category_name, description)
+            wid = resolver.wallet(wallet_name)
+            cid = resolver.category(category_name, description, is_expense)
+            if wid is None or cid is None:
+                result.skipped += 1
+                continue
+
+            description = description or None
+            base_key = (tx_date, abs(amount), (description or "").strip().lower())
+            occurrence = occurrences[base_key]
+            occurrences[base_key] += 1
+
+            candidates.append({
+                "date": tx_date,
+                "amount": abs(float(amount)),
+                "description": description,
+                "wallet_id": wid,
+                "category_id": cid,
+                "import_hash": transaction_hash(tx_date, abs(amount), description, occurrence),
+            })
+
+        existing = _existing_hashes(db, {row["import_hash"] for row in candidates})
+        rows = [row for row in candidates if row["import_hash"] not in existing]
+        result.duplicates += len(candidates) - len(rows)
+
+        if rows:
+            _apply_batch(db, rows, resolver)
+            db.commit()
+            result.imported += len(rows)
+        result.batches += 1
+
+    if result.invalid:
+        logger.warning(f"Import mutasi: {result.invalid} baris tidak terbaca, mis. {result.errors[0]}")
+    logger.info(f"Import mutasi selesai: {result.as_dict()}")
+    return result
@@ -0,0 +1,82 @@
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+import logging
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Pool background job untuk pekerjaan blocking (mis. panggilan Gemini)
+# agar tidak menahan event loop. Job dengan key yang sama yang masih berjalan
+# digabung (single-flight): pemanggil kedua mendapat job yang sama.
+
+class Job:
+    __slots__ = ("id", "key", "status", "result", "error")
+
+    def __init__(self, key: str):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = "pending" # pending -> running -> done / error
+        self.result = None
+        self.error = None
+
+    @property
+    def finished(self):
+        return self.status in ("done", "error")
+
+
+class JobPool:
+    def __init__(self, max_workers: int, name: str, keep_finished: int = 100):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._jobs = OrderedDict() # job_id -> Job (urut waktu submit)
+        self._inflight = {} # key -> Job yang belum selesai
+        self._lock = threading.Lock()
+        self._keep_finished = keep_finished
+
+    def submit(self, key: str, fn, *args):
+        """
+        Jalankan fn(*args) di background. Jika job dengan key sama masih berjalan,
+        kembalikan job tersebut (tidak membuat panggilan baru).
+        """
+        with self._lock:
+            job = self._inflight.get(key)
+            if job is not None:
+                return job
+
+            job = Job(key)
+            self._jobs[job.id] = job
+            self._inflight[key] = job
+            self._prune()
+
+        self._executor.submit(self._run, job, fn, args)
+        return job
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: Job, fn, args):
+        with self._lock:
+            job.status = "running"
+        status, result, error = "error", None, None
+        try:
+            result = fn(*args)
+            status = "done"
+        except Exception as e:
+            logger.exception(f"Job {job.key} gagal")
+            error = str(e)
+        finally:
+            # Hasil & status diset bersama di bawah lock: pembaca tidak pernah melihat
+            # status "done" dengan result yang belum terisi
+            with self._lock:
+                job.result = result
+                job.error = error
+                job.status = status
+                if self._inflight.get(job.key) is job:
+                    del self._inflight[job.key]
+
+    def _prune(self):
+        # Buang job lama yang sudah selesai agar dict tidak tumbuh terus
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self._keep_finished)]:
+            del self._jobs[job_id]
@@ -0,0 +1,191 @@
+from sqlalchemy import select, func, event
+from sqlalchemy.orm import Session
+from collections import defaultdict
+from typing import NamedTuple
+from datetime import date, timedelta
+import heapq
+import threading
+from .. import models
+from ..database import shards
+from ..tenancy import tenant_of
+
+# Deteksi "Bocor Alus": frekuensi & total pengeluaran per kategori dalam jendela 7/30/90 hari.
+# Counter disimpan di memori dan di-update per transaksi (setelah commit berhasil),
+# jadi halaman tidak perlu scan tabel transaksi. Bisa dibangun ulang kapan saja (rebuild).
+# Satu tracker per keluarga (shard), dibuang saat shard ditutup pool dan dibangun ulang saat dibaca.
+
+WINDOWS = (7, 30, 90)
+MAX_WINDOW = max(WINDOWS)
+# Kategori sistem (koreksi saldo opname) bukan pembelian, tidak dihitung sebagai bocor
+EXCLUDED_CATEGORIES = {"Koreksi Saldo"}
+
+class LeakStat(NamedTuple):
+    category_id: int
+    name: str
+    icon: str
+    count: int
+    total: float
+    window_days: int
+
+
+class LeakTracker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ready = False
+        self._today = None
+        self._categories = {} # category_id -> (nama, icon, priority_group)
+        self._ignored = set() # Kategori income / transfer / sistem
+        self._buckets = defaultdict(dict) # category_id -> {tanggal: [count, total]}
+        self._totals = {} # category_id -> {window: [count, total]}
+
+    def invalidate(self):
+        with self._lock:
+            self._ready = False
+
+    def rebuild(self, db: Session, today: date = None):
+        """
+        Bangun ulang counter dari tabel transaksi (1 query agregat per hari, MAX_WINDOW hari terakhir).
+        """
+        today = today or date.today()
+        categories = {}
+        ignored = set()
+        for cid, name, icon, group, cat_type in db.query(
+            models.Category.id, models.Category.name, models.Category.icon,
+            models.Category.priority_group, models.Category.category_type
+        ):
+            if cat_type == models.TransactionType.EXPENSE and name not in EXCLUDED_CATEGORIES:
+                categories[cid] = (name, icon, group)
+            else:
+                ignored.add(cid)
+        rows = db.execute(
+            select(
+                models.Transaction.category_id,
+                models.Transaction.date,
+                func.count(),
+                func.sum(models.Transaction.amount)
+            )
+            .where(
+                models.Transaction.category_id.in_(categories.keys()),
+                models.Transaction.date > today - timedelta(days=MAX_WINDOW)
+            )
+            .group_by(models.Transaction.category_id, models.Transaction.date)
+        ).all()
+
+        with self._lock:
+            self._categories = categories
+            self._ignored = ignored
+            self._buckets = defaultdict(dict)
+            self._totals = {cid: {w: [0, 0.0] for w in WINDOWS} for cid in categories}
+            self._today = today
+            for cid, tx_date, count, total in rows:
+                self._add(cid, tx_date, count, total or 0.0)
+            self._ready = True
+
+    def _add(self, category_id, tx_date, count, total):
+        bucket = self._buckets[category_id].setdefault(tx_date, [0, 0.0])
+        bucket[0] += count
+        bucket[1] += total
+        age = (self._today - tx_date).days
+        for window in WINDOWS:
+            if 0 <= age < window:
+                counter = self._totals[category_id][window]
+                counter[0] += count
+                counter[1] += total
+
+    def _advance(self, today: date):
+        # Geser jendela ke hari baru: kurangi bucket yang keluar, tambah bucket (tanggal depan) yang masuk
+        previous = self._today
+        if (today - previous).days > MAX_WINDOW:
+            self._ready = False
+            return
+        for cid, buckets in self._buckets.items():
+            for tx_date, (count, total) in list(buckets.items()):
+                for window in WINDOWS:
+                    was_in = 0 <= (previous - tx_date).days < window
+                    is_in = 0 <= (today - tx_date).days < window
+                    if was_in != is_in:
+                        counter = self._totals[cid][window]
+                        sign = 1 if is_in else -1
+                        counter[0] += sign * count
+                        counter[1] += sign * total
+                if (today - tx_date).days >= MAX_WINDOW:
+                    del buckets[tx_date]
+        self._today = today
+
+    def apply(self, records):
+        """
+        Tambahkan transaksi yang sudah di-commit: list (category_id, tanggal, nominal).
+        """
+        with self._lock:
+            if not self._ready:
+                return
+            for category_id, tx_date, amount in records:
+                if category_id not in self._categories:
+                    # Kategori expense baru yang belum dikenal: bangun ulang saat dibaca
+                    if category_id not in self._ignored:
+                        self._ready = False
+                    continue
+                if (self._today - tx_date).days < MAX_WINDOW:
+                    self._add(category_id, tx_date, 1, amount or 0.0)
+
+    def top(self, db: Session, window: int = 30, limit: int = 3, group=models.PriorityGroup.LIFESTYLE):
+        """
+        Kategori (default Lifestyle) paling sering dibeli dalam `window` hari terakhir.
+        O(jumlah kategori): counter sudah tersedia, tinggal pilih N teratas.
+        """
+        if window not in WINDOWS:
+            raise ValueError(f"window harus salah satu dari {WINDOWS}")
+        today = date.today()
+        with self._lock:
+            if self._ready and self._today != today:
+                self._advance(today)
+            ready = self._ready
+        if not ready:
+            self.rebuild(db, today)
+
+        with self._lock:
+            candidates = (
+                LeakStat(cid, name, icon, *self._totals[cid][window], window)
+                for cid, (name, icon, cat_group) in self._categories.items()
+                if cat_group == group and self._totals[cid][window][0] > 0
+            )
+            return heapq.nlargest(limit, candidates, key=lambda s: (s.count, s.total))
+
+
+_trackers = {} # tenant -> LeakTracker
+_trackers_lock = threading.Lock()
+
+def tracker_for(tenant: str) -> LeakTracker:
+    with _trackers_lock:
+        tracker = _trackers.get(tenant)
+        if tracker is None:
+            tracker = _trackers[tenant] = LeakTracker()
+        return tracker
+
+@shards.on_evict
+def _forget(tenant: str):
+    with _trackers_lock:
+        _trackers.pop(tenant, None)
+
+def invalidate(db: Session):
+    tracker_for(tenant_of(db)).invalidate()
+
+def record_pending(db: Session, records):
+    """
+    Catat transaksi baru (category_id, tanggal, nominal) untuk counter.
+    Baru diterapkan setelah session commit; dibuang jika rollback.
+    """
+    db.info.setdefault("leak_pending", []).extend(records)
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session):
+    records = session.info.pop("leak_pending", None)
+    if records:
+        tracker_for(tenant_of(session)).apply(records)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop("leak_pending", None)
+
+def top_leaks(db: Session, window: int = 30, limit: int = 3):
+    return tracker_for(tenant_of(db)).top(db, window, limit)
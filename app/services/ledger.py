@@ -0,0 +1,220 @@
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from concurrent.futures import Future
+from datetime import date
+import hashlib
+import logging
+import queue
+import threading
+import time
+import uuid
+from .. import models
+from ..config import settings
+from ..database import SessionLocal, shards
+from ..tenancy import tenant_of
+from . import balances, budgets, leaks, refdata, rollup
+
+logger = logging.getLogger(__name__)
+
+# Jalur tulis transaksi.
+# Saldo dompet di-update dengan satu statement atomik
+# (UPDATE wallets SET initial_balance = initial_balance + :delta),
+# bukan read-modify-write di Python, jadi request paralel tidak saling menimpa.
+# Setiap perubahan saldo juga dicatat sebagai jurnal double-entry di tabel postings
+# (lihat services/balances.py untuk saldo per tanggal).
+
+def category_type(db: Session, category_id: int):
+    category = refdata.cache.category(db, category_id)
+    if category is None:
+        raise HTTPException(status_code=404, detail="Category not found")
+    return category.category_type
+
+def system_category(db: Session, name: str, **defaults) -> int:
+    """
+    Id kategori sistem (mis. 'Transfer', 'Koreksi Saldo'); dibuat jika belum ada.
+    """
+    category = refdata.cache.category_by_name(db, name)
+    if category is not None:
+        return category.id
+
+    new_cat = models.Category(name=name, **defaults)
+    db.add(new_cat)
+    db.commit()
+    refdata.cache.invalidate(db)
+    return new_cat.id
+
+def transaction_hash(tx_date, amount, description, occurrence: int = 0) -> str:
+    """
+    Identitas transaksi (tanggal, nominal, deskripsi) untuk dedupe import mutasi.
+    occurrence membedakan baris identik dalam satu file (mis. 2x kopi di hari yang sama).
+    """
+    key = f"{str(tx_date)[:10]}|{float(amount):.2f}|{(description or '').strip().lower()}|{occurrence}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+def balance_delta(cat_type, amount: float) -> float:
+    return -amount if cat_type == models.TransactionType.EXPENSE else amount
+
+def adjust_balance(db: Session, wallet_id: int, delta: float):
+    result = db.execute(
+        update(models.Wallet)
+        .where(models.Wallet.id == wallet_id)
+        .values(initial_balance=models.Wallet.initial_balance + delta)
+    )
+    if result.rowcount == 0:
+        raise HTTPException(status_code=404, detail="Wallet not found")
+
+def wallet_leg(wallet_id: int, amount: float):
+    return (models.AccountType.WALLET, wallet_id, amount)
+
+def post_entry(db: Session, entry_date: date, legs, transaction_id: int = None):
+    """
+    Catat 1 jurnal double-entry. legs: list (account_type, account_id, amount), totalnya harus 0.
+    Saldo dompet yang terlibat ikut di-update. Tidak melakukan commit.
+    """
+    if abs(sum(amount for _, _, amount in legs)) > 0.005:
+        raise ValueError("Jurnal tidak seimbang")
+
+    entry_id = uuid.uuid4().hex
+    db.execute(insert(models.Posting), [
+        {
+            "entry_id": entry_id,
+            "transaction_id": transaction_id,
+            "date": entry_date,
+            "account_type": account_type,
+            "account_id": account_id,
+            "amount": amount,
+        }
+        for account_type, account_id, amount in legs
+    ])
+
+    wallet_ids = []
+    for account_type, account_id, amount in legs:
+        if account_type == models.AccountType.WALLET:
+            adjust_balance(db, account_id, amount)
+            wallet_ids.append(account_id)
+    # Checkpoint setelah tanggal jurnal tidak berlaku lagi (transaksi backdate),
+    # lalu checkpoint bulan yang sudah tutup dilengkapi dalam transaksi yang sama
+    balances.invalidate_checkpoints(db, wallet_ids, entry_date)
+    balances.refresh_checkpoints(db, wallet_ids)
+
+def post_transaction(db: Session, tx_date: date, amount: float, description, wallet_id: int, category_id: int, balance_delta: float, counter_wallet_id: int = None, receipt: str = None):
+    """
+    Catat 1 transaksi: insert baris transaksi, jurnal (dompet vs kategori, atau
+    dompet vs dompet tujuan untuk transfer), saldo dompet & rollup bulanan.
+    Tidak melakukan commit (lihat run_write). Return id transaksi.
+    """
+    result = db.execute(insert(models.Transaction).values(
+        date=tx_date,
+        amount=amount,
+        description=description,
+        wallet_id=wallet_id,
+        category_id=category_id,
+        receipt_path=receipt,
+        import_hash=transaction_hash(tx_date, amount, description)
+    ))
+    if counter_wallet_id is None:
+        counter_leg = (models.AccountType.CATEGORY, category_id, -balance_delta)
+    else:
+        counter_leg = wallet_leg(counter_wallet_id, -balance_delta)
+
+    transaction_id = result.inserted_primary_key[0]
+    post_entry(db, tx_date, [wallet_leg(wallet_id, balance_delta), counter_leg], transaction_id)
+    rollup.add_to_rollup(db, tx_date, category_id, wallet_id, amount)
+    budgets.record_transaction(db, tx_date, category_id, amount)
+    leaks.record_pending(db, [(category_id, tx_date, amount)])
+    return transaction_id
+
+def opening_balance_legs(wallet_id: int, amount: float):
+    # Saldo awal dompet: lawannya akun ekuitas
+    return [wallet_leg(wallet_id, amount), (models.AccountType.EQUITY, 0, -amount)]
+
+class GroupCommitter:
+    """
+    Menggabungkan write yang datang dalam jendela beberapa milidetik
+    menjadi satu commit SQLite (satu fsync untuk banyak request).
+    Write untuk shard keluarga berbeda di-commit terpisah (satu commit per session_factory).
+    """
+
+    def __init__(self, session_factory, window_ms: int, max_batch: int):
+        self.session_factory = session_factory
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+        self._thread.start()
+
+    def submit(self, write_fn, session_factory=None):
+        future = Future()
+        self._queue.put((write_fn, future, session_factory or self.session_factory))
+        return future.result()
+
+    def _collect_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _apply(self, session_factory, batch):
+        db = session_factory()
+        try:
+            results = [write_fn(db) for write_fn, _ in batch]
+            db.commit()
+            return results
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _run(self):
+        while True:
+            groups = {}
+            for write_fn, future, session_factory in self._collect_batch():
+                groups.setdefault(session_factory, []).append((write_fn, future))
+            for session_factory, batch in groups.items():
+                self._commit_group(session_factory, batch)
+
+    def _commit_group(self, session_factory, batch):
+        try:
+            results = self._apply(session_factory, batch)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+        except Exception:
+            # Satu write gagal: ulangi satu per satu agar write lain tetap tersimpan
+            for write_fn, future in batch:
+                try:
+                    future.set_result(self._apply(session_factory, [(write_fn, future)])[0])
+                except Exception as e:
+                    future.set_exception(e)
+
+
+_committer = None
+_committer_lock = threading.Lock()
+
+def _get_committer():
+    global _committer
+    with _committer_lock:
+        if _committer is None:
+            _committer = GroupCommitter(SessionLocal, settings.GROUP_COMMIT_WINDOW_MS, settings.GROUP_COMMIT_MAX_BATCH)
+            logger.info("Group commit aktif")
+    return _committer
+
+def run_write(db: Session, write_fn):
+    """
+    Jalankan write_fn(session) lalu commit.
+    Jika GROUP_COMMIT_ENABLED, write digabung dengan write lain dalam satu commit.
+    """
+    if settings.GROUP_COMMIT_ENABLED:
+        return _get_committer().submit(write_fn, shards.get(tenant_of(db)).session_factory)
+
+    result = write_fn(db)
+    db.commit()
+    return result
@@ -0,0 +1,75 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from ..config import settings
+from .. import metrics
+import logging
+import time
+
+# Instrumentasi SQL untuk SEMUA engine (database default & setiap shard keluarga):
+# - durasi tiap statement (histogram per jenis statement)
+# - jumlah statement & total waktu DB per request (RequestStats dari MetricsMiddleware)
+# - slow-query log: statement >= SLOW_QUERY_MS ditulis ke logger "app.slow_query"
+#   beserta EXPLAIN QUERY PLAN-nya. Parameter tidak ditulis (isinya data keuangan keluarga).
+
+logger = logging.getLogger("app.slow_query")
+
+if settings.SLOW_QUERY_LOG_PATH:
+    _handler = logging.FileHandler(settings.SLOW_QUERY_LOG_PATH, encoding="utf-8")
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+
+_STARTED = "query_log_started"
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH") # DDL & PRAGMA tidak punya plan
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_STARTED, []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info[_STARTED].pop()
+    elapsed = time.perf_counter() - started
+    kind = metrics.statement_kind(statement)
+    metrics.db_query_seconds.observe(elapsed, statement=kind)
+
+    stats = metrics.current_request.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+
+    if settings.SLOW_QUERY_MS > 0 and elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        metrics.db_slow_queries.inc(statement=kind)
+        plan = []
+        if settings.SLOW_QUERY_EXPLAIN and not executemany and kind in EXPLAINABLE:
+            plan = explain(conn, statement, parameters)
+        logger.warning(
+            f"Query lambat {elapsed * 1000:.1f} ms ({conn.engine.url.database}): {' '.join(statement.split())}"
+            + "".join(f"\n    plan: {line}" for line in plan)
+        )
+
+@event.listens_for(Engine, "handle_error")
+def _discard_failed(exception_context):
+    # Statement gagal tidak memanggil after_cursor_execute: buang waktu mulainya
+    conn = exception_context.connection
+    if conn is not None and conn.info.get(_STARTED) and exception_context.cursor is not None:
+        conn.info[_STARTED].pop()
+
+def explain(conn, statement: str, parameters) -> list:
+    """
+    Baris EXPLAIN (QUERY PLAN untuk SQLite) statement dengan parameter yang sama.
+    Dijalankan di cursor baru agar hasil cursor asli (belum di-fetch) tidak tertimpa.
+    """
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters or ())
+        rows = cursor.fetchall()
+    except Exception as e:
+        return [f"(EXPLAIN gagal: {e})"]
+    finally:
+        cursor.close()
+    if conn.dialect.name == "sqlite":
+        return [row[3] for row in rows] # (id, parent, notused, detail)
+    return [" ".join(str(col) for col in row) for row in rows]
@@ -0,0 +1,271 @@
+"""
+Foto struk transaksi.
+
+Upload ditulis ke disk per chunk sambil dihitung SHA-256-nya (tidak pernah ditampung utuh
+di memori), lalu disimpan content-addressed: foto yang sama persis hanya disimpan sekali.
+Resize, kompresi ulang & thumbnail dikerjakan process pool (services/images.py) di luar
+request; sampai selesai, status foto "processing".
+
+Layout per keluarga: RECEIPT_DIR/<keluarga>/<2 hex pertama>/<hash>.jpg (hasil kompresi),
+<hash>.thumb.jpg (thumbnail) dan <hash>.src (upload asli, dihapus setelah diproses).
+Kolom transactions.receipt_path berisi hash tersebut.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+import hashlib
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import time
+from .. import metrics, models
+from ..config import settings
+from . import images
+
+logger = logging.getLogger(__name__)
+
+DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+CHUNK_SIZE = 64 * 1024
+
+READY = "ready"
+PROCESSING = "processing"
+MISSING = "missing"
+
+receipt_process_seconds = metrics.registry.histogram(
+    "receipt_process_duration_seconds", "Durasi kompresi + thumbnail satu foto struk", ("outcome",),
+)
+
+
+class ReceiptError(Exception):
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _is_image(head: bytes) -> bool:
+    # Cek signature di bytes pertama (JPEG, PNG, GIF, WebP) sebelum file dikirim ke worker
+    return (
+        head.startswith((b"\xff\xd8\xff", b"\x89PNG\r\n\x1a\n", b"GIF87a", b"GIF89a"))
+        or (head[:4] == b"RIFF" and head[8:12] == b"WEBP")
+    )
+
+def tenant_dir(tenant: str) -> str:
+    return os.path.join(settings.RECEIPT_DIR, tenant)
+
+def path_for(tenant: str, digest: str, suffix: str) -> str:
+    return os.path.join(tenant_dir(tenant), digest[:2], f"{digest}{suffix}")
+
+def full_path(tenant: str, digest: str) -> str:
+    return path_for(tenant, digest, ".jpg")
+
+def thumb_path(tenant: str, digest: str) -> str:
+    return path_for(tenant, digest, ".thumb.jpg")
+
+
+class ReceiptUpload:
+    """
+    Penerima satu upload: write(chunk) berulang, lalu finish() -> hash.
+    Batas ukuran dicek per chunk, jadi upload kebesaran dihentikan di tengah jalan.
+    """
+
+    def __init__(self, tenant: str, max_bytes: int = None):
+        self.tenant = tenant
+        self.max_bytes = settings.RECEIPT_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+        self.size = 0
+        self._head = b""
+        self._hash = hashlib.sha256()
+        upload_dir = os.path.join(tenant_dir(tenant), ".upload")
+        os.makedirs(upload_dir, exist_ok=True)
+        fd, self._path = tempfile.mkstemp(dir=upload_dir) # Satu filesystem dengan tujuan: os.replace atomik
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, chunk: bytes):
+        if not chunk:
+            return
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise ReceiptError(f"Foto struk terlalu besar (maks {self.max_bytes // (1024 * 1024)} MB)", 413)
+        if len(self._head) < 12:
+            self._head += chunk[:12 - len(self._head)]
+        self._hash.update(chunk)
+        self._file.write(chunk)
+
+    def finish(self) -> str:
+        self._file.close()
+        if not self.size:
+            raise ReceiptError("File foto kosong")
+        if not _is_image(self._head):
+            raise ReceiptError("File bukan foto (JPEG, PNG, GIF atau WebP)", 415)
+        digest = self._hash.hexdigest()
+        store(self.tenant, digest, self._path)
+        return digest
+
+    def abort(self):
+        self._file.close()
+        try:
+            os.remove(self._path)
+        except FileNotFoundError:
+            pass
+
+
+def receive_file(tenant: str, fileobj) -> str:
+    """
+    Simpan foto dari file-like (UploadFile.file dari form) per chunk. Return hash.
+    """
+    upload = ReceiptUpload(tenant)
+    try:
+        while True:
+            chunk = fileobj.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            upload.write(chunk)
+        return upload.finish()
+    except BaseException:
+        upload.abort()
+        raise
+
+async def receive_stream(tenant: str, chunks) -> str:
+    """
+    Simpan foto dari body request mentah (async iterator request.stream()). Return hash.
+    """
+    upload = ReceiptUpload(tenant)
+    try:
+        async for chunk in chunks:
+            upload.write(chunk) # Chunk <= 64 KB: write ke page cache OS, tidak menahan event loop
+        return upload.finish()
+    except BaseException:
+        upload.abort()
+        raise
+
+
+# ---------- Process pool ----------
+
+_pool = None
+_pool_lock = threading.Lock()
+_pending = {} # (keluarga, hash) -> Future yang sedang diproses
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # "spawn": worker tidak mewarisi thread scheduler / koneksi SQLite proses utama
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.RECEIPT_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+def store(tenant: str, digest: str, uploaded_path: str):
+    """
+    Pindahkan upload ke alamat hash-nya. Foto yang sudah pernah disimpan: upload dibuang.
+    """
+    with _pool_lock:
+        processing = (tenant, digest) in _pending
+    if processing or os.path.exists(full_path(tenant, digest)):
+        os.remove(uploaded_path)
+        return
+    source = path_for(tenant, digest, ".src")
+    os.makedirs(os.path.dirname(source), exist_ok=True)
+    os.replace(uploaded_path, source)
+    _submit(tenant, digest)
+
+def _submit(tenant: str, digest: str):
+    key = (tenant, digest)
+    with _pool_lock:
+        if key in _pending:
+            return
+        _pending[key] = None # Klaim dulu agar tidak disubmit dua kali
+    started = time.perf_counter()
+    try:
+        pool = _get_pool()
+        future = pool.submit(
+            images.compress_receipt,
+            path_for(tenant, digest, ".src"), full_path(tenant, digest), thumb_path(tenant, digest),
+            settings.RECEIPT_MAX_SIDE, settings.RECEIPT_QUALITY,
+            settings.RECEIPT_THUMB_SIDE, settings.RECEIPT_THUMB_QUALITY,
+        )
+    except Exception:
+        with _pool_lock:
+            _pending.pop(key, None)
+        raise
+    with _pool_lock:
+        _pending[key] = future
+    future.add_done_callback(lambda f: _finished(key, f, pool, started))
+
+def _finished(key, future, pool: ProcessPoolExecutor, started: float):
+    tenant, digest = key
+    source = path_for(tenant, digest, ".src")
+    if future.cancelled():
+        # Dibatalkan saat shutdown: .src tetap ada, diproses ulang saat foto dibuka lagi
+        with _pool_lock:
+            _pending.pop(key, None)
+        return
+    error = future.exception()
+    receipt_process_seconds.observe(time.perf_counter() - started, outcome="error" if error else "ok")
+    if isinstance(error, BrokenProcessPool):
+        # Worker mati (mis. kehabisan memori): pool diganti baru, .src dicoba lagi saat foto dibuka
+        logger.error(f"Process pool foto struk rusak, dibuat ulang: {error!r}")
+        _reset_pool(pool)
+        with _pool_lock:
+            _pending.pop(key, None)
+        return
+    if error:
+        logger.error(f"Foto struk {digest[:12]} keluarga {tenant} gagal diproses: {error!r}")
+    else:
+        full_size, thumb_size = future.result()
+        logger.debug(f"Foto struk {digest[:12]} diproses: {full_size} B, thumbnail {thumb_size} B")
+    # File asli tidak dibutuhkan lagi (gagal = bukan gambar valid, tidak dicoba ulang)
+    try:
+        os.remove(source)
+    except FileNotFoundError:
+        pass
+    with _pool_lock:
+        _pending.pop(key, None)
+
+def status(tenant: str, digest: str) -> str:
+    """
+    READY / PROCESSING / MISSING. File asli yang tertinggal (proses restart sebelum
+    selesai diproses) otomatis dimasukkan lagi ke antrian.
+    """
+    if os.path.exists(thumb_path(tenant, digest)) and os.path.exists(full_path(tenant, digest)):
+        return READY
+    if os.path.exists(path_for(tenant, digest, ".src")):
+        _submit(tenant, digest)
+        return PROCESSING
+    return MISSING
+
+def _reset_pool(broken: ProcessPoolExecutor):
+    global _pool
+    with _pool_lock:
+        if _pool is broken: # Future lain dari pool yang sama bisa sudah mengganti pool-nya
+            _pool = None
+    broken.shutdown(wait=False)
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ---------- Transaksi ----------
+
+def transaction_exists(db: Session, tx_id: int) -> bool:
+    return db.execute(select(models.Transaction.id).where(models.Transaction.id == tx_id)).first() is not None
+
+def attach(db: Session, tx_id: int, digest: str) -> bool:
+    """
+    Tautkan foto ke transaksi (tidak commit). False jika transaksi tidak ada.
+    Foto lama tidak dihapus: bisa jadi dipakai transaksi lain (content-addressed).
+    """
+    result = db.execute(
+        update(models.Transaction).where(models.Transaction.id == tx_id).values(receipt_path=digest)
+    )
+    return result.rowcount > 0
+
+def urls(digest: str) -> dict:
+    return {"url": f"/receipts/{digest}", "thumb_url": f"/receipts/{digest}/thumb"}
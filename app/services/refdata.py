@@ -0,0 +1,115 @@
+from sqlalchemy.orm import Session
+from typing import NamedTuple, Optional
+import threading
+from .. import models
+from ..database import shards
+from ..tenancy import DEFAULT_TENANT, tenant_of
+
+# Cache data referensi (kategori & dompet) di memori proses.
+# Tabel kecil yang jarang berubah: dimuat sekali, diindeks per id & nama,
+# dan dibuang (versi naik) oleh jalur tulis yang mengubahnya (tambah kategori, tambah/hapus dompet, reset).
+# Saldo dompet TIDAK di-cache karena berubah di setiap transaksi.
+# Satu snapshot per keluarga (shard); snapshot dibuang saat shard-nya ditutup pool.
+
+class CategoryRef(NamedTuple):
+    id: int
+    name: str
+    icon: Optional[str]
+    category_type: models.TransactionType
+    priority_group: Optional[models.PriorityGroup]
+
+class WalletRef(NamedTuple):
+    id: int
+    name: str
+    wallet_type: Optional[str]
+    is_active: int
+
+
+class RefDataCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._versions = {} # tenant -> versi (naik setiap invalidate)
+        self._data = {} # tenant -> (versi, kategori by id, kategori by nama, dompet by id, dompet by nama)
+
+    def invalidate(self, db: Session):
+        """
+        Panggil SETELAH commit yang mengubah tabel kategori / dompet.
+        """
+        tenant = tenant_of(db)
+        with self._lock:
+            self._versions[tenant] = self._versions.get(tenant, 0) + 1
+            self._data.pop(tenant, None)
+
+    def forget(self, tenant: str):
+        # Shard ditutup: lepas snapshot dari memori (versi tetap disimpan)
+        with self._lock:
+            self._data.pop(tenant, None)
+
+    def _snapshot(self, db: Session):
+        tenant = tenant_of(db)
+        with self._lock:
+            data = self._data.get(tenant)
+            if data is not None:
+                self.hits += 1
+                return data
+            self.misses += 1
+            version = self._versions.get(tenant, 0)
+
+        categories = [CategoryRef(*row) for row in db.query(
+            models.Category.id, models.Category.name, models.Category.icon,
+            models.Category.category_type, models.Category.priority_group
+        ).order_by(models.Category.id)]
+        wallets = [WalletRef(*row) for row in db.query(
+            models.Wallet.id, models.Wallet.name, models.Wallet.wallet_type, models.Wallet.is_active
+        ).order_by(models.Wallet.id)]
+        data = (
+            version,
+            {c.id: c for c in categories},
+            {c.name: c for c in categories},
+            {w.id: w for w in wallets},
+            {w.name: w for w in wallets},
+        )
+
+        with self._lock:
+            # Jangan simpan jika ada invalidate selama memuat (data bisa sudah basi)
+            if self._versions.get(tenant, 0) == version:
+                self._data[tenant] = data
+        return data
+
+    def categories(self, db: Session, category_type: models.TransactionType = None):
+        items = self._snapshot(db)[1].values()
+        if category_type is not None:
+            return [c for c in items if c.category_type == category_type]
+        return list(items)
+
+    def category(self, db: Session, category_id: int) -> Optional[CategoryRef]:
+        return self._snapshot(db)[1].get(category_id)
+
+    def category_by_name(self, db: Session, name: str) -> Optional[CategoryRef]:
+        return self._snapshot(db)[2].get(name)
+
+    def wallets(self, db: Session, active_only: bool = True):
+        items = self._snapshot(db)[3].values()
+        return [w for w in items if w.is_active == 1 or not active_only]
+
+    def wallet(self, db: Session, wallet_id: int) -> Optional[WalletRef]:
+        return self._snapshot(db)[3].get(wallet_id)
+
+    def wallet_by_name(self, db: Session, name: str) -> Optional[WalletRef]:
+        return self._snapshot(db)[4].get(name)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "version": self._versions.get(DEFAULT_TENANT, 0),
+                "hits": self.hits,
+                "misses": self.misses,
+                "loaded": DEFAULT_TENANT in self._data,
+                "tenants_loaded": len(self._data),
+            }
+
+
+cache = RefDataCache()
+shards.on_evict(cache.forget)
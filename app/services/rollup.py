@@ -0,0 +1,170 @@
+from sqlalchemy import func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from datetime import date
+from .. import models
+
+# Rollup bulanan: satu baris per (bulan, kategori, dompet).
+# Dashboard & laporan cukup membaca tabel ini (O(kategori)) tanpa scan tabel transaksi.
+
+def month_key(d: date) -> str:
+    return d.strftime("%Y-%m")
+
+def _upsert_stmt():
+    stmt = sqlite_insert(models.MonthlyRollup)
+    return stmt.on_conflict_do_update(
+        index_elements=["month_period", "category_id", "wallet_id"],
+        set_={
+            "total_amount": models.MonthlyRollup.total_amount + stmt.excluded.total_amount,
+            "tx_count": models.MonthlyRollup.tx_count + stmt.excluded.tx_count,
+        }
+    )
+
+def add_to_rollup(db: Session, tx_date: date, category_id: int, wallet_id: int, amount: float, count: int = 1):
+    """
+    Tambahkan nominal ke rollup bulan terkait (upsert).
+    Tidak melakukan commit: dipanggil di dalam transaksi DB yang sama dengan insert transaksinya.
+    """
+    db.execute(_upsert_stmt(), {
+        "month_period": month_key(tx_date),
+        "category_id": category_id,
+        "wallet_id": wallet_id,
+        "total_amount": amount,
+        "tx_count": count,
+    })
+
+def add_transactions_to_rollup(db: Session, rows):
+    """
+    Versi batch dari add_to_rollup: rows berisi dict date/category_id/wallet_id/amount.
+    Digabung dulu per (bulan, kategori, dompet) lalu di-upsert dengan satu executemany.
+    """
+    groups = {}
+    for row in rows:
+        key = (month_key(row["date"]), row["category_id"], row["wallet_id"])
+        total, count = groups.get(key, (0.0, 0))
+        groups[key] = (total + row["amount"], count + 1)
+
+    if groups:
+        db.execute(_upsert_stmt(), [
+            {"month_period": month, "category_id": cid, "wallet_id": wid, "total_amount": total, "tx_count": count}
+            for (month, cid, wid), (total, count) in groups.items()
+        ])
+
+def clear_rollups(db: Session):
+    db.query(models.MonthlyRollup).delete()
+
+def _aggregate_from_transactions(db: Session):
+    return db.query(
+        func.strftime("%Y-%m", models.Transaction.date).label("month_period"),
+        models.Transaction.category_id,
+        models.Transaction.wallet_id,
+        func.sum(models.Transaction.amount).label("total_amount"),
+        func.count(models.Transaction.id).label("tx_count")
+    ).group_by(
+        func.strftime("%Y-%m", models.Transaction.date),
+        models.Transaction.category_id,
+        models.Transaction.wallet_id
+    )
+
+def verify_rollups(db: Session):
+    """
+    Bandingkan isi rollup dengan agregasi ulang dari tabel transaksi.
+    Return list selisih: (bulan, kategori, dompet, nilai_rollup, nilai_transaksi).
+    """
+    expected = {
+        (r.month_period, r.category_id, r.wallet_id): (r.total_amount or 0.0, r.tx_count)
+        for r in _aggregate_from_transactions(db)
+    }
+    actual = {
+        (r.month_period, r.category_id, r.wallet_id): (r.total_amount or 0.0, r.tx_count)
+        for r in db.query(models.MonthlyRollup)
+    }
+
+    mismatches = []
+    for key in sorted(set(expected) | set(actual)):
+        exp = expected.get(key, (0.0, 0))
+        act = actual.get(key, (0.0, 0))
+        if abs(exp[0] - act[0]) > 0.005 or exp[1] != act[1]:
+            mismatches.append((*key, act, exp))
+    return mismatches
+
+def rebuild_rollups(db: Session):
+    """
+    Hitung ulang seluruh rollup dari tabel transaksi (untuk verifikasi / perbaikan data).
+    Tidak melakukan commit: hapus & isi ulang satu transaksi milik pemanggil.
+    """
+    clear_rollups(db)
+    agg = _aggregate_from_transactions(db).subquery()
+    db.execute(insert(models.MonthlyRollup).from_select(
+        ["month_period", "category_id", "wallet_id", "total_amount", "tx_count"],
+        agg.select()
+    ))
+
+def ensure_rollups(db: Session):
+    # Database lama (sebelum ada rollup) perlu diisi sekali dari data transaksi
+    # (hanya kolom kunci, agar tetap jalan sebelum migrasi kolom baru)
+    if not db.query(models.MonthlyRollup.month_period).first() and db.query(models.Transaction.id).first():
+        rebuild_rollups(db)
+        db.commit()
+
+def month_totals_select(month_period: str):
+    return select(
+        models.Category.category_type,
+        func.sum(models.MonthlyRollup.total_amount)
+    ).join(models.MonthlyRollup.category).where(
+        models.MonthlyRollup.month_period == month_period
+    ).group_by(models.Category.category_type)
+
+def month_type_totals_select(first_month: str, last_month: str):
+    # Total per (bulan, tipe kategori) untuk rentang bulan (riwayat cashflow, services/goals.py)
+    return select(
+        models.MonthlyRollup.month_period,
+        models.Category.category_type,
+        func.sum(models.MonthlyRollup.total_amount)
+    ).join(models.MonthlyRollup.category).where(
+        models.MonthlyRollup.month_period >= first_month,
+        models.MonthlyRollup.month_period <= last_month
+    ).group_by(models.MonthlyRollup.month_period, models.Category.category_type)
+
+def month_totals(db: Session, month_period: str):
+    """
+    Total per tipe kategori (income/expense/transfer) untuk satu bulan.
+    """
+    rows = db.execute(month_totals_select(month_period)).all()
+    return {cat_type: total or 0.0 for cat_type, total in rows}
+
+def category_totals_select(month_period: str, category_type=models.TransactionType.EXPENSE, limit: int = None):
+    total = func.sum(models.MonthlyRollup.total_amount)
+    stmt = select(
+        models.Category.id.label("category_id"),
+        models.Category.name,
+        models.Category.icon,
+        models.Category.priority_group,
+        total.label("total")
+    ).join(models.MonthlyRollup.category).where(
+        models.MonthlyRollup.month_period == month_period,
+        models.Category.category_type == category_type
+    ).group_by(models.Category.id).order_by(total.desc())
+
+    if limit:
+        stmt = stmt.limit(limit)
+    return stmt
+
+def category_totals(db: Session, month_period: str, category_type=models.TransactionType.EXPENSE, limit: int = None):
+    """
+    Total per kategori dalam satu bulan, urut dari yang terbesar.
+    """
+    return db.execute(category_totals_select(month_period, category_type, limit)).all()
+
+def category_month_totals_select(first_month: str, last_month: str, category_type=models.TransactionType.EXPENSE):
+    # Matriks kategori x bulan dalam satu query (dipakai services/trends.py)
+    return select(
+        models.MonthlyRollup.category_id,
+        models.Category.name,
+        models.MonthlyRollup.month_period,
+        func.sum(models.MonthlyRollup.total_amount).label("total")
+    ).join(models.MonthlyRollup.category).where(
+        models.MonthlyRollup.month_period >= first_month,
+        models.MonthlyRollup.month_period <= last_month,
+        models.Category.category_type == category_type
+    ).group_by(models.MonthlyRollup.category_id, models.MonthlyRollup.month_period)
@@ -1,5 +1,4 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from sqlalchemy.orm import Session
 from ..database import SessionLocal
 from .. import models
 from .email_service import send_report_email
@@ -0,0 +1,109 @@
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+import logging
+from .. import models, schemas
+from . import ledger, refdata
+
+logger = logging.getLogger(__name__)
+
+# Sinkronisasi antrian offline (static/js/sw.js).
+# Transaksi yang dicatat saat sinyal jelek disimpan di IndexedDB lalu dikirim
+# sekaligus ke POST /transactions/batch. Setiap item membawa idempotency key
+# dari browser; key yang sudah tercatat di sync_requests dilewati, jadi kirim ulang
+# (koneksi putus sebelum respons diterima) tidak pernah memposting dua kali.
+# Seluruh batch masuk dalam satu commit.
+# Form biasa (POST /transactions/add) membawa key yang sama dan ikut dicatat di
+# sync_requests, jadi form yang sudah tersimpan tapi responsnya hilang lalu masuk
+# antrian offline tidak diposting ulang oleh batch.
+
+APPLIED = "applied"
+DUPLICATE = "duplicate"
+REJECTED = "rejected"
+
+def _validate(db: Session, item: schemas.SyncTransaction):
+    # Alasan penolakan (permanen, browser membuang item dari antrian), None jika valid
+    if item.amount <= 0:
+        return "Nominal harus lebih dari 0"
+    wallet = refdata.cache.wallet(db, item.wallet_id)
+    if wallet is None or wallet.is_active != 1:
+        return "Dompet tidak ditemukan"
+    category = refdata.cache.category(db, item.category_id)
+    if category is None:
+        return "Kategori tidak ditemukan"
+    if category.category_type == models.TransactionType.TRANSFER:
+        return "Transfer tidak bisa dikirim lewat antrian offline"
+    return None
+
+def _recorded(db: Session, keys):
+    # {idempotency_key: transaction_id} untuk key yang sudah pernah diterima
+    return dict(db.execute(
+        select(models.SyncRequest.idempotency_key, models.SyncRequest.transaction_id)
+        .where(models.SyncRequest.idempotency_key.in_(keys))
+    ).all())
+
+def _record(db: Session, key: str, transaction_id: int):
+    db.execute(insert(models.SyncRequest).values(idempotency_key=key, transaction_id=transaction_id))
+
+def _run_write(db: Session, write_fn):
+    try:
+        return ledger.run_write(db, write_fn)
+    except IntegrityError:
+        # Key yang sama sedang dikirim paralel (tab lain / retry) dan menang duluan:
+        # ulangi sekali, key-nya kini terbaca sebagai duplikat
+        db.rollback()
+        logger.info("Sync bentrok dengan request paralel, diulang")
+        return ledger.run_write(db, write_fn)
+
+def _apply(db: Session, items):
+    keys = [item.idempotency_key for item in items]
+    done = _recorded(db, keys)
+
+    results = []
+    for item in items:
+        key = item.idempotency_key
+        if key in done:
+            results.append({"idempotency_key": key, "status": DUPLICATE, "transaction_id": done[key]})
+            continue
+
+        error = _validate(db, item)
+        if error:
+            results.append({"idempotency_key": key, "status": REJECTED, "error": error})
+            continue
+
+        category = refdata.cache.category(db, item.category_id)
+        delta = ledger.balance_delta(category.category_type, item.amount)
+        transaction_id = ledger.post_transaction(
+            db, item.date, item.amount, item.description, item.wallet_id, item.category_id, balance_delta=delta
+        )
+        _record(db, key, transaction_id)
+        # Key sama muncul dua kali dalam satu batch: yang kedua dianggap duplikat
+        done[key] = transaction_id
+        results.append({"idempotency_key": key, "status": APPLIED, "transaction_id": transaction_id})
+    return results
+
+def apply_batch(db: Session, batch: schemas.SyncBatch):
+    """
+    Terapkan batch transaksi offline dalam satu commit.
+    Return list status per item (applied / duplicate / rejected), urut sesuai input.
+    """
+    items = batch.transactions
+    if not items:
+        return []
+    return _run_write(db, lambda session: _apply(session, items))
+
+def apply_once(db: Session, idempotency_key: str, post_fn):
+    """
+    Posting satu transaksi dari form dengan idempotency key, dalam satu commit.
+    post_fn(session) -> transaction id; tidak dipanggil jika key sudah pernah diterima.
+    Return (status, transaction_id): applied / duplicate.
+    """
+    def write(session: Session):
+        done = _recorded(session, [idempotency_key])
+        if idempotency_key in done:
+            return DUPLICATE, done[idempotency_key]
+        transaction_id = post_fn(session)
+        _record(session, idempotency_key, transaction_id)
+        return APPLIED, transaction_id
+
+    return _run_write(db, write)
@@ -0,0 +1,116 @@
+from collections import OrderedDict
+from sqlalchemy.orm import Session
+from typing import NamedTuple, Optional
+from datetime import date
+import threading
+import numpy as np
+import pandas as pd
+from .. import models
+from ..config import settings
+from . import data_version, rollup
+from ..tenancy import tenant_of
+
+# Analisa tren bulanan per kategori ("Listrik naik 15% dibanding bulan lalu").
+# Matriks kategori x bulan diambil dari rollup dalam satu query, lalu selisih,
+# persentase & rata-rata bergerak dihitung sekaligus (vektor NumPy / pandas).
+# Hasil di-cache per versi data (services/data_version.py).
+
+FLAT_THRESHOLD_PCT = 5.0 # Perubahan di bawah ini dianggap stabil
+
+class CategoryTrend(NamedTuple):
+    category_id: int
+    name: str
+    current: float
+    previous: float
+    delta: float
+    pct_change: Optional[float] # None jika bulan lalu 0 (kategori baru)
+    rolling_avg: float # Rata-rata N bulan terakhir (termasuk bulan ini)
+    direction: str # up / down / flat / new
+
+
+def month_periods(end_month: date, months: int):
+    # Daftar "YYYY-MM" dari (months-1) bulan lalu s/d end_month
+    return [p.strftime("%Y-%m") for p in pd.period_range(end=pd.Period(end_month, freq="M"), periods=months, freq="M")]
+
+def category_month_matrix(db: Session, periods, category_type=models.TransactionType.EXPENSE):
+    """
+    DataFrame (index: category_id, kolom: bulan) berisi total per kategori per bulan.
+    """
+    rows = db.execute(rollup.category_month_totals_select(periods[0], periods[-1], category_type)).all()
+    if not rows:
+        return pd.DataFrame(columns=periods, dtype=float), {}
+
+    frame = pd.DataFrame(rows, columns=["category_id", "name", "month_period", "total"])
+    names = dict(zip(frame["category_id"], frame["name"]))
+    matrix = frame.pivot_table(
+        index="category_id", columns="month_period", values="total", aggfunc="sum", fill_value=0.0
+    ).reindex(columns=periods, fill_value=0.0)
+    return matrix, names
+
+def compute_trends(matrix: pd.DataFrame, names, window: int):
+    if matrix.empty or matrix.shape[1] < 2:
+        return {}
+
+    values = matrix.to_numpy(dtype=float)
+    current = values[:, -1]
+    previous = values[:, -2]
+    delta = current - previous
+    pct = np.full(len(current), np.nan)
+    np.divide(delta, previous, out=pct, where=previous > 0)
+    pct *= 100
+    rolling_avg = matrix.T.rolling(window, min_periods=1).mean().T.to_numpy()[:, -1]
+
+    direction = np.select(
+        [previous <= 0, pct >= FLAT_THRESHOLD_PCT, pct <= -FLAT_THRESHOLD_PCT],
+        ["new", "up", "down"],
+        default="flat"
+    )
+
+    trends = {}
+    for i, category_id in enumerate(matrix.index):
+        if current[i] == 0 and previous[i] == 0:
+            continue
+        trends[int(category_id)] = CategoryTrend(
+            category_id=int(category_id),
+            name=names.get(category_id, ""),
+            current=float(current[i]),
+            previous=float(previous[i]),
+            delta=float(delta[i]),
+            pct_change=None if np.isnan(pct[i]) else float(pct[i]),
+            rolling_avg=float(rolling_avg[i]),
+            direction=str(direction[i]),
+        )
+    return trends
+
+
+_cache = OrderedDict() # (keluarga, bulan, months, window, versi data) -> trends
+_cache_lock = threading.Lock()
+_CACHE_SIZE = 8
+
+def category_trends(db: Session, end_month: date = None, months: int = None, window: int = None):
+    """
+    Tren pengeluaran per kategori: {category_id: CategoryTrend}, bulan ini vs bulan lalu.
+    """
+    end_month = end_month or date.today()
+    months = max(2, months or settings.TREND_MONTHS)
+    window = window or settings.TREND_ROLLING_WINDOW
+    key = (tenant_of(db), rollup.month_key(end_month), months, window, data_version.current(db))
+
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    matrix, names = category_month_matrix(db, month_periods(end_month, months))
+    trends = compute_trends(matrix, names, window)
+
+    with _cache_lock:
+        _cache[key] = trends
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return trends
+
+def top_movers(trends, limit: int = 3):
+    # Kategori dengan perubahan nominal terbesar (naik / turun), untuk kartu Analisa Tren
+    movers = [t for t in trends.values() if t.direction in ("up", "down")]
+    return sorted(movers, key=lambda t: abs(t.delta), reverse=True)[:limit]
@@ -0,0 +1,206 @@
+"""
+Multi-keluarga: satu file SQLite per keluarga (shard).
+
+Keluarga "default" memakai database lama (SQLALCHEMY_DATABASE_URL) dan selalu terbuka.
+Keluarga lain disimpan di TENANT_DATA_DIR/<slug>.db. Engine + sessionmaker per shard
+disimpan di pool LRU berukuran TENANT_MAX_OPEN; shard paling lama tidak dipakai (atau
+menganggur > TENANT_IDLE_SECONDS) ditutup (engine.dispose) sehingga jumlah koneksi,
+file descriptor, dan page cache SQLite tetap terbatas berapa pun jumlah keluarganya.
+Migrasi & seed dijalankan sekali per shard per proses, saat shard pertama kali dibuka.
+"""
+from collections import OrderedDict
+from sqlalchemy.orm import Session, sessionmaker
+import logging
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TENANT = "default"
+TENANT_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]{0,39}$")
+
+
+class UnknownTenant(Exception):
+    pass
+
+
+def normalize(name: str) -> str:
+    """
+    Nama keluarga dari form login -> slug shard ("Keluarga Budi" -> "keluarga-budi").
+    Kosong = keluarga default. ValueError jika tidak bisa dijadikan nama file.
+    """
+    slug = re.sub(r"\s+", "-", (name or "").strip().lower())
+    if not slug:
+        return DEFAULT_TENANT
+    if not TENANT_PATTERN.match(slug):
+        raise ValueError("Nama keluarga hanya boleh huruf, angka, spasi, '-' dan '_' (maks 40)")
+    return slug
+
+def tenant_of(db: Session) -> str:
+    # Session dari pool membawa info tenant; session lain (CLI, script) = default
+    return db.info.get("tenant", DEFAULT_TENANT)
+
+
+class Shard:
+    __slots__ = ("tenant", "engine", "session_factory", "last_used")
+
+    def __init__(self, tenant: str, engine, session_factory):
+        self.tenant = tenant
+        self.engine = engine
+        self.session_factory = session_factory
+        self.last_used = time.monotonic()
+
+
+class ShardPool:
+    def __init__(self, default_engine, engine_factory, initializer, directory: str,
+                 max_open: int, idle_seconds: float, auto_create: bool = False):
+        self.engine_factory = engine_factory # url -> engine
+        self.initializer = initializer # (tenant, engine) -> None, migrasi + seed shard baru dibuka
+        self.directory = directory
+        self.max_open = max(1, max_open)
+        self.idle_seconds = idle_seconds
+        self.auto_create = auto_create
+        self.default = Shard(DEFAULT_TENANT, default_engine, sessionmaker(
+            autocommit=False, autoflush=False, bind=default_engine, info={"tenant": DEFAULT_TENANT}
+        ))
+        self._shards = OrderedDict() # tenant -> Shard, urut dari yang paling lama tidak dipakai
+        self._lock = threading.Lock()
+        self._open_locks = {} # tenant -> Lock, agar satu shard tidak dibuka & dimigrasi 2x bersamaan
+        self._initialized = set() # Shard yang sudah dimigrasi di proses ini (tetap berlaku setelah evict)
+        self._evict_hooks = []
+        self.opened = 0
+        self.evicted = 0
+
+    def on_evict(self, hook):
+        """
+        Daftarkan hook(tenant) yang dipanggil saat shard ditutup (buang cache per keluarga).
+        """
+        self._evict_hooks.append(hook)
+        return hook
+
+    def path_for(self, tenant: str) -> str:
+        return os.path.join(self.directory, f"{tenant}.db")
+
+    def exists(self, tenant: str) -> bool:
+        return tenant == DEFAULT_TENANT or os.path.exists(self.path_for(tenant))
+
+    def get(self, tenant: str = DEFAULT_TENANT, create: bool = None) -> Shard:
+        """
+        Shard keluarga (dibuka & dimigrasi jika belum). UnknownTenant jika file belum ada
+        dan pembuatan otomatis tidak diizinkan.
+        """
+        if tenant == DEFAULT_TENANT:
+            return self.default
+
+        with self._lock:
+            shard = self._touch(tenant)
+            if shard is not None:
+                closing = self._pop_evictable()
+            else:
+                open_lock = self._open_locks.setdefault(tenant, threading.Lock())
+        if shard is not None:
+            for old in closing:
+                self._close(old)
+            return shard
+
+        try:
+            with open_lock:
+                with self._lock:
+                    shard = self._touch(tenant)
+                    if shard is not None:
+                        return shard
+                if not TENANT_PATTERN.match(tenant):
+                    raise UnknownTenant(tenant)
+                if not self.exists(tenant) and not (self.auto_create if create is None else create):
+                    raise UnknownTenant(tenant)
+                shard = self._open(tenant)
+
+                with self._lock:
+                    self._shards[tenant] = shard
+                    closing = self._pop_evictable()
+        finally:
+            with self._lock:
+                self._open_locks.pop(tenant, None)
+        for old in closing:
+            self._close(old)
+        return shard
+
+    def session(self, tenant: str = DEFAULT_TENANT) -> Session:
+        return self.get(tenant).session_factory()
+
+    def _touch(self, tenant: str):
+        shard = self._shards.get(tenant)
+        if shard is not None:
+            self._shards.move_to_end(tenant)
+            shard.last_used = time.monotonic()
+        return shard
+
+    def _open(self, tenant: str) -> Shard:
+        os.makedirs(self.directory, exist_ok=True)
+        engine = self.engine_factory(f"sqlite:///{self.path_for(tenant)}")
+        try:
+            if tenant not in self._initialized:
+                self.initializer(tenant, engine)
+                self._initialized.add(tenant)
+        except Exception:
+            engine.dispose()
+            raise
+        self.opened += 1
+        return Shard(tenant, engine, sessionmaker(
+            autocommit=False, autoflush=False, bind=engine, info={"tenant": tenant}
+        ))
+
+    def _pop_evictable(self):
+        # Dipanggil dengan _lock: shard di luar batas LRU + shard yang menganggur terlalu lama
+        closing = []
+        while len(self._shards) > self.max_open:
+            closing.append(self._shards.popitem(last=False)[1])
+        now = time.monotonic()
+        while self._shards:
+            oldest = next(iter(self._shards.values()))
+            if now - oldest.last_used <= self.idle_seconds:
+                break
+            closing.append(self._shards.popitem(last=False)[1])
+        return closing
+
+    def _close(self, shard: Shard):
+        # Koneksi yang masih dipinjam request lain tetap valid dan ditutup saat dikembalikan
+        shard.engine.dispose()
+        self.evicted += 1
+        for hook in self._evict_hooks:
+            try:
+                hook(shard.tenant)
+            except Exception as e:
+                logger.error(f"Hook evict shard {shard.tenant} gagal: {e}")
+
+    def evict_idle(self) -> int:
+        """
+        Tutup shard yang menganggur > idle_seconds (juga dicek otomatis setiap kali shard diambil).
+        """
+        with self._lock:
+            closing = self._pop_evictable()
+        for shard in closing:
+            self._close(shard)
+        return len(closing)
+
+    def close_all(self):
+        with self._lock:
+            closing = list(self._shards.values())
+            self._shards.clear()
+        for shard in closing:
+            self._close(shard)
+
+    def open_tenants(self):
+        with self._lock:
+            return [DEFAULT_TENANT] + list(self._shards)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "open": len(self._shards) + 1,
+                "max_open": self.max_open + 1,
+                "opened": self.opened,
+                "evicted": self.evicted,
+            }
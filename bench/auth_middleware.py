@@ -0,0 +1,103 @@
+"""
+Microbenchmark middleware cek login: request/detik untuk file statis dan Dashboard (/),
+pola lama (@app.middleware("http") / BaseHTTPMiddleware) vs ASGI murni (app/middleware.py).
+Request dikirim in-process lewat httpx.ASGITransport (tanpa jaringan).
+
+    python -m bench.auth_middleware --requests 2000
+    python -m bench.auth_middleware --requests 2000 --concurrency 8
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+
+def legacy_app(routes, secret_key: str):
+    # Salinan pola lama di app/main.py sebelum middleware ASGI murni
+    from fastapi import FastAPI, Request
+    from starlette.middleware.sessions import SessionMiddleware
+    from starlette.responses import RedirectResponse
+
+    app = FastAPI()
+    app.router.routes.extend(routes)
+
+    @app.middleware("http")
+    async def auth_middleware(request: Request, call_next):
+        public_routes = [
+            "/auth/login",
+            "/static",
+            "/favicon.ico",
+            "/manifest.json",
+            "/sw.js",
+            "/docs",
+            "/openapi.json"
+        ]
+        is_public = any(request.url.path.startswith(route) for route in public_routes)
+        user = request.session.get("user")
+        if not is_public and not user:
+            return RedirectResponse(url="/auth/login", status_code=303)
+        return await call_next(request)
+
+    app.add_middleware(SessionMiddleware, secret_key=secret_key, max_age=3600)
+    return app
+
+
+async def measure(app, path: str, total: int, concurrency: int) -> float:
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        r = await client.post("/auth/login", data={"pin": "512323"})
+        assert r.status_code in (200, 303), r.status_code
+        # Pemanasan (render pertama, cache halaman)
+        for _ in range(20):
+            r = await client.get(path)
+            assert r.status_code == 200, (path, r.status_code)
+
+        per_worker = total // concurrency
+
+        async def worker():
+            for _ in range(per_worker):
+                await client.get(path)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return per_worker * concurrency / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--static-path", default="/static/js/sw.js")
+    args = parser.parse_args()
+
+    # Environment harus di-set sebelum modul app di-import (settings dibaca saat import)
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    os.environ["SQLALCHEMY_DATABASE_URL"] = f"sqlite:///{path}"
+
+    from sqlalchemy.orm import Session
+    from app import main as app_main
+    from app.config import settings
+
+    with Session(app_main.engine) as db:
+        app_main.seed_data(db)
+
+    apps = [
+        ("lama (BaseHTTPMiddleware)", legacy_app(app_main.app.router.routes, settings.SECRET_KEY)),
+        ("ASGI murni", app_main.app),
+    ]
+    try:
+        for target in (args.static_path, "/"):
+            for name, app in apps:
+                rps = asyncio.run(measure(app, target, args.requests, args.concurrency))
+                print(f"{target:<20} {name:<28} {rps:8.0f} req/detik")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Ukur pemakaian memori (RSS) saat export ledger besar secara streaming.
+Database sementara diisi N transaksi sintetis, lalu export CSV & Parquet
+dikonsumsi chunk per chunk (seperti StreamingResponse) sambil mencatat RSS.
+
+    python -m bench.export_rss --rows 1000000
+    python -m bench.export_rss --rows 1000000 --format parquet
+"""
+import argparse
+import os
+import random
+import resource
+import tempfile
+import time
+
+
+def rss_mb() -> float:
+    # RSS saat ini (Linux); fallback ke peak RSS
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=["csv", "parquet", "all"], default="all")
+    args = parser.parse_args()
+
+    # Environment harus di-set sebelum modul app di-import (settings dibaca saat import)
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    os.environ["SQLALCHEMY_DATABASE_URL"] = f"sqlite:///{path}"
+
+    from datetime import date, timedelta
+    from sqlalchemy import insert
+    from app.database import Base, engine, SessionLocal
+    from app import models, migrations
+    from app.services import exporter
+
+    Base.metadata.create_all(bind=engine)
+    migrations.run_migrations(engine)
+
+    print(f"Mengisi {args.rows:,} transaksi sintetis...")
+    rnd = random.Random(42)
+    with SessionLocal() as db:
+        db.add_all([
+            models.Category(name="Gaji", category_type=models.TransactionType.INCOME),
+            models.Category(name="Jajan", category_type=models.TransactionType.EXPENSE),
+            models.Wallet(name="Dompet", wallet_type="Cash", initial_balance=0),
+        ])
+        db.commit()
+        start = date(2015, 1, 1)
+        batch = 50_000
+        for offset in range(0, args.rows, batch):
+            db.execute(insert(models.Transaction), [
+                {
+                    "date": start + timedelta(days=rnd.randint(0, 3650)),
+                    "amount": rnd.randint(1, 500) * 1000,
+                    "description": f"transaksi {offset + i}",
+                    "wallet_id": 1,
+                    "category_id": rnd.choice((1, 2)),
+                }
+                for i in range(min(batch, args.rows - offset))
+            ])
+            db.commit()
+
+    formats = ["csv", "parquet"] if args.format == "all" else [args.format]
+    try:
+        for fmt in formats:
+            content_fn = exporter.csv_chunks if fmt == "csv" else exporter.parquet_chunks
+            with SessionLocal() as db:
+                rows = exporter.export_rows(db, date.min, date.max)
+                baseline = rss_mb()
+                peak = baseline
+                total_bytes = 0
+                chunks = 0
+                started = time.perf_counter()
+                for data in content_fn(rows):
+                    total_bytes += len(data) # dibuang, seperti dikirim ke client
+                    chunks += 1
+                    if chunks % 50 == 0:
+                        peak = max(peak, rss_mb())
+                elapsed = time.perf_counter() - started
+                peak = max(peak, rss_mb())
+
+            print(f"[{fmt}] {total_bytes / 1024 / 1024:.1f} MB dalam {chunks} chunk, {elapsed:.1f} detik | "
+                  f"RSS awal {baseline:.0f} MB, puncak {peak:.0f} MB (+{peak - baseline:.0f} MB)")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
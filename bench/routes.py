@@ -0,0 +1,337 @@
+"""
+Benchmark end-to-end semua halaman & endpoint tulis pada ledger sintetis 10k / 100k / 1M transaksi.
+
+Setiap ukuran ledger dijalankan di proses terpisah (settings & engine dibaca saat import,
+RSS tidak tercampur). Request dikirim in-process lewat httpx.ASGITransport (tanpa jaringan).
+Per route dicatat latency p50/p95/p99, jumlah query SQL per request, dan RSS proses.
+Halaman baca diukur dua kali:
+- warm: versi data tetap (cache halaman, trend & proyeksi goal terpakai)
+- cold: versi data dinaikkan sebelum setiap request (semua cache per versi meleset)
+Hasil ditulis ke JSON; --compare mencetak perubahan p50/p95 terhadap hasil run lain.
+
+    python -m bench.routes
+    python -m bench.routes --sizes 10000,100000,1000000 --db-dir data/bench --output bench-main.json
+    python -m bench.routes --sizes 10000 --iterations 50 --compare bench-main.json
+
+Ledger sintetis (bench/synthetic.py) disimpan di --db-dir dan dipakai ulang antar run;
+setiap run bekerja pada salinannya karena endpoint tulis ikut diukur.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date, datetime
+
+
+class Route:
+    __slots__ = ("name", "method", "path", "payload", "expected")
+
+    def __init__(self, name, method, path, payload=None, expected=(200,)):
+        self.name = name
+        self.method = method
+        self.path = path # str atau fungsi (ctx, i) -> str
+        self.payload = payload # fungsi (ctx, i) -> {"data": ...} / {"json": ...}
+        self.expected = expected
+
+
+def _month_start() -> str:
+    return date.today().replace(day=1).isoformat()
+
+def _today() -> str:
+    return date.today().isoformat()
+
+READ_ROUTES = [
+    Route("dashboard", "GET", "/"),
+    Route("reports", "GET", "/reports/"),
+    Route("advisor", "GET", "/reports/advisor"),
+    Route("history", "GET", "/transactions/history"),
+    Route("history_json", "GET", "/transactions/history.json"),
+    Route("export_csv_month", "GET", lambda ctx, i: f"/transactions/export.csv?start_date={_month_start()}"),
+    Route("export_parquet_month", "GET", lambda ctx, i: f"/transactions/export.parquet?start_date={_month_start()}"),
+    Route("add_form", "GET", "/transactions/add"),
+    Route("transfer_form", "GET", "/transactions/transfer"),
+    Route("wallets", "GET", "/wallets/"),
+    Route("balance_history", "GET", "/wallets/balance-history"),
+    Route("wallet_balance_history", "GET", lambda ctx, i: f"/wallets/{ctx['cash']}/balance-history"),
+    Route("adjust_form", "GET", lambda ctx, i: f"/wallets/{ctx['cash']}/adjust"),
+    Route("account", "GET", "/account/"),
+    Route("budgets", "GET", "/budgets/"),
+    Route("budgets_json", "GET", "/budgets/status.json"),
+    Route("bills", "GET", "/bills/"),
+    Route("goals", "GET", "/goals/"),
+    Route("goals_json", "GET", "/goals/projection.json"),
+]
+
+WRITE_ROUTES = [
+    Route("add_transaction", "POST", "/transactions/add", lambda ctx, i: {"data": {
+        "date": _today(), "amount": 25_000 + i, "description": f"Kopi bench {i}",
+        "wallet_id": ctx["cash"], "category_id": ctx["categories"]["Jajan"],
+    }}, expected=(303,)),
+    Route("sync_batch_10", "POST", "/transactions/batch", lambda ctx, i: {"json": {"transactions": [{
+        "date": _today(), "amount": 10_000 + j, "description": f"Offline {i}-{j}",
+        "wallet_id": ctx["cash"], "category_id": ctx["categories"]["Belanja"],
+        "idempotency_key": uuid.uuid4().hex,
+    } for j in range(10)]}}),
+    Route("transfer", "POST", "/transactions/transfer", lambda ctx, i: {"data": {
+        "date": _today(), "amount": 50_000, "source_wallet_id": ctx["bank"],
+        "target_wallet_id": ctx["cash"], "description": f"Tarik tunai {i}",
+    }}, expected=(303,)),
+    Route("adjust_balance", "POST", lambda ctx, i: f"/wallets/{ctx['cash']}/adjust", lambda ctx, i: {"data": {
+        "actual_balance": 1_000_000 + i * 1000, "description": "Opname bench", "date_trx": _today(),
+    }}, expected=(303,)),
+    Route("set_budget", "POST", "/budgets/add", lambda ctx, i: {"data": {
+        "category_id": ctx["categories"]["Makan Luar"], "amount_limit": 1_500_000 + i * 1000,
+        "month_period": _month_start()[:7],
+    }}, expected=(303,)),
+    Route("pay_bill", "POST", lambda ctx, i: f"/bills/{ctx['bill']}/pay", expected=(303,)),
+    Route("edit_goal", "POST", lambda ctx, i: f"/goals/{ctx['goal']}/edit", lambda ctx, i: {"data": {
+        "saved_amount": 5_000_000 + i * 1000,
+    }}, expected=(303,)),
+]
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def percentile(sorted_values, p: float) -> float:
+    # Nearest-rank, cukup untuk puluhan sampai ratusan sampel
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[k]
+
+
+# --- Proses anak: satu ukuran ledger ---
+
+def _setup_context(db, models):
+    categories = {name: cid for cid, name in db.query(models.Category.id, models.Category.name)}
+    wallets = {name: wid for wid, name in db.query(models.Wallet.id, models.Wallet.name)}
+    return {
+        "categories": categories,
+        "cash": wallets["Dompet Tunai"],
+        "bank": wallets.get("Rekening Bank", wallets["Dompet Tunai"]),
+    }
+
+async def _measure_child(app_main, iterations: int, warmup: int):
+    import httpx
+    from sqlalchemy import event
+    from app import models
+    from app.database import engine, SessionLocal
+    from app.services import data_version
+
+    queries = [0]
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        queries[0] += 1
+
+    def bump_version():
+        with SessionLocal() as db:
+            data_version.bump(db)
+            db.commit()
+
+    results = []
+    transport = httpx.ASGITransport(app=app_main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        r = await client.post("/auth/login", data={"pin": "512323"})
+        assert r.status_code == 303, r.status_code
+
+        with SessionLocal() as db:
+            ctx = _setup_context(db, models)
+        # Isi halaman Budget / Tagihan / Goal (tidak diukur)
+        await client.post("/budgets/add", data={
+            "category_id": ctx["categories"]["Jajan"], "amount_limit": 2_000_000, "month_period": _month_start()[:7]
+        })
+        await client.post("/bills/add", data={
+            "name": "Listrik bench", "amount": 400_000, "day_of_month": 10,
+            "category_id": ctx["categories"]["Listrik"], "wallet_id": ctx["bank"],
+        })
+        await client.post("/goals/add", data={"name": "Dana Darurat", "target_amount": 60_000_000, "saved_amount": 5_000_000})
+        with SessionLocal() as db:
+            ctx["bill"] = db.query(models.RecurringBill.id).order_by(models.RecurringBill.id.desc()).first()[0]
+            ctx["goal"] = db.query(models.Goal.id).order_by(models.Goal.id.desc()).first()[0]
+
+        async def run_route(route: Route, mode: str):
+            async def send(i):
+                path = route.path(ctx, i) if callable(route.path) else route.path
+                kwargs = route.payload(ctx, i) if route.payload else {}
+                return await client.request(route.method, path, **kwargs)
+
+            for i in range(warmup):
+                await send(i)
+            rss_before = rss_mb()
+            samples, counts = [], []
+            for i in range(iterations):
+                if mode == "cold":
+                    bump_version()
+                queries[0] = 0
+                started = time.perf_counter()
+                r = await send(warmup + i)
+                samples.append((time.perf_counter() - started) * 1000)
+                counts.append(queries[0])
+                if r.status_code not in route.expected:
+                    raise RuntimeError(f"{route.method} {route.name}: status {r.status_code}")
+
+            samples.sort()
+            counts.sort()
+            rss_after = rss_mb()
+            results.append({
+                "route": route.name,
+                "method": route.method,
+                "path": route.path if isinstance(route.path, str) else route.path(ctx, 0),
+                "mode": mode,
+                "iterations": iterations,
+                "p50_ms": round(percentile(samples, 50), 3),
+                "p95_ms": round(percentile(samples, 95), 3),
+                "p99_ms": round(percentile(samples, 99), 3),
+                "mean_ms": round(sum(samples) / len(samples), 3),
+                "max_ms": round(samples[-1], 3),
+                "queries_per_request": percentile(counts, 50),
+                "queries_max": counts[-1],
+                "rss_mb": round(rss_after, 1),
+                "rss_delta_mb": round(rss_after - rss_before, 1),
+            })
+            row = results[-1]
+            print(f"  {route.method:<4} {route.name:<24} {mode:<5} p50 {row['p50_ms']:>9.2f}  p95 {row['p95_ms']:>9.2f}  "
+                  f"p99 {row['p99_ms']:>9.2f} ms  {row['queries_per_request']:>3} query  RSS {row['rss_mb']:>7.1f} MB",
+                  flush=True)
+
+        for route in READ_ROUTES:
+            for mode in ("warm", "cold"):
+                await run_route(route, mode)
+        for route in WRITE_ROUTES:
+            await run_route(route, "write")
+    return results
+
+def run_child(args):
+    # Environment harus di-set sebelum modul app di-import (settings dibaca saat import)
+    os.environ["SQLALCHEMY_DATABASE_URL"] = f"sqlite:///{args.child_db}"
+    os.environ["BILL_AUTOPOST_ENABLED"] = "0"
+    os.environ["GEMINI_API_KEY"] = ""
+
+    import logging
+    logging.disable(logging.INFO)
+    from app import main as app_main
+
+    started_rss = rss_mb()
+    results = asyncio.run(_measure_child(app_main, args.iterations, args.warmup))
+    with open(args.child_output, "w", encoding="utf-8") as f:
+        json.dump({"rss_start_mb": round(started_rss, 1), "rss_end_mb": round(rss_mb(), 1), "routes": results}, f)
+
+
+# --- Proses utama ---
+
+def ensure_ledger(db_dir: str, transactions: int, seed: int, years: int) -> str:
+    path = os.path.join(db_dir, f"ledger-{transactions}-seed{seed}.db")
+    if not os.path.exists(path):
+        print(f"Membuat ledger sintetis {transactions:,} transaksi -> {path}", flush=True)
+        subprocess.run([
+            sys.executable, "-m", "bench.synthetic", "--transactions", str(transactions),
+            "--db", path, "--seed", str(seed), "--years", str(years),
+        ], check=True, stdout=subprocess.DEVNULL)
+    return path
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+def compare(current: dict, baseline_path: str):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    before = {
+        (run["transactions"], row["route"], row["mode"]): row
+        for run in baseline["runs"] for row in run["routes"]
+    }
+    print(f"\nPerbandingan dengan {baseline_path} ({baseline['meta'].get('commit') or '-'}):")
+    for run in current["runs"]:
+        for row in run["routes"]:
+            old = before.get((run["transactions"], row["route"], row["mode"]))
+            if old is None:
+                continue
+            ratio = row["p95_ms"] / old["p95_ms"] if old["p95_ms"] else 0.0
+            flag = "  <-- lebih lambat" if ratio > 1.2 else ""
+            print(f"  {run['transactions']:>8,} {row['route']:<24} {row['mode']:<5} "
+                  f"p50 {old['p50_ms']:>9.2f} -> {row['p50_ms']:>9.2f}  p95 {old['p95_ms']:>9.2f} -> {row['p95_ms']:>9.2f} ms "
+                  f"(x{ratio:.2f})  query {old['queries_per_request']} -> {row['queries_per_request']}{flag}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000", help="Jumlah transaksi per ledger, pisahkan dengan koma")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--db-dir", help="Folder ledger sintetis (dipakai ulang antar run); default folder sementara")
+    parser.add_argument("--output", default="bench_routes.json")
+    parser.add_argument("--compare", help="File JSON hasil run sebelumnya")
+    parser.add_argument("--child-db", help=argparse.SUPPRESS)
+    parser.add_argument("--child-output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child_db:
+        run_child(args)
+        return
+
+    sizes = [int(s.replace("_", "")) for s in args.sizes.split(",") if s.strip()]
+    db_dir = args.db_dir or tempfile.mkdtemp(prefix="bench-ledger-")
+    os.makedirs(db_dir, exist_ok=True)
+    workdir = tempfile.mkdtemp(prefix="bench-routes-")
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "seed": args.seed,
+            "years": args.years,
+        },
+        "runs": [],
+    }
+    try:
+        for size in sizes:
+            source = ensure_ledger(db_dir, size, args.seed, args.years)
+            working = os.path.join(workdir, os.path.basename(source))
+            shutil.copyfile(source, working)
+            child_output = os.path.join(workdir, f"result-{size}.json")
+            print(f"\nLedger {size:,} transaksi ({os.path.getsize(source) / 1024 / 1024:.1f} MB)", flush=True)
+            subprocess.run([
+                sys.executable, "-m", "bench.routes", "--child-db", working, "--child-output", child_output,
+                "--iterations", str(args.iterations), "--warmup", str(args.warmup),
+            ], check=True)
+            with open(child_output, encoding="utf-8") as f:
+                child = json.load(f)
+            report["runs"].append({
+                "transactions": size,
+                "db_size_mb": round(os.path.getsize(source) / 1024 / 1024, 1),
+                **child,
+            })
+            os.remove(working)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        if not args.db_dir:
+            shutil.rmtree(db_dir, ignore_errors=True)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nHasil disimpan di {args.output}")
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark reader/writer bersamaan untuk profil engine SQLite.
+
+Mensimulasikan beberapa HP keluarga yang mencatat transaksi sambil yang lain
+membuka dashboard, lalu membandingkan profil "default" vs "concurrent" (WAL).
+
+    python -m bench.sqlite_concurrency --writers 4 --readers 8 --seconds 5
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import date
+from sqlalchemy import func, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, create_db_engine
+from app import models
+
+
+def _prepare(engine):
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(models.Category.__table__.insert(), [
+            {"name": "Gaji", "category_type": "INCOME"},
+            {"name": "Jajan", "category_type": "EXPENSE", "priority_group": "LIFESTYLE"},
+        ])
+        conn.execute(models.Wallet.__table__.insert(), [{"name": "Dompet", "wallet_type": "Cash", "initial_balance": 0}])
+
+
+def run_profile(profile: str, writers: int, readers: int, seconds: float):
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_db_engine(f"sqlite:///{path}", profile=profile)
+    Session = sessionmaker(bind=engine)
+    _prepare(engine)
+
+    stop = threading.Event()
+    counts = {"writes": 0, "reads": 0, "locked": 0}
+    lock = threading.Lock()
+
+    def writer():
+        while not stop.is_set():
+            db = Session()
+            try:
+                db.add(models.Transaction(date=date.today(), amount=1000, wallet_id=1, category_id=2))
+                db.execute(text("UPDATE wallets SET initial_balance = initial_balance - 1000 WHERE id = 1"))
+                db.commit()
+                with lock:
+                    counts["writes"] += 1
+            except OperationalError:
+                db.rollback()
+                with lock:
+                    counts["locked"] += 1
+            finally:
+                db.close()
+
+    def reader():
+        while not stop.is_set():
+            db = Session()
+            try:
+                db.query(func.sum(models.Transaction.amount)).scalar()
+                with lock:
+                    counts["reads"] += 1
+            except OperationalError:
+                with lock:
+                    counts["locked"] += 1
+            finally:
+                db.close()
+
+    threads = [threading.Thread(target=writer) for _ in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    return {
+        "profile": profile,
+        "writes_per_sec": counts["writes"] / seconds,
+        "reads_per_sec": counts["reads"] / seconds,
+        "locked_errors": counts["locked"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    for profile in ("default", "concurrent"):
+        r = run_profile(profile, args.writers, args.readers, args.seconds)
+        print(f"{r['profile']:>10}: {r['writes_per_sec']:8.1f} write/s  {r['reads_per_sec']:8.1f} read/s  "
+              f"{r['locked_errors']} 'database is locked'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Generator ledger sintetis (seeded, hasil sama untuk seed yang sama) untuk benchmark.
+
+Memakai kategori & dompet dari seed_data ditambah satu rekening bank, lalu mengisi
+N transaksi dengan pola rumah tangga: gaji & tagihan tetap (KPR, listrik, internet,
+langganan) tiap bulan, THR tiap tahun, dan sisanya belanja harian (warung, bensin,
+kopi, makan luar) dengan nominal log-normal. Data masuk lewat importer mutasi
+(CSV), jadi jurnal, saldo, rollup & counter budget ikut konsisten.
+
+    python -m bench.synthetic --transactions 100000 --db data/bench-100k.db
+    python -m bench.synthetic --transactions 1000000 --db data/bench-1m.db --years 5
+"""
+import argparse
+import csv
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+BANK_WALLET = "Rekening Bank"
+
+# (kategori, tanggal, deskripsi, nominal rata-rata, dompet)
+MONTHLY_BILLS = [
+    ("Langganan Digital", 1, "Netflix", 186_000, BANK_WALLET),
+    ("KPR", 5, "Angsuran Rumah KPR", 4_500_000, BANK_WALLET),
+    ("Listrik", 10, "Token PLN", 400_000, BANK_WALLET),
+    ("Pulsa/Internet", 15, "Indihome", 380_000, BANK_WALLET),
+]
+SALARY_DAY = 25
+BONUS_MONTH = 3 # THR
+
+# kategori -> (bobot frekuensi, nominal median, merchant, peluang bayar tunai)
+DAILY_SPENDING = {
+    "Belanja": (0.25, 150_000, ["Indomaret", "Alfamart", "Superindo", "Pasar Pagi", "Hypermart"], 0.4),
+    "Bensin/Transport": (0.30, 45_000, ["Pertamina", "Shell", "Gojek", "Grab", "KRL", "Tol"], 0.5),
+    "Jajan": (0.30, 30_000, ["Kopi Kenangan", "Janji Jiwa", "Starbucks", "Kopi Tetangga"], 0.7),
+    "Makan Luar": (0.15, 85_000, ["GoFood", "GrabFood", "ShopeeFood", "Resto Padang"], 0.3),
+}
+
+
+def month_starts(first: date, last: date):
+    current = date(first.year, first.month, 1)
+    while current <= last:
+        yield current
+        current = date(current.year + (current.month == 12), current.month % 12 + 1, 1)
+
+def _day(month: date, day: int) -> date:
+    # Tanggal di bulan itu, dipotong ke akhir bulan (mis. tanggal 31 di Februari)
+    next_month = date(month.year + (month.month == 12), month.month % 12 + 1, 1)
+    return min(month.replace(day=1) + timedelta(days=day - 1), next_month - timedelta(days=1))
+
+def _rupiah(value: float) -> int:
+    return max(500, int(round(value / 500.0)) * 500)
+
+
+def generate_records(transactions: int, seed: int = 42, years: int = 3, today: date = None):
+    """
+    List record (tanggal, nominal bertanda, deskripsi, dompet, kategori) urut tanggal.
+    Nominal negatif = pengeluaran. Pemasukan tiap bulan menutup pengeluaran bulan itu
+    per dompet (+5-30%), jadi saldo tumbuh wajar.
+    """
+    import numpy as np
+
+    today = today or date.today()
+    rng = np.random.default_rng(seed)
+    first = date(today.year - years, today.month, 1)
+    span_days = (today - first).days + 1
+    months = list(month_starts(first, today))
+
+    fixed = []
+    for month in months:
+        for category, day, description, amount, wallet in MONTHLY_BILLS:
+            tx_date = _day(month, day)
+            if tx_date <= today:
+                fixed.append((tx_date, -_rupiah(amount * rng.uniform(0.9, 1.1)), description, wallet, category))
+    income_rows = len(months) * 2 + years # Gaji (bank) + uang belanja (tunai) per bulan, THR per tahun
+    variable = max(0, transactions - len(fixed) - income_rows)
+
+    names = list(DAILY_SPENDING)
+    weights = np.array([DAILY_SPENDING[n][0] for n in names])
+    picks = rng.choice(len(names), size=variable, p=weights / weights.sum())
+    offsets = rng.integers(0, span_days, size=variable)
+    noise = rng.lognormal(0.0, 0.5, size=variable)
+    merchant_index = rng.integers(0, 1_000_000, size=variable)
+    cash = rng.random(size=variable)
+
+    records = list(fixed)
+    for pick, offset, factor, merchant, paid_cash in zip(picks, offsets, noise, merchant_index, cash):
+        category = names[pick]
+        _, median, merchants, cash_share = DAILY_SPENDING[category]
+        records.append((
+            first + timedelta(days=int(offset)),
+            -_rupiah(median * factor),
+            merchants[merchant % len(merchants)],
+            "Dompet Tunai" if paid_cash < cash_share else BANK_WALLET,
+            category,
+        ))
+
+    spent = {} # (bulan, dompet) -> total pengeluaran
+    for tx_date, amount, _, wallet, _ in records:
+        key = (tx_date.replace(day=1), wallet)
+        spent[key] = spent.get(key, 0) - amount
+    for month in months:
+        payday = _day(month, SALARY_DAY)
+        if payday > today:
+            payday = today
+        bank = spent.get((month, BANK_WALLET), 0)
+        cash_need = spent.get((month, "Dompet Tunai"), 0)
+        records.append((payday, _rupiah(max(bank, 1_000_000) * rng.uniform(1.05, 1.3)), "Gaji Bulanan", BANK_WALLET, "Gaji Bulanan"))
+        records.append((month, _rupiah(max(cash_need, 100_000) * rng.uniform(1.05, 1.3)), "Uang Belanja", "Dompet Tunai", "Gaji Bulanan"))
+        if month.month == BONUS_MONTH and month != months[0]:
+            records.append((_day(month, 20), _rupiah(rng.uniform(8, 12) * 1_000_000), "THR", BANK_WALLET, "Bonus/THR"))
+
+    records.sort(key=lambda r: r[0])
+    return records[:transactions]
+
+def ensure_reference_data(db):
+    """
+    Kategori & dompet dari seed_data, plus rekening bank (target transfer di benchmark).
+    """
+    from app import models
+    from app.seed import seed_data
+    from app.services import refdata
+
+    seed_data(db)
+    if not db.query(models.Wallet).filter(models.Wallet.name == BANK_WALLET).first():
+        db.add(models.Wallet(name=BANK_WALLET, wallet_type="Bank", initial_balance=0))
+        db.commit()
+        refdata.cache.invalidate(db)
+
+def populate(db, transactions: int, seed: int = 42, years: int = 3, today: date = None):
+    """
+    Isi database (session db) dengan ledger sintetis lewat importer. Return ImportResult.
+    """
+    from app.services import importer
+
+    ensure_reference_data(db)
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["tanggal", "nominal", "keterangan", "dompet", "kategori"])
+            for tx_date, amount, description, wallet, category in generate_records(transactions, seed, years, today):
+                writer.writerow([tx_date.strftime("%d/%m/%Y"), amount, description, wallet, category])
+        return importer.import_statement(db, path, "csv")
+    finally:
+        os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--transactions", type=int, default=10_000)
+    parser.add_argument("--db", required=True, help="Path file SQLite tujuan (dibuat jika belum ada)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--years", type=int, default=3)
+    args = parser.parse_args()
+
+    # Environment harus di-set sebelum modul app di-import (settings dibaca saat import)
+    os.environ["SQLALCHEMY_DATABASE_URL"] = f"sqlite:///{os.path.abspath(args.db)}"
+    from app.database import Base, engine, SessionLocal
+    from app import migrations
+    from app.services import data_version # noqa: F401 (listener versi data)
+
+    Base.metadata.create_all(bind=engine)
+    migrations.run_migrations(engine)
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        result = populate(db, args.transactions, args.seed, args.years)
+    print(f"✅ {result.imported:,} transaksi sintetis ({result.duplicates} duplikat, {result.skipped} dilewati) "
+          f"di {args.db} dalam {time.perf_counter() - started:.1f} detik")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Load test multi-keluarga: N keluarga (default 1000), masing-masing login (shard dibuat,
+dimigrasi & di-seed saat pertama dibuka), mencatat 1 transaksi, lalu membuka Dashboard.
+Setelah itu keluarga acak dikunjungi ulang. RSS proses & jumlah file descriptor terbuka
+dicetak berkala: keduanya harus mendatar setelah pool shard (TENANT_MAX_OPEN) penuh,
+bukan naik terus sebanding jumlah keluarga.
+Request dikirim in-process lewat httpx.ASGITransport (tanpa jaringan).
+
+    python -m bench.tenants --tenants 1000
+    python -m bench.tenants --tenants 1000 --max-open 64 --revisits 2000
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import tempfile
+import time
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def open_fds() -> int:
+    return len(os.listdir("/proc/self/fd"))
+
+
+async def visit(client, tenant: str, tx_date: str):
+    r = await client.post("/auth/login", data={"pin": "512323", "family": tenant})
+    assert r.status_code == 303, (tenant, r.status_code)
+    r = await client.post("/transactions/add", data={
+        "date": tx_date, "amount": random.randint(5, 500) * 1000, "description": f"Belanja {tenant}",
+        "wallet_id": 1, "category_id": 3,
+    })
+    assert r.status_code == 303, (tenant, r.status_code)
+    r = await client.get("/")
+    assert r.status_code == 200 and f"Belanja {tenant}" in r.text, (tenant, r.status_code)
+
+
+async def run(app, shards, tenants: int, revisits: int, report_every: int):
+    import httpx
+    from datetime import date
+
+    today = date.today().isoformat()
+    names = [f"keluarga-{i:04d}" for i in range(tenants)]
+    peak_rss, peak_fds = 0.0, 0
+
+    def report(label: str, done: int, started: float):
+        nonlocal peak_rss, peak_fds
+        rss, fds = rss_mb(), open_fds()
+        peak_rss, peak_fds = max(peak_rss, rss), max(peak_fds, fds)
+        stats = shards.stats()
+        print(f"{label:<9} {done:>6} {time.perf_counter() - started:>8.1f} {rss:>9.1f} {fds:>5} "
+              f"{stats['open']:>5} {stats['evicted']:>7}")
+
+    print(f"{'fase':<9} {'jumlah':>6} {'detik':>8} {'RSS (MB)':>9} {'FD':>5} {'shard':>5} {'evicted':>7}")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        report("awal", 0, time.perf_counter())
+        started = time.perf_counter()
+        for i, name in enumerate(names, 1):
+            await visit(client, name, today)
+            if i % report_every == 0:
+                report("baru", i, started)
+
+        started = time.perf_counter()
+        for i in range(1, revisits + 1):
+            await visit(client, random.choice(names), today)
+            if i % report_every == 0:
+                report("ulang", i, started)
+
+    print(f"Puncak: RSS {peak_rss:.1f} MB, {peak_fds} file descriptor untuk {tenants} keluarga "
+          f"(shard terbuka maks {shards.stats()['max_open']}).")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tenants", type=int, default=1000)
+    parser.add_argument("--revisits", type=int, default=1000)
+    parser.add_argument("--max-open", type=int, default=32)
+    parser.add_argument("--report-every", type=int, default=100)
+    args = parser.parse_args()
+
+    # Environment harus di-set sebelum modul app di-import (settings dibaca saat import)
+    workdir = tempfile.mkdtemp(prefix="tenants-")
+    os.environ["SQLALCHEMY_DATABASE_URL"] = f"sqlite:///{workdir}/default.db"
+    os.environ["TENANT_DATA_DIR"] = os.path.join(workdir, "tenants")
+    os.environ["TENANT_MAX_OPEN"] = str(args.max_open)
+    os.environ["TENANT_AUTO_CREATE"] = "1"
+    os.environ["BILL_AUTOPOST_ENABLED"] = "0"
+
+    import logging
+    logging.disable(logging.INFO)
+    from app import main as app_main
+    from app.database import shards
+
+    random.seed(42)
+    try:
+        asyncio.run(run(app_main.app, shards, args.tenants, args.revisits, args.report_every))
+    finally:
+        shards.close_all()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
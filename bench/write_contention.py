@@ -0,0 +1,104 @@
+"""
+Stress test jalur tulis: banyak thread mencatat transaksi ke dompet yang sama,
+lalu cek saldo akhir dompet == saldo menurut ledger (tabel transaksi).
+
+    python -m bench.write_contention --threads 16 --per-thread 200
+    python -m bench.write_contention --group-commit
+
+Mode --naive menjalankan pola lama (SELECT wallet, lalu saldo += amount di Python)
+untuk memperlihatkan lost update.
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--per-thread", type=int, default=200)
+    parser.add_argument("--group-commit", action="store_true")
+    parser.add_argument("--naive", action="store_true")
+    args = parser.parse_args()
+
+    # Environment harus di-set sebelum modul app di-import (settings dibaca saat import)
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    os.environ["SQLALCHEMY_DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["GROUP_COMMIT_ENABLED"] = "1" if args.group_commit else "0"
+
+    from datetime import date
+    from sqlalchemy import func
+    from app.database import Base, engine, SessionLocal
+    from app import models, migrations
+    from app.routers.transactions import create_transaction
+
+    Base.metadata.create_all(bind=engine)
+    migrations.run_migrations(engine)
+    with SessionLocal() as db:
+        db.add_all([
+            models.Category(name="Gaji", category_type=models.TransactionType.INCOME),
+            models.Category(name="Jajan", category_type=models.TransactionType.EXPENSE),
+            models.Wallet(name="Dompet", wallet_type="Cash", initial_balance=0),
+        ])
+        db.commit()
+
+    def naive_post(db, amount, category_id):
+        # Pola lama: read-modify-write di Python
+        wallet = db.query(models.Wallet).filter(models.Wallet.id == 1).first()
+        category = db.query(models.Category).filter(models.Category.id == category_id).first()
+        db.add(models.Transaction(date=date.today(), amount=amount, wallet_id=1, category_id=category_id))
+        if category.category_type == models.TransactionType.EXPENSE:
+            wallet.initial_balance -= amount
+        else:
+            wallet.initial_balance += amount
+        db.commit()
+
+    errors = []
+
+    def worker(seed):
+        rnd = random.Random(seed)
+        for _ in range(args.per_thread):
+            amount = float(rnd.randint(1, 100) * 1000)
+            category_id = rnd.choice([1, 2])
+            db = SessionLocal()
+            try:
+                if args.naive:
+                    naive_post(db, amount, category_id)
+                else:
+                    create_transaction(date=date.today(), amount=amount, description=None,
+                                       wallet_id=1, category_id=category_id, db=db)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                db.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    with SessionLocal() as db:
+        balance = db.query(models.Wallet.initial_balance).filter(models.Wallet.id == 1).scalar()
+        income = db.query(func.sum(models.Transaction.amount)).filter(models.Transaction.category_id == 1).scalar() or 0
+        expense = db.query(func.sum(models.Transaction.amount)).filter(models.Transaction.category_id == 2).scalar() or 0
+        count = db.query(func.count(models.Transaction.id)).scalar()
+
+    engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    mode = "naive" if args.naive else ("group-commit" if args.group_commit else "atomic")
+    print(f"mode={mode} transaksi={count} waktu={elapsed:.2f}s ({count / elapsed:.0f} tx/s) error={len(errors)}")
+    print(f"saldo dompet={balance:,.0f} ledger={income - expense:,.0f} -> {'COCOK' if abs(balance - (income - expense)) < 0.01 else 'SELISIH'}")
+
+
+if __name__ == "__main__":
+    main()
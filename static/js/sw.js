@@ -0,0 +1,224 @@
+// Service Worker Family Finance
+// - App shell (halaman utama & form input + aset statis) di-cache agar tetap bisa dibuka saat offline.
+// - Form "Catat Transaksi" yang gagal terkirim (offline) disimpan di IndexedDB,
+//   lalu dikirim sekaligus ke POST /transactions/batch saat online kembali.
+//   Setiap item punya idempotency key, jadi kirim ulang tidak pernah mencatat dua kali.
+//   Form dengan foto struk tidak diantrikan (foto tidak bisa ikut batch JSON).
+
+const SHELL_CACHE = 'ff-shell-v1';
+const RUNTIME_CACHE = 'ff-runtime-v1';
+const SHELL_PAGES = ['/', '/transactions/add'];
+const SYNC_TAG = 'ff-sync-transactions';
+const BATCH_SIZE = 200;
+
+const DB_NAME = 'family-finance';
+const STORE = 'outbox';
+
+// ---------- IndexedDB (antrian transaksi offline) ----------
+
+function openDb() {
+    return new Promise((resolve, reject) => {
+        const req = indexedDB.open(DB_NAME, 1);
+        req.onupgradeneeded = () => {
+            req.result.createObjectStore(STORE, { keyPath: 'idempotency_key' });
+        };
+        req.onsuccess = () => resolve(req.result);
+        req.onerror = () => reject(req.error);
+    });
+}
+
+function withStore(mode, fn) {
+    return openDb().then(db => new Promise((resolve, reject) => {
+        const tx = db.transaction(STORE, mode);
+        const result = fn(tx.objectStore(STORE));
+        tx.oncomplete = () => { db.close(); resolve(result && result.result !== undefined ? result.result : result); };
+        tx.onerror = () => { db.close(); reject(tx.error); };
+    }));
+}
+
+const outbox = {
+    add: item => withStore('readwrite', store => store.put(item)),
+    all: () => withStore('readonly', store => store.getAll()),
+    count: () => withStore('readonly', store => store.count()),
+    remove: keys => withStore('readwrite', store => keys.forEach(key => store.delete(key))),
+};
+
+function newKey() {
+    if (self.crypto && crypto.randomUUID) return crypto.randomUUID();
+    return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2, 12);
+}
+
+// ---------- Install / Activate ----------
+
+self.addEventListener('install', event => {
+    event.waitUntil(
+        caches.open(SHELL_CACHE).then(cache => Promise.all(SHELL_PAGES.map(url =>
+            fetch(url, { credentials: 'same-origin' })
+                .then(res => cacheablePage(res) ? cache.put(url, res) : null)
+                .catch(() => null)
+        ))).then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil(
+        caches.keys()
+            .then(keys => Promise.all(keys
+                .filter(key => key !== SHELL_CACHE && key !== RUNTIME_CACHE)
+                .map(key => caches.delete(key))))
+            .then(() => self.clients.claim())
+    );
+});
+
+// Jangan cache halaman login (hasil redirect saat sesi habis)
+function cacheablePage(res) {
+    return res && res.ok && !res.redirected && res.type === 'basic';
+}
+
+// ---------- Fetch ----------
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    const url = new URL(request.url);
+
+    if (request.method === 'POST' && url.pathname === '/transactions/add') {
+        event.respondWith(postOrQueue(request));
+        return;
+    }
+    if (request.method !== 'GET') return;
+
+    if (request.mode === 'navigate') {
+        event.respondWith(networkFirst(request));
+    } else if (url.pathname.startsWith('/static/') || url.origin !== self.location.origin) {
+        // Aset statis & CDN (Tailwind, ikon, font): cache dulu, update di belakang
+        event.respondWith(staleWhileRevalidate(request));
+    }
+});
+
+function networkFirst(request) {
+    const url = new URL(request.url);
+    return fetch(request)
+        .then(res => {
+            if (cacheablePage(res) && SHELL_PAGES.includes(url.pathname) && !url.search) {
+                const copy = res.clone();
+                caches.open(SHELL_CACHE).then(cache => cache.put(url.pathname, copy));
+            }
+            return res;
+        })
+        .catch(() => caches.match(url.pathname, { cacheName: SHELL_CACHE })
+            .then(cached => cached || caches.match('/', { cacheName: SHELL_CACHE }))
+            .then(cached => cached || new Response('Sedang offline', { status: 503, headers: { 'Content-Type': 'text/plain; charset=utf-8' } })));
+}
+
+function staleWhileRevalidate(request) {
+    return caches.open(RUNTIME_CACHE).then(cache => cache.match(request).then(cached => {
+        const network = fetch(request)
+            .then(res => {
+                if (res && (res.ok || res.type === 'opaque')) cache.put(request, res.clone());
+                return res;
+            })
+            .catch(() => cached);
+        return cached || network;
+    }));
+}
+
+// Form transaksi: kirim biasa jika online; jika jaringan gagal, masukkan antrian
+function postOrQueue(request) {
+    const copy = request.clone();
+    return fetch(request).catch(() => copy.formData().then(form => {
+        const amount = parseFloat(form.get('amount'));
+        if (!(amount > 0) || !form.get('date')) {
+            return new Response('Data transaksi tidak valid', { status: 400 });
+        }
+        // Foto struk tidak ikut antrian (JSON batch): jangan simpan transaksinya tanpa foto diam-diam
+        const receipt = form.get('receipt');
+        if (receipt && receipt.size > 0) {
+            return new Response(
+                'Sedang offline: transaksi dengan foto struk belum bisa disimpan. ' +
+                'Kembali lalu kirim ulang saat online, atau hapus fotonya agar masuk antrian offline.',
+                { status: 503, headers: { 'Content-Type': 'text/plain; charset=utf-8' } });
+        }
+        return outbox.add({
+            idempotency_key: form.get('idempotency_key') || newKey(),
+            date: form.get('date'),
+            amount: amount,
+            description: form.get('description') || null,
+            wallet_id: parseInt(form.get('wallet_id'), 10),
+            category_id: parseInt(form.get('category_id'), 10),
+            queued_at: Date.now(),
+        })
+            .then(registerSync)
+            .then(notifyClients)
+            .then(() => Response.redirect('/?queued=1', 303));
+    }));
+}
+
+// ---------- Sinkronisasi antrian ----------
+
+function registerSync() {
+    if (self.registration.sync) {
+        return self.registration.sync.register(SYNC_TAG).catch(() => null);
+    }
+}
+
+self.addEventListener('sync', event => {
+    if (event.tag === SYNC_TAG) event.waitUntil(flushOutbox());
+});
+
+// Halaman mengirim pesan saat dibuka / kembali online (browser tanpa Background Sync)
+self.addEventListener('message', event => {
+    if (event.data && event.data.type === 'flush') {
+        event.waitUntil(flushOutbox());
+    }
+});
+
+let flushing = null;
+
+function flushOutbox() {
+    // Satu flush pada satu waktu; pemanggil berikutnya menunggu flush yang sedang berjalan
+    if (!flushing) {
+        flushing = doFlush().finally(() => { flushing = null; });
+    }
+    return flushing;
+}
+
+async function doFlush() {
+    let items = await outbox.all();
+    let applied = 0;
+    let rejected = [];
+
+    while (items.length) {
+        const batch = items.slice(0, BATCH_SIZE);
+        items = items.slice(BATCH_SIZE);
+
+        let res;
+        try {
+            res = await fetch('/transactions/batch', {
+                method: 'POST',
+                credentials: 'same-origin',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({
+                    transactions: batch.map(({ queued_at, ...item }) => item),
+                }),
+            });
+        } catch (e) {
+            break; // Masih offline: coba lagi nanti
+        }
+        // Sesi habis (redirect ke login) atau server error: antrian tetap disimpan
+        const isJson = (res.headers.get('Content-Type') || '').includes('application/json');
+        if (!res.ok || res.redirected || !isJson) break;
+
+        const body = await res.json();
+        await outbox.remove(body.results.map(r => r.idempotency_key));
+        applied += body.applied;
+        rejected = rejected.concat(body.results.filter(r => r.status === 'rejected'));
+    }
+
+    await notifyClients({ applied, rejected });
+}
+
+async function notifyClients(result) {
+    const pending = await outbox.count();
+    const clients = await self.clients.matchAll({ type: 'window' });
+    clients.forEach(client => client.postMessage({ type: 'outbox', pending, ...(result || {}) }));
+}
@@ -0,0 +1,44 @@
+"""
+Setting dibaca saat modul app di-import, jadi environment test di-set di sini,
+sebelum file test mana pun meng-import app: database & folder data sementara,
+scheduler tagihan dan Gemini dimatikan.
+"""
+import os
+import shutil
+import tempfile
+
+import pytest
+
+_DATA_DIR = tempfile.mkdtemp(prefix="finance-test-")
+os.environ.update({
+    "SQLALCHEMY_DATABASE_URL": f"sqlite:///{_DATA_DIR}/finance.db",
+    "TENANT_DATA_DIR": os.path.join(_DATA_DIR, "tenants"),
+    "RECEIPT_DIR": os.path.join(_DATA_DIR, "receipts"),
+    "BILL_AUTOPOST_ENABLED": "0",
+    "GEMINI_API_KEY": "",
+    "ADMIN_PIN": "512323",
+    "SLOW_QUERY_MS": "0",
+})
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_DATA_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def memory_db():
+    """
+    Session ke database SQLite in-memory baru: tabel dibuat, migrasi diterapkan.
+    """
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from sqlalchemy.pool import StaticPool
+    from app import migrations
+    from app.database import Base
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    migrations.run_migrations(engine)
+    with Session(engine) as db:
+        yield db
+    engine.dispose()
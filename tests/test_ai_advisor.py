@@ -0,0 +1,136 @@
+"""
+AdvisorService dengan client Gemini palsu, jam & sleep palsu: retry, circuit breaker
+dan reload context.txt. Tidak ada panggilan jaringan.
+"""
+import os
+from types import SimpleNamespace
+
+import pytest
+from google.genai import errors
+
+from app.services.ai_advisor import AdvisorError, AdvisorService, CircuitBreaker, CircuitOpenError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeClient:
+    """
+    Pengganti genai.Client: tiap panggilan generate_content mengambil hasil berikutnya
+    dari `outcomes` (Exception di-raise, string dijadikan response.text).
+    """
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+        self.models = SimpleNamespace(generate_content=self.generate_content)
+
+    def generate_content(self, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else "Saran AI"
+        if isinstance(outcome, Exception):
+            raise outcome
+        return SimpleNamespace(text=outcome)
+
+
+def api_error(cls, code: int):
+    return cls(code, {"error": {"code": code, "message": "test", "status": "TEST"}})
+
+def make_advisor(client, clock, tmp_path, max_attempts: int = 3, breaker=None):
+    return AdvisorService(
+        api_key="test-key",
+        context_path=str(tmp_path / "context.txt"),
+        max_attempts=max_attempts,
+        breaker=breaker or CircuitBreaker(threshold=5, cooldown=60, clock=clock),
+        client=client,
+        clock=clock,
+        sleep=clock.sleep,
+    )
+
+def ask(advisor):
+    return advisor.generate(1_000_000, 400_000, [{"name": "Belanja", "total": 200_000}])
+
+
+@pytest.mark.parametrize("error", [
+    api_error(errors.ClientError, 429),
+    api_error(errors.ServerError, 500),
+    api_error(errors.ServerError, 503),
+])
+def test_retries_rate_limit_and_server_errors(tmp_path, error):
+    clock = FakeClock()
+    client = FakeClient([error, error, "Saran AI"])
+    assert ask(make_advisor(client, clock, tmp_path)) == "Saran AI"
+    assert client.calls == 3
+    assert len(clock.sleeps) == 2
+
+def test_retries_are_capped(tmp_path):
+    clock = FakeClock()
+    client = FakeClient([api_error(errors.ServerError, 503)] * 10)
+    with pytest.raises(AdvisorError):
+        ask(make_advisor(client, clock, tmp_path, max_attempts=3))
+    assert client.calls == 3
+    assert len(clock.sleeps) == 2
+
+@pytest.mark.parametrize("code", [400, 401, 403, 404])
+def test_client_errors_are_not_retried(tmp_path, code):
+    clock = FakeClock()
+    client = FakeClient([api_error(errors.ClientError, code), "Saran AI"])
+    with pytest.raises(AdvisorError):
+        ask(make_advisor(client, clock, tmp_path))
+    assert client.calls == 1
+    assert clock.sleeps == []
+
+def test_breaker_opens_after_failures_and_half_opens_after_cooldown(tmp_path):
+    clock = FakeClock()
+    breaker = CircuitBreaker(threshold=2, cooldown=60, clock=clock)
+    client = FakeClient([api_error(errors.ClientError, 400)] * 3)
+    advisor = make_advisor(client, clock, tmp_path, breaker=breaker)
+
+    for _ in range(2):
+        with pytest.raises(AdvisorError):
+            ask(advisor)
+    # Terbuka: fail fast tanpa memanggil Gemini
+    with pytest.raises(CircuitOpenError):
+        ask(advisor)
+    assert client.calls == 2
+
+    # Setelah cooldown: satu percobaan (half-open), gagal -> terbuka lagi
+    clock.now += 61
+    with pytest.raises(AdvisorError):
+        ask(advisor)
+    assert client.calls == 3
+    with pytest.raises(CircuitOpenError):
+        ask(advisor)
+
+    # Percobaan berikutnya berhasil -> tertutup
+    clock.now += 61
+    assert ask(advisor) == "Saran AI"
+    assert ask(advisor) == "Saran AI"
+    assert breaker.failures == 0 and breaker.opened_at is None
+
+def test_context_reloaded_when_mtime_changes(tmp_path):
+    context_file = tmp_path / "context.txt"
+    context_file.write_text("Keluarga A", encoding="utf-8")
+    os.utime(context_file, (1_000, 1_000))
+    advisor = make_advisor(FakeClient([]), FakeClock(), tmp_path)
+    assert advisor.user_context() == "Keluarga A"
+    first_hash = advisor.context_hash()
+
+    # Isi berubah tapi mtime sama: masih dari cache
+    context_file.write_text("Keluarga B", encoding="utf-8")
+    os.utime(context_file, (1_000, 1_000))
+    assert advisor.user_context() == "Keluarga A"
+
+    os.utime(context_file, (2_000, 2_000))
+    assert advisor.user_context() == "Keluarga B"
+    assert advisor.context_hash() != first_hash
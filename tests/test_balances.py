@@ -0,0 +1,89 @@
+"""
+Checkpoint saldo akhir bulan dibuat di write path; GET riwayat saldo hanya membaca
+(tidak menulis checkpoint, tidak menaikkan versi data / ETag).
+"""
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import models
+from app.database import SessionLocal
+from app.main import app
+from app.services import balances, data_version, ledger
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        response = client.post("/auth/login", data={"pin": "512323"}, follow_redirects=False)
+        assert response.status_code == 303
+        yield client
+
+@pytest.fixture
+def wallet_id(client, request):
+    with SessionLocal() as db:
+        wallet = models.Wallet(name=f"Saldo {request.node.name}", wallet_type="Bank", initial_balance=0)
+        db.add(wallet)
+        db.commit()
+        return wallet.id
+
+def months_ago(months: int) -> date:
+    first = date.today().replace(day=1)
+    for _ in range(months):
+        first = (first - timedelta(days=1)).replace(day=1)
+    return first + timedelta(days=9)
+
+def post_expense(wallet_id: int, tx_date: date, amount: float):
+    with SessionLocal() as db:
+        category_id = db.query(models.Category.id).filter(models.Category.category_type == "expense").limit(1).scalar()
+        ledger.run_write(db, lambda session: ledger.post_transaction(
+            session, tx_date, amount, "Belanja", wallet_id, category_id, balance_delta=-amount
+        ))
+
+def checkpoints(wallet_id: int):
+    with SessionLocal() as db:
+        return db.query(models.BalanceCheckpoint.as_of_date, models.BalanceCheckpoint.balance).filter(
+            models.BalanceCheckpoint.wallet_id == wallet_id
+        ).order_by(models.BalanceCheckpoint.as_of_date).all()
+
+
+def test_write_fills_closed_month_checkpoints(wallet_id):
+    post_expense(wallet_id, months_ago(3), 1000)
+    post_expense(wallet_id, months_ago(1), 500)
+
+    last_closed = date.today().replace(day=1) - timedelta(days=1)
+    rows = checkpoints(wallet_id)
+    assert [as_of for as_of, _ in rows][-1] == last_closed
+    assert len(rows) == 3
+    assert [balance for _, balance in rows] == [-1000.0, -1000.0, -1500.0]
+
+    # Backdate: checkpoint setelah tanggalnya dihitung ulang di write yang sama
+    post_expense(wallet_id, months_ago(2), 250)
+    assert [balance for _, balance in checkpoints(wallet_id)] == [-1000.0, -1250.0, -1750.0]
+    with SessionLocal() as db:
+        assert balances.balance_at(db, wallet_id, date.today()) == -1750.0
+
+def test_refresh_is_idempotent(wallet_id):
+    post_expense(wallet_id, months_ago(2), 1000)
+    with SessionLocal() as db:
+        assert balances.refresh_checkpoints(db, [wallet_id]) == 0
+        db.commit()
+    assert len(checkpoints(wallet_id)) == 2
+
+def test_balance_history_get_does_not_write(client, wallet_id):
+    post_expense(wallet_id, months_ago(2), 1000)
+    # Data lama tanpa checkpoint: GET tetap benar, tanpa membuatnya
+    with SessionLocal() as db:
+        db.query(models.BalanceCheckpoint).filter(models.BalanceCheckpoint.wallet_id == wallet_id).delete()
+        db.commit()
+        version = data_version.current(db)
+
+    for path in (f"/wallets/{wallet_id}/balance-history?days=120", "/wallets/balance-history"):
+        response = client.get(path)
+        assert response.status_code == 200
+    assert client.get(f"/wallets/{wallet_id}/balance-history?days=1").json()["balances"] == [-1000.0]
+
+    assert checkpoints(wallet_id) == []
+    with SessionLocal() as db:
+        assert data_version.current(db) == version
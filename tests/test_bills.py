@@ -0,0 +1,137 @@
+"""
+Kalender tagihan: jatuh tempo tanggal 29-31 di bulan pendek, status dibayar bulan ini,
+auto-post yang mengejar bulan terlewat, dan heap scheduler.
+"""
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import models
+from app.database import SessionLocal, shards
+from app.main import app
+from app.services import bills, refdata
+
+
+@pytest.fixture(scope="module")
+def seeded():
+    # Startup aplikasi men-seed kategori & dompet default
+    with TestClient(app):
+        pass
+
+@pytest.fixture
+def make_bill(seeded, request):
+    with SessionLocal() as db:
+        category = models.Category(name=f"Tagihan {request.node.name}", category_type="expense", priority_group="fixed")
+        db.add(category)
+        db.commit()
+        refdata.cache.invalidate(db)
+        category_id = category.id
+        wallet_id = db.query(models.Wallet.id).limit(1).scalar()
+
+    def make(name: str, next_due_date: date, day_of_month: int = 31, auto_post: int = 1, amount: float = 100_000):
+        with SessionLocal() as db:
+            bill = models.RecurringBill(
+                name=name, amount=amount, day_of_month=day_of_month, next_due_date=next_due_date,
+                category_id=category_id, wallet_id=wallet_id, auto_post=auto_post, is_active=1
+            )
+            db.add(bill)
+            db.commit()
+            return bill.id
+    return make
+
+def bill_payments(name: str):
+    with SessionLocal() as db:
+        return [d for (d,) in db.query(models.Transaction.date).filter(
+            models.Transaction.description == f"Tagihan: {name}"
+        ).order_by(models.Transaction.date)]
+
+
+@pytest.mark.parametrize("year, month, day, expected", [
+    (2026, 2, 31, date(2026, 2, 28)),
+    (2028, 2, 31, date(2028, 2, 29)),
+    (2026, 4, 31, date(2026, 4, 30)),
+    (2026, 2, 15, date(2026, 2, 15)),
+])
+def test_due_in_month_clamps_to_month_end(year, month, day, expected):
+    assert bills.due_in_month(year, month, day) == expected
+
+def test_next_month_due_keeps_day_of_month():
+    # 31 Jan -> 28 Feb -> 31 Mar: dipotong hanya di bulan pendek, bukan terbawa seterusnya
+    due = date(2026, 1, 31)
+    dues = []
+    for _ in range(3):
+        due = bills.next_month_due(due, 31)
+        dues.append(due)
+    assert dues == [date(2026, 2, 28), date(2026, 3, 31), date(2026, 4, 30)]
+    assert bills.next_month_due(date(2026, 12, 31), 31) == date(2027, 1, 31)
+
+def test_first_due():
+    assert bills.first_due(date(2026, 2, 10), 31) == date(2026, 2, 28)
+    assert bills.first_due(date(2026, 2, 28), 31) == date(2026, 2, 28)
+    assert bills.first_due(date(2026, 2, 10), 5) == date(2026, 3, 5)
+
+@pytest.mark.parametrize("last_paid, next_due, paid", [
+    (None, date(2026, 3, 5), False), # Tagihan baru, jatuh tempo pertama bulan depan
+    (date(2026, 2, 5), date(2026, 3, 5), True),
+    (date(2026, 1, 31), date(2026, 2, 28), False), # Dibayar bulan lalu, bulan ini belum
+    (date(2026, 2, 5), date(2026, 2, 25), False), # Dibayar, tapi masih ada jatuh tempo bulan ini
+])
+def test_paid_this_month(last_paid, next_due, paid):
+    bill = SimpleNamespace(last_paid_date=last_paid, next_due_date=next_due)
+    assert bills.paid_this_month(bill, date(2026, 2, 10)) is paid
+
+def test_post_due_bills_catches_up_missed_months(make_bill):
+    bill_id = make_bill("Sewa", date(2026, 1, 31))
+    manual_id = make_bill("Manual", date(2026, 1, 31), auto_post=0)
+
+    with SessionLocal() as db:
+        new_dues = bills.post_due_bills(db, today=date(2026, 4, 15))
+        assert new_dues[bill_id] == date(2026, 4, 30)
+        assert manual_id not in new_dues
+        bill = db.get(models.RecurringBill, bill_id)
+        assert bill.last_paid_date == date(2026, 3, 31)
+
+    # Tanggal transaksi = tanggal jatuh tempo masing-masing bulan
+    assert bill_payments("Sewa") == [date(2026, 1, 31), date(2026, 2, 28), date(2026, 3, 31)]
+    assert bill_payments("Manual") == []
+
+    # Dijalankan ulang hari yang sama: tidak ada yang dicatat dua kali
+    with SessionLocal() as db:
+        assert bill_id not in bills.post_due_bills(db, today=date(2026, 4, 15))
+    assert len(bill_payments("Sewa")) == 3
+
+def test_pay_bill_advances_due_date(make_bill):
+    bill_id = make_bill("Listrik", date(2026, 2, 20), day_of_month=20, auto_post=0)
+    with SessionLocal() as db:
+        assert bills.pay_bill(db, bill_id, pay_date=date(2026, 2, 18)) == date(2026, 3, 20)
+        bill = db.get(models.RecurringBill, bill_id)
+        assert bills.paid_this_month(bill, date(2026, 2, 25))
+    assert bill_payments("Listrik") == [date(2026, 2, 18)]
+
+def test_scheduler_heap_skips_stale_entries(make_bill):
+    early = make_bill("Internet", date(2030, 5, 1), day_of_month=1)
+    late = make_bill("Asuransi", date(2030, 6, 1), day_of_month=1)
+    scheduler = bills.BillScheduler(shards.session)
+    with SessionLocal() as db:
+        for bill_id in (late, early):
+            scheduler.schedule(db, db.get(models.RecurringBill, bill_id))
+        assert scheduler.next_due() == date(2030, 5, 1)
+
+        # Dibayar: entri lama di heap jadi basi, jatuh tempo barunya ikut dijadwalkan
+        bills.pay_bill(db, early, pay_date=date(2030, 4, 30))
+        scheduler.schedule(db, db.get(models.RecurringBill, early))
+        assert scheduler.next_due() == date(2030, 6, 1)
+
+        # Auto-post dimatikan: tagihan keluar dari jadwal
+        bill = db.get(models.RecurringBill, late)
+        bill.auto_post = 0
+        db.commit()
+        scheduler.schedule(db, bill)
+        assert scheduler.next_due() == date(2030, 6, 1) # Jatuh tempo baru Internet
+        bill = db.get(models.RecurringBill, early)
+        bill.is_active = 0
+        db.commit()
+        scheduler.schedule(db, bill)
+        assert scheduler.next_due() is None
@@ -0,0 +1,120 @@
+"""
+Counter budget: bertambah per transaksi (add_spending), event sekali per ambang per bulan,
+dan rebuild_spent menghitung ulang dari rollup tanpa event baru.
+"""
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import models
+from app.database import SessionLocal
+from app.main import app
+from app.services import budgets, ledger, refdata, rollup
+
+MONTH = "2026-03"
+
+
+@pytest.fixture
+def budget(memory_db):
+    category = models.Category(name="Belanja", category_type="expense")
+    wallet = models.Wallet(name="Tunai", wallet_type="Cash", initial_balance=0)
+    memory_db.add_all([category, wallet])
+    memory_db.flush()
+    budget = models.Budget(category_id=category.id, month_period=MONTH, amount_limit=100_000, spent=0.0, alert_level=0)
+    memory_db.add(budget)
+    memory_db.commit()
+    return budget
+
+def spend(db, budget, amount: float):
+    budgets.add_spending(db, {(MONTH, budget.category_id): amount})
+    db.commit()
+    db.refresh(budget)
+
+def thresholds(db):
+    return [threshold for (threshold,) in db.query(models.BudgetEvent.threshold).order_by(models.BudgetEvent.id)]
+
+
+@pytest.mark.parametrize("spent, level", [(0, 0), (49_999, 0), (50_000, 50), (79_999, 50), (80_000, 80), (150_000, 80)])
+def test_alert_level(spent, level):
+    assert budgets.alert_level(spent, 100_000) == level
+
+def test_alert_level_without_limit():
+    assert budgets.alert_level(10_000, 0) == 0
+    assert budgets.alert_level(10_000, None) == 0
+
+def test_add_spending_records_each_threshold_once(memory_db, budget):
+    spend(memory_db, budget, 40_000)
+    assert (budget.spent, budget.alert_level, thresholds(memory_db)) == (40_000, 0, [])
+
+    spend(memory_db, budget, 10_000)
+    assert (budget.spent, budget.alert_level, thresholds(memory_db)) == (50_000, 50, [50])
+
+    spend(memory_db, budget, 45_000)
+    assert (budget.alert_level, thresholds(memory_db)) == (80, [50, 80])
+
+    # Sudah di atas 80%: transaksi berikutnya tidak membuat event lagi
+    spend(memory_db, budget, 10_000)
+    assert (budget.spent, thresholds(memory_db)) == (105_000, [50, 80])
+    event = memory_db.query(models.BudgetEvent).filter_by(threshold=80).one()
+    assert (event.spent, event.amount_limit, event.month_period) == (95_000, 100_000, MONTH)
+
+def test_add_spending_crossing_both_thresholds_at_once(memory_db, budget):
+    spend(memory_db, budget, 90_000)
+    assert (budget.alert_level, thresholds(memory_db)) == (80, [50, 80])
+
+def test_add_spending_ignores_categories_and_months_without_budget(memory_db, budget):
+    budgets.add_spending(memory_db, {("2026-04", budget.category_id): 90_000, (MONTH, budget.category_id + 99): 90_000})
+    memory_db.commit()
+    memory_db.refresh(budget)
+    assert (budget.spent, thresholds(memory_db)) == (0.0, [])
+
+def test_record_transactions_groups_by_month_and_category(memory_db, budget):
+    budgets.record_transactions(memory_db, [
+        {"date": date(2026, 3, 2), "category_id": budget.category_id, "amount": 30_000},
+        {"date": date(2026, 3, 20), "category_id": budget.category_id, "amount": 30_000},
+        {"date": date(2026, 4, 1), "category_id": budget.category_id, "amount": 70_000},
+    ])
+    memory_db.commit()
+    memory_db.refresh(budget)
+    assert (budget.spent, thresholds(memory_db)) == (60_000, [50])
+
+def test_rebuild_spent_from_rollups_without_new_events(memory_db, budget):
+    spend(memory_db, budget, 90_000) # Counter (dan level) melenceng dari rollup
+    wallet_id = memory_db.query(models.Wallet.id).scalar()
+    rollup.add_to_rollup(memory_db, date(2026, 3, 5), budget.category_id, wallet_id, 20_000)
+    rollup.add_to_rollup(memory_db, date(2026, 3, 6), budget.category_id, wallet_id, 35_000)
+    rollup.add_to_rollup(memory_db, date(2026, 4, 1), budget.category_id, wallet_id, 99_000)
+
+    budgets.rebuild_spent(memory_db)
+    memory_db.commit()
+    memory_db.refresh(budget)
+
+    assert (budget.spent, budget.alert_level) == (55_000, 50)
+    assert thresholds(memory_db) == [50, 80] # Hanya event dari transaksi sebelumnya
+
+def test_posted_transactions_raise_alerts_read_via_post():
+    # Alur lengkap di database aplikasi: transaksi lewat ledger, peringatan dibaca lewat POST
+    with TestClient(app) as client:
+        assert client.post("/auth/login", data={"pin": "512323"}, follow_redirects=False).status_code == 303
+        with SessionLocal() as db:
+            category = models.Category(name="Uji Budget", category_type="expense", priority_group="living")
+            db.add(category)
+            db.commit()
+            refdata.cache.invalidate(db)
+            wallet_id = db.query(models.Wallet.id).limit(1).scalar()
+            today = date.today()
+            budgets.set_budget(db, category.id, rollup.month_key(today), 100_000)
+            unread = budgets.unread_event_count(db)
+            for amount in (30_000, 30_000):
+                ledger.run_write(db, lambda session: ledger.post_transaction(
+                    session, today, amount, "Belanja", wallet_id, category.id, balance_delta=-amount
+                ))
+            assert budgets.unread_event_count(db) == unread + 1 # Lewat 50%
+
+        assert client.get("/budgets/").status_code == 200
+        with SessionLocal() as db:
+            assert budgets.unread_event_count(db) == unread + 1 # GET tidak menandai dibaca
+        assert client.post("/budgets/alerts/read").status_code == 200
+        with SessionLocal() as db:
+            assert budgets.unread_event_count(db) == 0
@@ -0,0 +1,73 @@
+"""
+Banyak write transaksi paralel lewat ledger.run_write (group commit aktif & mati):
+saldo dompet harus sama dengan jumlah jurnalnya, dan rollup sama dengan transaksi mentah.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func
+
+from app import models
+from app.config import settings
+from app.database import SessionLocal
+from app.main import app
+from app.services import balances, ledger, rollup
+
+WRITES = 200
+THREADS = 8
+
+
+@pytest.fixture(scope="module", autouse=True)
+def seeded():
+    # Startup aplikasi men-seed kategori & dompet default
+    with TestClient(app):
+        pass
+
+def create_wallets(db, label: str):
+    wallets = [models.Wallet(name=f"{label} {i}", wallet_type="Bank", initial_balance=0) for i in range(2)]
+    db.add_all(wallets)
+    db.commit()
+    return [wallet.id for wallet in wallets]
+
+def write_one(i: int, wallet_ids, categories, transfer_category_id: int):
+    tx_date = date.today() - timedelta(days=(i % 3) * 31) # Beberapa bulan rollup
+    amount = 1000 + i
+    source, target = wallet_ids[i % 2], wallet_ids[(i + 1) % 2]
+    with SessionLocal() as db:
+        if i % 5 == 0:
+            ledger.run_write(db, lambda session: ledger.post_transaction(
+                session, tx_date, amount, f"Transfer {i}", source, transfer_category_id,
+                balance_delta=-amount, counter_wallet_id=target
+            ))
+            return
+        category_id, category_type = categories[i % len(categories)]
+        ledger.run_write(db, lambda session: ledger.post_transaction(
+            session, tx_date, amount, f"Transaksi {i}", source, category_id,
+            balance_delta=ledger.balance_delta(category_type, amount)
+        ))
+
+@pytest.mark.parametrize("group_commit", [False, True])
+def test_parallel_writes_stay_consistent(monkeypatch, group_commit):
+    monkeypatch.setattr(settings, "GROUP_COMMIT_ENABLED", group_commit)
+    with SessionLocal() as db:
+        wallet_ids = create_wallets(db, f"Paralel {group_commit}")
+        categories = [(c.id, c.category_type) for c in db.query(models.Category).filter(
+            models.Category.category_type.in_([models.TransactionType.INCOME, models.TransactionType.EXPENSE]))]
+        transfer_category_id = ledger.system_category(
+            db, "Transfer", category_type=models.TransactionType.TRANSFER, icon="arrows-left-right"
+        )
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        list(pool.map(lambda i: write_one(i, wallet_ids, categories, transfer_category_id), range(WRITES)))
+
+    with SessionLocal() as db:
+        tx_count = db.query(func.count(models.Transaction.id)).filter(
+            models.Transaction.wallet_id.in_(wallet_ids)).scalar()
+        assert tx_count == WRITES
+        for wallet_id in wallet_ids:
+            balance = db.get(models.Wallet, wallet_id).initial_balance
+            postings = db.execute(balances.postings_sum_select(wallet_id, None, date.max)).scalar()
+            assert balance == pytest.approx(postings)
+        assert rollup.verify_rollups(db) == []
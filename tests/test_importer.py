@@ -0,0 +1,173 @@
+"""
+Import mutasi CSV / OFX: format nominal (pemisah ribuan, kolom tanpa tanda, debit/kredit),
+duplikat saat import ulang, dan baris rusak yang dilaporkan, bukan dilewati diam-diam.
+"""
+import io
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import models
+from app.database import SessionLocal
+from app.main import app
+from app.services import importer
+
+
+@pytest.fixture(scope="module")
+def client():
+    # Startup aplikasi men-seed kategori & dompet default
+    with TestClient(app) as client:
+        response = client.post("/auth/login", data={"pin": "512323"}, follow_redirects=False)
+        assert response.status_code == 303
+        yield client
+
+@pytest.fixture
+def wallet_id(client, request):
+    # Dompet baru per test, agar transaksi hasil import mudah dipisahkan
+    with SessionLocal() as db:
+        wallet = models.Wallet(name=f"Import {request.node.name}", wallet_type="Bank", initial_balance=0)
+        db.add(wallet)
+        db.commit()
+        return wallet.id
+
+def run_import(wallet_id: int, text: str, file_format: str = "csv", **kwargs):
+    with SessionLocal() as db:
+        return importer.import_statement(db, io.BytesIO(text.encode()), file_format, wallet_id=wallet_id, **kwargs)
+
+def imported_rows(wallet_id: int):
+    # [(deskripsi, nominal, tipe kategori)] urut id
+    with SessionLocal() as db:
+        return [
+            (description, amount, category_type)
+            for description, amount, category_type in db.query(
+                models.Transaction.description, models.Transaction.amount, models.Category.category_type
+            ).join(models.Category).filter(models.Transaction.wallet_id == wallet_id).order_by(models.Transaction.id)
+        ]
+
+def wallet_balance(wallet_id: int) -> float:
+    with SessionLocal() as db:
+        return db.get(models.Wallet, wallet_id).initial_balance
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("-1,250.00", -1250.0),
+    ("1.250.000,50", 1250000.5),
+    ("Rp 1.250", 1250.0),
+    ("(75.000)", -75000.0),
+    ("250000-", -250000.0),
+    ("12.5", 12.5),
+    ("1,50", 1.5),
+    ("", None),
+])
+def test_parse_amount_guesses_separators(text, expected):
+    assert importer.parse_amount(text) == expected
+
+@pytest.mark.parametrize("text", ["abc", "-", "1.2.3", "12,34.5"])
+def test_parse_amount_rejects_malformed(text):
+    with pytest.raises(ValueError):
+        importer.parse_amount(text)
+
+def test_csv_signed_amounts_with_thousands_separator(wallet_id):
+    result = run_import(wallet_id, (
+        "Tanggal,Keterangan,Nominal\n"
+        '05/03/2026,Indomaret Cibubur,"-1,250.00"\n'
+        '25/03/2026,Gaji Maret,"8,500,000.00"\n'
+    ))
+
+    assert (result.imported, result.skipped, result.invalid) == (2, 0, 0)
+    assert imported_rows(wallet_id) == [
+        ("Indomaret Cibubur", 1250.0, "expense"),
+        ("Gaji Maret", 8500000.0, "income"),
+    ]
+    assert wallet_balance(wallet_id) == 8500000.0 - 1250.0
+
+def test_csv_debit_credit_columns(wallet_id):
+    result = run_import(wallet_id, (
+        "tgl,uraian,debit,kredit\n"
+        "01/04/2026,PLN Token,150.000,\n"
+        "02/04/2026,Transfer masuk,,2.000.000\n"
+    ))
+
+    assert result.imported == 2
+    assert imported_rows(wallet_id) == [("PLN Token", 150000.0, "expense"), ("Transfer masuk", 2000000.0, "income")]
+
+def test_csv_unsigned_amounts_follow_direction_column(wallet_id):
+    result = run_import(wallet_id, (
+        "date,description,amount,type\n"
+        "2026-04-03,Superindo,350000,DB\n"
+        "2026-04-04,Refund toko,50000,CR\n"
+    ))
+
+    assert result.imported == 2
+    assert imported_rows(wallet_id) == [("Superindo", 350000.0, "expense"), ("Refund toko", 50000.0, "income")]
+
+def test_csv_unsigned_amounts_without_direction_are_not_all_income(wallet_id):
+    # Tanpa tanda & tanpa kolom arah: keyword rules, lalu default pengeluaran
+    result = run_import(wallet_id, (
+        "date,description,amount\n"
+        "2026-04-03,Gaji April,9000000\n"
+        "2026-04-05,Starbucks,65000\n"
+        "2026-04-06,Toko bangunan,120000\n"
+    ))
+
+    assert result.imported == 3
+    assert [category_type for _, _, category_type in imported_rows(wallet_id)] == ["income", "expense", "expense"]
+
+def test_reimport_counts_duplicates(wallet_id):
+    text = (
+        "date,description,amount\n"
+        "2026-05-01,Kopi Kenangan,-25000\n"
+        "2026-05-01,Kopi Kenangan,-25000\n" # Dua kali beli kopi yang sama di hari yang sama
+        "2026-05-02,Grab,-40000\n"
+    )
+    first = run_import(wallet_id, text)
+    second = run_import(wallet_id, text)
+
+    assert (first.imported, first.duplicates) == (3, 0)
+    assert (second.imported, second.duplicates) == (0, 3)
+    assert len(imported_rows(wallet_id)) == 3
+    assert wallet_balance(wallet_id) == -90000.0
+
+def test_malformed_rows_are_reported(wallet_id):
+    result = run_import(wallet_id, (
+        "date,description,amount\n"
+        "2026-05-03,Listrik,-1.2.3\n"
+        "bukan tanggal,Pulsa,-50000\n"
+        "2026-05-04,Indomaret,-30000\n"
+        "2026-05-05,Saldo nol,0\n"
+    ))
+
+    assert (result.imported, result.skipped, result.invalid) == (1, 1, 2)
+    assert result.errors == ["baris 2: nominal '-1.2.3' tidak valid", "baris 3: tanggal 'bukan tanggal' tidak valid"]
+    assert imported_rows(wallet_id) == [("Indomaret", 30000.0, "expense")]
+
+def test_ofx_import_from_path(wallet_id, tmp_path):
+    path = tmp_path / "mutasi.ofx"
+    path.write_text(
+        "OFXHEADER:100\n<OFX><BANKTRANLIST>\n"
+        "<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20260506<TRNAMT>-125000,50<NAME>SPBU Pertamina</STMTTRN>\n"
+        "<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20260507<TRNAMT>3000000.00<NAME>Bonus</STMTTRN>\n"
+        "<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20260508<TRNAMT>abc<NAME>Rusak</STMTTRN>\n"
+        "</BANKTRANLIST></OFX>\n"
+    )
+    with SessionLocal() as db:
+        result = importer.import_statement(db, str(path), "ofx", wallet_id=wallet_id, chunk_size=2)
+
+    assert (result.imported, result.invalid, result.batches) == (2, 1, 2)
+    assert result.errors == ["transaksi 3: nominal 'abc' tidak valid"]
+    assert imported_rows(wallet_id) == [("SPBU Pertamina", 125000.5, "expense"), ("Bonus", 3000000.0, "income")]
+
+def test_upload_redirect_reports_invalid_rows(client, wallet_id):
+    text = "date,description,amount\n2026-05-09,Indomaret,-30000\n2026-05-10,Pulsa,-1.2.3\n"
+    response = client.post(
+        "/transactions/import", data={"wallet_id": wallet_id},
+        files={"file": ("mutasi.csv", text.encode(), "text/csv")}, follow_redirects=False,
+    )
+
+    assert response.status_code == 303
+    query = parse_qs(urlparse(response.headers["location"]).query)
+    assert query["imported"] == ["1"]
+    assert query["invalid"] == ["1"]
+    assert query["error"] == ["baris 3: nominal '-1.2.3' tidak valid"]
+    assert "baris 3: nominal" in client.get(response.headers["location"]).text
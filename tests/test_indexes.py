@@ -0,0 +1,15 @@
+from app import migrations
+
+
+def test_hot_queries_use_expected_indexes(memory_db):
+    results = migrations.explain_query_plans(memory_db)
+    assert results
+
+    failed = {name: plan for name, expected_index, ok, plan in results if not ok}
+    assert not failed, f"Query tidak memakai index yang diharapkan: {failed}"
+
+def test_hot_queries_never_scan_transactions(memory_db):
+    for name, expected_index, ok, plan in migrations.explain_query_plans(memory_db):
+        # "SCAN transactions USING INDEX ..." (urut index + LIMIT) boleh; tanpa index = full scan
+        full_scans = [line for line in plan if line.startswith("SCAN transactions") and "USING" not in line]
+        assert not full_scans, f"{name} full scan tabel transaksi: {plan}"
@@ -0,0 +1,84 @@
+"""
+JobPool single-flight: submit paralel dengan key yang sama selagi job pertama
+masih berjalan hanya menghasilkan satu panggilan ke client Gemini (palsu).
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from app.services.jobs import JobPool
+
+CALLERS = 16
+
+
+class BlockingClient:
+    """
+    Pengganti genai.Client yang menahan generate_content sampai `release` di-set.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self._lock = threading.Lock()
+        self.models = SimpleNamespace(generate_content=self.generate_content)
+
+    def generate_content(self, **kwargs):
+        with self._lock:
+            self.calls += 1
+        self.started.set()
+        assert self.release.wait(5)
+        return SimpleNamespace(text="Saran AI")
+
+
+def ask(client) -> str:
+    return client.models.generate_content(model="gemini-test", contents="prompt").text
+
+def wait_finished(job, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not job.finished:
+        assert time.monotonic() < deadline, "job tidak selesai"
+        time.sleep(0.01)
+
+def test_concurrent_submits_share_one_call():
+    client = BlockingClient()
+    pool = JobPool(max_workers=4, name="test-advisor")
+    barrier = threading.Barrier(CALLERS)
+
+    def submit(_):
+        barrier.wait()
+        return pool.submit("advice:fingerprint", ask, client)
+
+    with ThreadPoolExecutor(CALLERS) as callers:
+        jobs = list(callers.map(submit, range(CALLERS)))
+    assert client.started.wait(5)
+
+    assert len({job.id for job in jobs}) == 1
+    client.release.set()
+    wait_finished(jobs[0])
+
+    assert client.calls == 1
+    assert all(pool.get(job.id).result == "Saran AI" for job in jobs)
+
+    # Job selesai: submit berikutnya dengan key yang sama membuat panggilan baru
+    again = pool.submit("advice:fingerprint", ask, client)
+    assert again.id != jobs[0].id
+    wait_finished(again)
+    assert client.calls == 2
+
+def test_failed_job_reports_error_and_frees_key():
+    pool = JobPool(max_workers=1, name="test-failing")
+
+    def boom():
+        raise RuntimeError("Gemini tidak bisa dihubungi")
+
+    job = pool.submit("advice:gagal", boom)
+    wait_finished(job)
+    assert (job.status, job.result, job.error) == ("error", None, "Gemini tidak bisa dihubungi")
+
+    # Key dilepas setelah gagal: submit berikutnya menjalankan job baru
+    again = pool.submit("advice:gagal", lambda: "Saran AI")
+    assert again.id != job.id
+    wait_finished(again)
+    assert (again.status, again.result, again.error) == ("done", "Saran AI", None)
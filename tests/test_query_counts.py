@@ -0,0 +1,61 @@
+"""
+Jumlah statement SQL halaman riwayat & dashboard tidak boleh ikut naik dengan
+jumlah transaksi (regresi N+1): dihitung lewat event before_cursor_execute.
+"""
+from contextlib import contextmanager
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import models
+from app.database import SessionLocal
+from app.main import app
+
+N = 60 # Lebih dari satu halaman riwayat
+
+
+@contextmanager
+def count_statements():
+    counter = {"statements": 0}
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter["statements"] += 1
+
+    event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(Engine, "before_cursor_execute", before_cursor_execute)
+
+def add_transactions(count: int):
+    with SessionLocal() as db:
+        wallet = db.query(models.Wallet).first()
+        categories = db.query(models.Category).filter(models.Category.category_type == "expense").all()
+        db.add_all([
+            models.Transaction(date=date.today(), amount=1000 + i, description=f"Belanja {i}",
+                               wallet_id=wallet.id, category_id=categories[i % len(categories)].id)
+            for i in range(count)
+        ])
+        db.commit()
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        response = client.post("/auth/login", data={"pin": "512323"}, follow_redirects=False)
+        assert response.status_code == 303
+        yield client
+
+@pytest.mark.parametrize("path", ["/transactions/history", "/"])
+def test_statement_count_independent_of_rows(client, path):
+    counts = []
+    # N lalu 3N baris. Tiap putaran menambah transaksi (versi data naik), jadi halaman selalu dirender ulang
+    for added in (N, 2 * N):
+        add_transactions(added)
+        with count_statements() as counter:
+            response = client.get(path)
+        assert response.status_code == 200
+        counts.append(counter["statements"])
+    assert counts[0] == counts[1], f"{path}: {counts[0]} statement lalu {counts[1]} statement setelah baris ditambah"
@@ -0,0 +1,133 @@
+"""
+Foto struk: hash SHA-256 isi file, penyimpanan content-addressed (foto sama disimpan sekali),
+penolakan file kebesaran / bukan gambar, dan kompresi di process pool sampai status ready.
+"""
+import hashlib
+import io
+import os
+import time
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app import models
+from app.config import settings
+from app.database import SessionLocal
+from app.main import app
+from app.services import ledger, receipts
+
+TENANT = "uji-struk"
+
+
+@pytest.fixture(scope="module", autouse=True)
+def process_pool():
+    yield
+    receipts.shutdown()
+
+def photo_bytes(color=(200, 30, 30), size=(2000, 1200)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+def wait_ready(tenant: str, digest: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while receipts.status(tenant, digest) != receipts.READY:
+        assert time.monotonic() < deadline, "foto struk tidak selesai diproses"
+        time.sleep(0.05)
+
+def leftover_uploads(tenant: str):
+    upload_dir = os.path.join(receipts.tenant_dir(tenant), ".upload")
+    return os.listdir(upload_dir) if os.path.isdir(upload_dir) else []
+
+
+def test_upload_hashes_content_and_compresses():
+    data = photo_bytes()
+    digest = receipts.receive_file(TENANT, io.BytesIO(data))
+
+    assert digest == hashlib.sha256(data).hexdigest()
+    assert receipts.full_path(TENANT, digest).endswith(os.path.join(digest[:2], f"{digest}.jpg"))
+    wait_ready(TENANT, digest)
+
+    with Image.open(receipts.full_path(TENANT, digest)) as full, Image.open(receipts.thumb_path(TENANT, digest)) as thumb:
+        assert full.format == thumb.format == "JPEG"
+        assert max(full.size) <= settings.RECEIPT_MAX_SIDE
+        assert max(thumb.size) <= settings.RECEIPT_THUMB_SIDE
+    # Upload asli dihapus setelah diproses
+    assert not os.path.exists(receipts.path_for(TENANT, digest, ".src"))
+    assert leftover_uploads(TENANT) == []
+
+def test_same_photo_is_stored_once():
+    data = photo_bytes(color=(10, 120, 40))
+    first = receipts.receive_file(TENANT, io.BytesIO(data))
+    second = receipts.receive_file(TENANT, io.BytesIO(data)) # Selagi yang pertama masih diproses
+    wait_ready(TENANT, first)
+    third = receipts.receive_file(TENANT, io.BytesIO(data)) # Sudah tersimpan
+
+    assert first == second == third
+    folder = os.path.dirname(receipts.full_path(TENANT, first))
+    assert sorted(name for name in os.listdir(folder) if name.startswith(first)) == [
+        f"{first}.jpg", f"{first}.thumb.jpg",
+    ]
+    assert leftover_uploads(TENANT) == []
+
+def test_oversized_upload_is_stopped_mid_stream():
+    upload = receipts.ReceiptUpload(TENANT, max_bytes=100 * 1024)
+    with pytest.raises(receipts.ReceiptError) as error:
+        for _ in range(10):
+            upload.write(b"\xff\xd8\xff" + bytes(64 * 1024))
+    upload.abort()
+
+    assert error.value.status_code == 413
+    assert upload.size <= 2 * 64 * 1024 + 6 # Berhenti di chunk yang melewati batas
+    assert leftover_uploads(TENANT) == []
+
+@pytest.mark.parametrize("data, status_code", [
+    (b"%PDF-1.7 bukan foto" * 10, 415),
+    (b"", 400),
+])
+def test_rejects_non_images_and_empty_files(data, status_code):
+    with pytest.raises(receipts.ReceiptError) as error:
+        receipts.receive_file(TENANT, io.BytesIO(data))
+    assert error.value.status_code == status_code
+    assert leftover_uploads(TENANT) == []
+
+@pytest.mark.parametrize("head", [
+    b"\xff\xd8\xff\xe0" + bytes(8),
+    b"\x89PNG\r\n\x1a\n" + bytes(4),
+    b"GIF89a" + bytes(6),
+    b"RIFF\x00\x00\x00\x00WEBP",
+])
+def test_image_signatures(head):
+    assert receipts._is_image(head)
+
+def test_upload_route():
+    with TestClient(app) as client:
+        assert client.post("/auth/login", data={"pin": "512323"}, follow_redirects=False).status_code == 303
+        with SessionLocal() as db:
+            wallet_id = db.query(models.Wallet.id).limit(1).scalar()
+            category_id = db.query(models.Category.id).filter(models.Category.category_type == "expense").limit(1).scalar()
+            tx_id = ledger.run_write(db, lambda session: ledger.post_transaction(
+                session, date.today(), 15000, "Struk", wallet_id, category_id, balance_delta=-15000
+            ))
+
+        assert client.post("/transactions/999999/receipt", content=photo_bytes()).status_code == 404
+        assert client.post(f"/transactions/{tx_id}/receipt", content=b"bukan foto" * 10).status_code == 415
+
+        data = photo_bytes(color=(30, 30, 200))
+        body = client.post(f"/transactions/{tx_id}/receipt", content=data).json()
+        digest = hashlib.sha256(data).hexdigest()
+        assert body["receipt"] == digest
+        assert body["thumb_url"] == f"/receipts/{digest}/thumb"
+        with SessionLocal() as db:
+            assert db.get(models.Transaction, tx_id).receipt_path == digest
+
+        deadline = time.monotonic() + 30
+        while (response := client.get(f"/receipts/{digest}/thumb")).status_code == 503:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/jpeg"
+        assert "immutable" in response.headers["cache-control"]
+        assert client.get(f"/receipts/{'0' * 64}").status_code == 404
@@ -0,0 +1,63 @@
+"""
+Form transaksi yang sudah tersimpan tapi responsnya hilang, lalu dikirim ulang
+service worker lewat /transactions/batch dengan idempotency key yang sama,
+hanya tercatat sekali.
+"""
+import uuid
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import models
+from app.database import SessionLocal
+from app.main import app
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        response = client.post("/auth/login", data={"pin": "512323"}, follow_redirects=False)
+        assert response.status_code == 303
+        yield client
+
+def expense_form(description: str, key: str):
+    with SessionLocal() as db:
+        wallet = db.query(models.Wallet).filter(models.Wallet.is_active == 1).first()
+        category = db.query(models.Category).filter(models.Category.category_type == "expense").first()
+    return {
+        "date": date.today().isoformat(), "amount": 42000, "description": description,
+        "wallet_id": wallet.id, "category_id": category.id, "idempotency_key": key,
+    }
+
+def count_transactions(description: str) -> int:
+    with SessionLocal() as db:
+        return db.query(models.Transaction).filter(models.Transaction.description == description).count()
+
+
+def test_form_post_replayed_through_batch_is_duplicate(client):
+    key = str(uuid.uuid4())
+    form = expense_form("Form lalu antrian", key)
+
+    response = client.post("/transactions/add", data=form, follow_redirects=False)
+    assert response.status_code == 303
+    assert count_transactions("Form lalu antrian") == 1
+
+    # Respons dianggap hilang: service worker mengirim isi form yang sama lewat batch
+    item = {k: form[k] for k in ("date", "amount", "description", "wallet_id", "category_id", "idempotency_key")}
+    body = client.post("/transactions/batch", json={"transactions": [item]}).json()
+
+    assert body["applied"] == 0
+    assert body["results"][0]["status"] == "duplicate"
+    assert count_transactions("Form lalu antrian") == 1
+
+def test_form_post_resubmitted_with_same_key_posts_once(client):
+    form = expense_form("Form dikirim dua kali", str(uuid.uuid4()))
+    for _ in range(2):
+        assert client.post("/transactions/add", data=form, follow_redirects=False).status_code == 303
+    assert count_transactions("Form dikirim dua kali") == 1
+
+def test_form_post_without_key_still_posts(client):
+    form = expense_form("Form tanpa key", "")
+    assert client.post("/transactions/add", data=form, follow_redirects=False).status_code == 303
+    assert count_transactions("Form tanpa key") == 1
@@ -0,0 +1,63 @@
+"""
+Load test multi-keluarga: 1.000 keluarga lewat pool shard yang dibatasi. Shard yang
+terbuka, file descriptor dan RSS proses harus mendatar setelah pool penuh,
+bukan naik sebanding jumlah keluarga (versi lewat HTTP dengan laporan: bench/tenants.py).
+"""
+import os
+from datetime import date
+
+import pytest
+
+from app import models
+from app.database import shards
+from app.services import ledger
+
+TENANTS = int(os.getenv("TEST_TENANTS", "1000"))
+MAX_OPEN = 8
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def open_fds() -> int:
+    return len(os.listdir("/proc/self/fd"))
+
+def visit(tenant: str):
+    # Satu transaksi lalu baca ulang, lewat shard (dibuat, dimigrasi & di-seed saat pertama dibuka)
+    with shards.session(tenant) as db:
+        amount = 25000
+        ledger.post_transaction(db, date.today(), amount, f"Belanja {tenant}", 1, 3,
+                                ledger.balance_delta(ledger.category_type(db, 3), amount))
+        db.commit()
+        descriptions = {d for (d,) in db.query(models.Transaction.description)}
+    assert descriptions == {f"Belanja {tenant}"}, tenant
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="butuh /proc (Linux)")
+def test_thousand_tenants_bounded_resources(monkeypatch):
+    monkeypatch.setattr(shards, "max_open", MAX_OPEN)
+    monkeypatch.setattr(shards, "auto_create", True)
+    names = [f"beban-{i:04d}" for i in range(TENANTS)]
+
+    try:
+        # Pemanasan: pool penuh, cache & import sudah terisi sebelum baseline diukur
+        warmup = 4 * MAX_OPEN
+        for name in names[:warmup]:
+            visit(name)
+        baseline_fds, baseline_rss = open_fds(), rss_mb()
+
+        for name in names[warmup:]:
+            visit(name)
+            assert shards.stats()["open"] <= MAX_OPEN + 1 # + keluarga default
+        # Keluarga yang sudah di-evict dibuka ulang: datanya tetap ada
+        visit(names[0])
+
+        assert shards.stats()["evicted"] >= TENANTS - MAX_OPEN
+        assert open_fds() <= baseline_fds + 4
+        assert rss_mb() - baseline_rss < 64, f"RSS naik {rss_mb() - baseline_rss:.1f} MB"
+    finally:
+        shards.close_all()